@@ -0,0 +1,5 @@
+# 
+# NBR 5410 Calculator
+# 
+# 
+# Author: Marcelo Tellier Sartori Vaz <marcelotsvaz@gmail.com>
\ No newline at end of file
@@ -0,0 +1,245 @@
+'''
+Benchmarks for the calculation engine, using projects from `benchmarks.generate`.
+
+Usage: `python -m benchmarks.engine [--sizes N...] [--repeat N] [--output FILE]`, from the
+repository root.
+'''
+
+import json
+import platform
+import subprocess
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from collections.abc import Callable
+from functools import partial
+from importlib.metadata import version
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Any
+
+from benchmarks.generate import ProjectGenerator
+from nbr_5410_calculator.installation.project import Project
+from nbr_5410_calculator.installation.projectFile import dumpProject, loadProject as loadProjectFile
+from nbr_5410_calculator.installation.sizing import sizeCircuits
+from nbr_5410_calculator.installation.util import ProjectError, UniqueSerializable
+
+
+
+type BenchmarkResult = dict[str, Any]
+
+defaultSizes = [ 100, 1_000, 10_000 ]
+
+
+
+def loadProject( data: bytes ) -> Project:
+	'''
+	Load project file from `data`, without reusing instances from previous runs.
+	'''
+	
+	with UniqueSerializable.session():
+		return loadProjectFile( data )
+
+
+def sizeAllCircuits( project: Project ) -> int:
+	'''
+	Read calculated properties of all circuits, one at a time. Return number of circuits with errors.
+	'''
+	
+	errors = 0
+	
+	for circuit in project.iterCircuits():
+		try:
+			_ = circuit.current, circuit.breaker, circuit.wire, circuit.voltageDrop
+		except ProjectError:
+			errors += 1
+	
+	return errors
+
+
+def fillAllConduits( project: Project ) -> int:
+	'''
+	Select conduit for all conduit runs. Return number of conduit runs with errors.
+	'''
+	
+	errors = 0
+	
+	for conduitRun in project.conduitRuns:
+		try:
+			_ = conduitRun.conduit, conduitRun.fillFactor
+		except ProjectError:
+			errors += 1
+	
+	return errors
+
+
+def _timed[T]( function: Callable[[], T] ) -> tuple[T, float]:
+	'''
+	Call `function` and return its result and elapsed time in seconds.
+	'''
+	
+	start = perf_counter()
+	result = function()
+	
+	return result, perf_counter() - start
+
+
+
+def benchmarkProject( circuitCount: int, seed: int, repeat: int ) -> BenchmarkResult:
+	'''
+	Generate project with `circuitCount` circuits and time each step `repeat` times.
+	
+	Steps run in order on the same project: `load`, `sizing`, `conduitFill`, `vectorizedSizing` and
+	`save`. Later steps reuse values cached by earlier steps, e.g. `conduitFill` doesn't include
+	wire selection. `loadCompact` and `saveCompact` use the version 2 file format, while `load` and
+	`save` use version 1.
+	'''
+	
+	project = ProjectGenerator( seed ).generateProject( circuitCount )
+	data = project.model_dump_json().encode()
+	compactData = dumpProject( project )
+	samples: dict[str, list[float]] = {
+		'load': [],
+		'loadCompact': [],
+		'sizing': [],
+		'conduitFill': [],
+		'vectorizedSizing': [],
+		'save': [],
+		'saveCompact': [],
+	}
+	
+	for _ in range( repeat ):
+		_, seconds = _timed( partial( loadProject, compactData ) )
+		samples['loadCompact'].append( seconds )
+		
+		project, seconds = _timed( partial( loadProject, data ) )
+		samples['load'].append( seconds )
+		
+		_, seconds = _timed( partial( sizeAllCircuits, project ) )
+		samples['sizing'].append( seconds )
+		
+		_, seconds = _timed( partial( fillAllConduits, project ) )
+		samples['conduitFill'].append( seconds )
+		
+		_, seconds = _timed( partial( sizeCircuits, project ) )
+		samples['vectorizedSizing'].append( seconds )
+		
+		_, seconds = _timed( project.model_dump_json )
+		samples['save'].append( seconds )
+		
+		_, seconds = _timed( partial( dumpProject, project ) )
+		samples['saveCompact'].append( seconds )
+	
+	# Tracing slows down allocations, so memory is measured separately. Errors are counted here,
+	# since timed steps may not run.
+	tracemalloc.start()
+	try:
+		project = loadProject( data )
+		circuitErrors = sizeAllCircuits( project )
+		conduitRunErrors = fillAllConduits( project )
+		_, peakMemory = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+	
+	return {
+		'circuits': circuitCount,
+		'conduitRuns': len( project.conduitRuns ),
+		'circuitErrors': circuitErrors,
+		'conduitRunErrors': conduitRunErrors,
+		'fileSize': len( data ),
+		'compactFileSize': len( compactData ),
+		'peakMemory': peakMemory,
+		# Only memory is measured without repeats.
+		'seconds': { name: median( times ) for name, times in samples.items() if times },
+		'samples': samples,
+	}
+
+
+def environment() -> dict[str, Any]:
+	'''
+	Information needed to compare results between runs.
+	'''
+	
+	try:
+		commit = subprocess.run(
+			[ 'git', 'rev-parse', 'HEAD' ],
+			capture_output = True,
+			check = True,
+			text = True,
+		).stdout.strip()
+	except ( OSError, subprocess.CalledProcessError ):
+		commit = None
+	
+	return {
+		'commit': commit,
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'processor': platform.processor(),
+		'pydantic': version( 'pydantic' ),
+		'numpy': version( 'numpy' ),
+	}
+
+
+
+def main() -> None:
+	'''
+	Entry point.
+	'''
+	
+	parser = ArgumentParser( description = __doc__ )
+	parser.add_argument(
+		'-n', '--sizes',
+		nargs = '+',
+		type = int,
+		default = defaultSizes,
+		help = 'number of circuits in each project, up to 100,000 (default: %(default)s)',
+	)
+	parser.add_argument(
+		'-r', '--repeat',
+		type = int,
+		default = 3,
+		help = 'runs for each project (default: %(default)s)',
+	)
+	parser.add_argument(
+		'-s', '--seed',
+		type = int,
+		default = 0,
+		help = 'random seed for generated projects (default: %(default)s)',
+	)
+	parser.add_argument(
+		'-o', '--output',
+		type = Path,
+		help = 'write results as JSON to this file instead of standard output',
+	)
+	arguments = parser.parse_args()
+	
+	results: list[BenchmarkResult] = []
+	for circuitCount in arguments.sizes:
+		result = benchmarkProject( circuitCount, arguments.seed, arguments.repeat )
+		results.append( result )
+		
+		timings = '  '.join( f'{name} {seconds:8.3f} s' for name, seconds in result['seconds'].items() )
+		print(
+			f'{circuitCount:>8,} circuits  {timings}  peak {result['peakMemory'] / 2**20:8.1f} MiB',
+			file = sys.stderr,
+		)
+	
+	report = {
+		'environment': environment(),
+		'seed': arguments.seed,
+		'repeat': arguments.repeat,
+		'results': results,
+	}
+	
+	if arguments.output:
+		with open( arguments.output, 'w', encoding = 'utf-8' ) as output:
+			json.dump( report, output, indent = '\t' )
+	else:
+		json.dump( report, sys.stdout, indent = '\t' )
+		sys.stdout.write( '\n' )
+
+
+
+if __name__ == '__main__':
+	main()
\ No newline at end of file
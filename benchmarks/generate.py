@@ -0,0 +1,261 @@
+'''
+Generator of large synthetic projects for benchmarks.
+
+Usage: `python -m benchmarks.generate [--seed N] [--output FILE] CIRCUITS`, from the repository
+root.
+'''
+
+import json
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from random import Random
+from typing import Any
+from uuid import UUID
+
+from nbr_5410_calculator.installation.catalogs import loadCatalogs
+from nbr_5410_calculator.installation.circuit import (
+	BaseCircuit,
+	BreakerCurve,
+	Circuit,
+	LoadType,
+	Supply,
+	UpstreamCircuit,
+	WireInsulation,
+	WireMaterial,
+	WireType,
+)
+from nbr_5410_calculator.installation.conduitRun import ConduitRun, ConduitType, ReferenceMethod
+from nbr_5410_calculator.installation.project import Project
+from nbr_5410_calculator.installation.util import UniqueSerializable
+
+
+
+templatePath = Path( 'casa.json' )
+
+
+
+class ProjectGenerator:
+	'''
+	Generate projects with any number of circuits, using circuits, load types and supplies from a
+	template project as seed.
+	
+	- Circuits are nested in `UpstreamCircuit`s up to `maxDepth` levels, with larger upstream
+	circuits closer to the top.
+	- Most circuits are grouped in `ConduitRun`s of 1 to 6 circuits.
+	- Supplies, load types and wire types are mixed. Supplies with 1, 2 and 3 phases are added to
+	the template's, and one `WireType` is created for each wire catalog.
+	
+	The same `seed` always generates the same project, including UUIDs.
+	'''
+	
+	maxDepth = 3
+	upstreamCircuitProbability = 0.25
+	conduitRunProbability = 0.9
+	
+	
+	def __init__( self, seed: int = 0, template: Path = templatePath ) -> None:
+		self.random = Random( seed )
+		
+		# UUIDs are reproducible and would collide with instances from previous projects.
+		UniqueSerializable.clearInstanceRegistry()
+		
+		with open( template, 'rb' ) as file:
+			data: dict[str, Any] = json.load( file )
+		
+		self.supplies = [
+			*( self._create( Supply, supply ) for supply in data['supplies'] ),
+			self._create( Supply, { 'voltage': 127, 'phases': 1 } ),
+			self._create( Supply, { 'voltage': 220, 'phases': 2 } ),
+			self._create( Supply, { 'voltage': 380, 'phases': 3 } ),
+		]
+		self.loadTypes = {
+			loadType['uuid']: self._create( LoadType, loadType ) for loadType in data['loadTypes']
+		}
+		self.wireTypes = [
+			self._create( WireType, {
+				'material': WireMaterial( material ),
+				'insulation': WireInsulation( insulation ),
+			} )
+			for material, insulation in (
+				name.removeprefix( 'wireTypes/' ).split( '-' )
+				for name in loadCatalogs()
+				if name.startswith( 'wireTypes/' )
+			)
+		]
+		# Aluminium wires are less common in final circuits.
+		self.wireTypeWeights = [
+			1 if wireType.material == WireMaterial.ALUMINIUM else 4 for wireType in self.wireTypes
+		]
+		self.circuitTemplates = [
+			circuit
+			for topCircuit in data['circuits']
+			for circuit in ( topCircuit, *topCircuit.get( 'circuits', [] ) )
+			if 'loadPower' in circuit
+		]
+		self.conduitRunTemplates = data['conduitRuns']
+	
+	
+	def _create[T: Supply | LoadType | WireType]( self, model: type[T], data: dict[str, Any] ) -> T:
+		'''
+		Create `model` from template `data`, with a new UUID.
+		'''
+		
+		data = { key: value for key, value in data.items() if key not in ( 'uuid', '__type__' ) }
+		
+		return model( **data, uuid = self._uuid() )
+	
+	
+	def _uuid( self ) -> UUID:
+		'''
+		Random UUID, reproducible with the same seed.
+		'''
+		
+		return UUID( int = self.random.getrandbits( 128 ), version = 4 )
+	
+	
+	def generateProject( self, circuitCount: int ) -> Project:
+		'''
+		Generate project with `circuitCount` circuits, including upstream circuits.
+		'''
+		
+		circuits = self._generateCircuits( circuitCount, 0 )
+		project = Project(
+			uuid = self._uuid(),
+			name = f'Benchmark Project ({circuitCount:,} circuits)',
+			supplies = self.supplies,
+			loadTypes = list( self.loadTypes.values() ),
+			wireTypes = self.wireTypes,
+			defaultSupply = self.supplies[0],
+			defaultLoadType = next( iter( self.loadTypes.values() ) ),
+			defaultWireType = self.wireTypes[0],
+			circuits = circuits,
+		)
+		project.conduitRuns = self._generateConduitRuns( list( project.iterCircuits() ) )
+		
+		return project
+	
+	
+	def _generateCircuits( self, count: int, depth: int ) -> list[BaseCircuit]:
+		'''
+		Generate `count` circuits, nested in upstream circuits starting at `depth`.
+		'''
+		
+		circuits: list[BaseCircuit] = []
+		
+		while count > 0:
+			if (
+				count > 1
+				and depth < self.maxDepth
+				and self.random.random() < self.upstreamCircuitProbability
+			):
+				downstreamCount = min( count - 1, self.random.randint( 4, 16 ) ** ( self.maxDepth - depth ) )
+				circuits.append( self._generateUpstreamCircuit(
+					self._generateCircuits( downstreamCount, depth + 1 ),
+					depth,
+				) )
+				count -= downstreamCount + 1
+			else:
+				circuits.append( self._generateCircuit() )
+				count -= 1
+		
+		return circuits
+	
+	
+	def _generateCircuit( self ) -> Circuit:
+		'''
+		Generate circuit based on a random template circuit.
+		'''
+		
+		template = self.random.choice( self.circuitTemplates )
+		
+		return Circuit(
+			uuid = self._uuid(),
+			name = template['name'],
+			supply = self.random.choice( self.supplies ),
+			loadType = self.loadTypes[template['loadType']['uuid']],
+			wireType = self.random.choices( self.wireTypes, self.wireTypeWeights )[0],
+			breakerCurve = BreakerCurve( template['breakerCurve'] ),
+			length = round( self.random.uniform( 2.0, 50.0 ), 1 ),
+			loadPower = round( template['loadPower'] * self.random.uniform( 0.5, 1.5 ), -1 ),
+		)
+	
+	
+	def _generateUpstreamCircuit( self, circuits: list[BaseCircuit], depth: int ) -> UpstreamCircuit:
+		'''
+		Generate upstream circuit feeding `circuits`.
+		'''
+		
+		return UpstreamCircuit(
+			uuid = self._uuid(),
+			name = f'Panel {depth + 1}',
+			supply = self.supplies[-1],
+			loadType = self.random.choice( list( self.loadTypes.values() ) ),
+			wireType = self.random.choice( self.wireTypes ),
+			breakerCurve = BreakerCurve.C,
+			length = round( self.random.uniform( 5.0, 100.0 ), 1 ),
+			circuits = circuits,
+		)
+	
+	
+	def _generateConduitRuns( self, circuits: list[BaseCircuit] ) -> list[ConduitRun]:
+		'''
+		Group `circuits` in conduit runs of 1 to 6 circuits, leaving some circuits without conduit.
+		'''
+		
+		conduitRuns: list[ConduitRun] = []
+		
+		while circuits:
+			groupSize = self.random.randint( 1, 6 )
+			group, circuits = circuits[:groupSize], circuits[groupSize:]
+			
+			if self.random.random() > self.conduitRunProbability:
+				continue
+			
+			template = self.random.choice( self.conduitRunTemplates )
+			conduitRuns.append( ConduitRun(
+				uuid = self._uuid(),
+				name = f'{template['name']} {len( conduitRuns ) + 1}',
+				referenceMethod = self.random.choice( [ ReferenceMethod.B1, ReferenceMethod.B2 ] ),
+				temperature = self.random.choice( [ 25, 30, 35, 40, 45 ] ),
+				length = round( self.random.uniform( 2.0, 50.0 ), 1 ),
+				conduitType = self.random.choice( list( ConduitType ) ),
+				circuits = group,
+			) )
+		
+		return conduitRuns
+
+
+
+def main() -> None:
+	'''
+	Entry point.
+	'''
+	
+	parser = ArgumentParser( description = __doc__ )
+	parser.add_argument( 'circuits', type = int, help = 'number of circuits' )
+	parser.add_argument(
+		'-s', '--seed',
+		type = int,
+		default = 0,
+		help = 'random seed (default: %(default)s)',
+	)
+	parser.add_argument(
+		'-o', '--output',
+		type = Path,
+		help = 'write project to this file instead of standard output',
+	)
+	arguments = parser.parse_args()
+	
+	project = ProjectGenerator( arguments.seed ).generateProject( arguments.circuits )
+	
+	if arguments.output:
+		with open( arguments.output, 'wb' ) as file:
+			file.write( project.model_dump_json().encode() )
+	else:
+		sys.stdout.write( project.model_dump_json() )
+
+
+
+if __name__ == '__main__':
+	main()
\ No newline at end of file
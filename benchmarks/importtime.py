@@ -0,0 +1,109 @@
+'''
+Startup benchmark for the calculation core, based on `python -X importtime`.
+
+Usage: `python -m benchmarks.importtime [--runs N] [MODULE...]`, from the repository root.
+'''
+
+import re
+import subprocess
+import sys
+from argparse import ArgumentParser
+from collections import defaultdict
+from statistics import median
+
+
+
+defaultModules = [
+	'nbr_5410_calculator.installation.project',
+	'nbr_5410_calculator.installation.sizing',
+	'nbr_5410_calculator.batch',
+]
+
+importTimePattern = re.compile( r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$' )
+
+
+
+def measureImport( module: str, validate: bool ) -> tuple[dict[str, int], int]:
+	'''
+	Import `module` in a new interpreter.
+	
+	Return self time in microseconds of each module imported and total time in microseconds until
+	the first `Project` is validated, if `validate`, or until `module` is imported.
+	'''
+	
+	script = (
+		'import time\n'
+		'start = time.perf_counter_ns()\n'
+		f'import {module}\n'
+	)
+	if validate:
+		script += (
+			'from nbr_5410_calculator.installation.project import Project\n'
+			'Project.model_validate_json( open( "casa.json", "rb" ).read() )\n'
+		)
+	script += 'print( ( time.perf_counter_ns() - start ) // 1000 )\n'
+	
+	process = subprocess.run(
+		[ sys.executable, '-X', 'importtime', '-c', script ],
+		capture_output = True,
+		check = True,
+		text = True,
+	)
+	
+	selfTimes: dict[str, int] = {}
+	for line in process.stderr.splitlines():
+		if match := importTimePattern.match( line ):
+			selfTimes[match[4]] = int( match[1] )
+	
+	return selfTimes, int( process.stdout )
+
+
+def main() -> None:
+	'''
+	Entry point.
+	'''
+	
+	parser = ArgumentParser( description = __doc__ )
+	parser.add_argument( 'modules', nargs = '*', default = defaultModules )
+	parser.add_argument(
+		'-r', '--runs',
+		type = int,
+		default = 5,
+		help = 'runs per module (default: %(default)s)',
+	)
+	parser.add_argument(
+		'-t', '--top',
+		type = int,
+		default = 10,
+		help = 'slowest modules to show (default: %(default)s)',
+	)
+	arguments = parser.parse_args()
+	
+	for module in arguments.modules:
+		selfTimes: defaultdict[str, list[int]] = defaultdict( list )
+		importTimes: list[int] = []
+		validateTimes: list[int] = []
+		
+		for _ in range( arguments.runs ):
+			runSelfTimes, importTime = measureImport( module, validate = False )
+			importTimes.append( importTime )
+			validateTimes.append( measureImport( module, validate = True )[1] )
+			
+			for name, selfTime in runSelfTimes.items():
+				selfTimes[name].append( selfTime )
+		
+		print( f'{module}' )
+		print( f'	Import:                     {median( importTimes ) / 1000:8.1f} ms' )
+		print( f'	Import and validate project:{median( validateTimes ) / 1000:8.1f} ms' )
+		print( f'	Modules imported:           {len( selfTimes ):8}' )
+		
+		slowest = sorted( selfTimes.items(), key = lambda item: median( item[1] ), reverse = True )
+		for name, times in slowest[:arguments.top]:
+			print( f'	{median( times ) / 1000:8.1f} ms  {name}' )
+		
+		print()
+
+
+
+if __name__ == '__main__':
+	main()
\ No newline at end of file
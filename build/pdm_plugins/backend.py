@@ -2,7 +2,9 @@
 PDM backend plugins.
 '''
 
+from importlib.util import module_from_spec, spec_from_file_location
 from pathlib import Path
+from types import ModuleType
 
 from pdm.backend.hooks import Context
 
@@ -18,4 +20,44 @@ class Hooks:
 		Change default build directory before start of build.
 		'''
 		
-		context.build_dir = Path( '.staging/build/' ).resolve()
\ No newline at end of file
+		context.build_dir = Path( '.staging/build/' ).resolve()
+	
+	
+	def pdm_build_update_files(	# pylint: disable = invalid-name
+		self,
+		context: Context,
+		files: dict[str, Path],
+	) -> None:
+		'''
+		Compile catalogs in `share/data/` into a single artifact included in wheels.
+		'''
+		
+		# Editable installs load catalogs from source.
+		if context.target != 'wheel':
+			return
+		
+		catalogs = loadCatalogsModule( context.root )
+		artifactPath = f'nbr_5410_calculator/{catalogs.ARTIFACT_PATH}'
+		
+		path = context.ensure_build_dir() / artifactPath
+		path.parent.mkdir( parents = True, exist_ok = True )
+		compiledCatalogs = catalogs.compileCatalogs( context.root / 'share/data/' )
+		path.write_bytes( catalogs.dumpCatalogs( compiledCatalogs ) )
+		
+		files[artifactPath] = path
+
+
+
+def loadCatalogsModule( root: Path ) -> ModuleType:
+	'''
+	Load `nbr_5410_calculator.installation.catalogs` from source, without importing the package and
+	its runtime dependencies.
+	'''
+	
+	spec = spec_from_file_location( 'catalogs', root / 'nbr_5410_calculator/installation/catalogs.py' )
+	assert spec and spec.loader
+	
+	module = module_from_spec( spec )
+	spec.loader.exec_module( module )
+	
+	return module
\ No newline at end of file
@@ -0,0 +1,173 @@
+'''
+Headless sizing of project files from the command line.
+
+Must not import PySide6, directly or indirectly.
+'''
+
+import csv
+import json
+import sys
+from argparse import ArgumentParser, Namespace
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from pathlib import Path
+from typing import Any, TextIO
+
+from nbr_5410_calculator.installation.projectFile import loadProject
+from nbr_5410_calculator.installation.sizing import sizeCircuits
+from nbr_5410_calculator.installation.util import ProjectError, UniqueSerializable
+
+
+
+type CircuitResult = dict[str, Any]
+
+resultFields = [
+	'file',
+	'uuid',
+	'name',
+	'type',
+	'power',
+	'current',
+	'breaker',
+	'section',
+	'capacity',
+	'voltageDrop',
+	'valid',
+]
+
+
+
+def addArguments( parser: ArgumentParser ) -> None:
+	'''
+	Add arguments for the `batch` command to `parser`.
+	'''
+	
+	parser.add_argument(
+		'files',
+		nargs = '+',
+		type = Path,
+		help = 'project files in JSON or newline-delimited JSON format',
+	)
+	parser.add_argument(
+		'-o', '--output',
+		type = Path,
+		help = 'write results to this file instead of standard output',
+	)
+	parser.add_argument(
+		'-f', '--format',
+		choices = [ 'csv', 'json', 'ndjson' ],
+		default = 'csv',
+		help = 'output format (default: %(default)s)',
+	)
+	parser.add_argument(
+		'-j', '--jobs',
+		type = int,
+		default = cpu_count() or 1,
+		help = 'number of worker processes (default: %(default)s)',
+	)
+
+
+
+def run( arguments: Namespace ) -> int:
+	'''
+	Size all circuits in `arguments.files` and write results. Return the process exit code.
+	'''
+	
+	files: list[Path] = arguments.files
+	results: list[CircuitResult] = []
+	failed = False
+	
+	for file, fileResults in zip( files, _mapFiles( files, arguments.jobs ) ):
+		if isinstance( fileResults, str ):
+			print( f'{file}: {fileResults}', file = sys.stderr )
+			failed = True
+			continue
+		
+		results += fileResults
+	
+	if arguments.output:
+		with open( arguments.output, 'w', newline = '', encoding = 'utf-8' ) as output:
+			writeResults( results, arguments.format, output )
+	else:
+		writeResults( results, arguments.format, sys.stdout )
+	
+	return 1 if failed else 0
+
+
+
+def _mapFiles( files: Sequence[Path], jobs: int ) -> Iterable[list[CircuitResult] | str]:
+	'''
+	Size `files` in `jobs` worker processes, keeping the order of `files`.
+	'''
+	
+	if jobs <= 1 or len( files ) <= 1:
+		return map( sizeProjectFile, files )
+	
+	with ProcessPoolExecutor( min( jobs, len( files ) ) ) as executor:
+		chunkSize = max( 1, len( files ) // jobs // 4 )
+		
+		return list( executor.map( sizeProjectFile, files, chunksize = chunkSize ) )
+
+
+
+def sizeProjectFile( path: Path ) -> list[CircuitResult] | str:
+	'''
+	Load project file at `path` and size all its circuits.
+	
+	Return one result for each circuit, or an error message if the file couldn't be loaded.
+	'''
+	
+	try:
+		with open( path, 'rb' ) as file:
+			data = file.read()
+		
+		# Each file is independent, don't share instances between them.
+		with UniqueSerializable.session():
+			project = loadProject( data )
+		
+		sizing = sizeCircuits( project )
+	except ( OSError, ValueError, ProjectError ) as error:
+		return str( error )
+	
+	return [
+		{
+			'file': str( path ),
+			'uuid': str( circuit.uuid ),
+			'name': circuit.name,
+			'type': type( circuit ).__name__,
+			'power': circuit.power,
+			'current': float( sizing.current[row] ),
+			'breaker': int( sizing.breaker[row] ) if sizing.valid[row] else None,
+			'section': float( sizing.section[row] ) if sizing.valid[row] else None,
+			'capacity': float( sizing.capacity[row] ) if sizing.valid[row] else None,
+			'voltageDrop': float( sizing.voltageDrop[row] ) if sizing.valid[row] else None,
+			'valid': bool( sizing.valid[row] ),
+		}
+		for row, circuit in enumerate( sizing.circuits )
+	]
+
+
+
+def writeResults( results: Iterable[CircuitResult], outputFormat: str, output: TextIO ) -> None:
+	'''
+	Write `results` to `output` as CSV, JSON or newline-delimited JSON.
+	'''
+	
+	match outputFormat:
+		case 'csv':
+			writer = csv.DictWriter( output, resultFields )
+			writer.writeheader()
+			writer.writerows( results )
+		
+		case 'json':
+			json.dump( list( results ), output, ensure_ascii = False, indent = '\t' )
+			output.write( '\n' )
+		
+		case 'ndjson':
+			for result in results:
+				output.write( json.dumps( result, ensure_ascii = False ) )
+				output.write( '\n' )
+		
+		case _:
+			raise ValueError( f'Unknown output format `{outputFormat}`.' )
\ No newline at end of file
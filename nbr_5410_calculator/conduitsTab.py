@@ -94,6 +94,7 @@ class ConduitRunsView( GenericTreeView[ConduitRunsModel, ConduitRun | BaseCircui
 			'length',
 			'grouping',
 			'fillFactor',
+			'conduitType',
 			'conduit',
 		],
 		BaseCircuit: [
@@ -104,6 +105,7 @@ class ConduitRunsView( GenericTreeView[ConduitRunsModel, ConduitRun | BaseCircui
 			None,
 			None,
 			None,
+			None,
 		],
 	}
 	
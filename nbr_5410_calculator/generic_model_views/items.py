@@ -1,16 +1,25 @@
 '''
 Items and fields for `GenericItemModel`.
+
+Used by models in `nbr_5410_calculator.installation`, so it must not import Qt.
 '''
 
 from __future__ import annotations
 
 from collections import defaultdict
-from collections.abc import Callable, Generator, Iterable
+from collections.abc import Callable, Iterable
 from dataclasses import KW_ONLY, dataclass
+from functools import cache
 from inspect import classify_class_attrs
-from typing import Annotated, Any, Self, cast, get_origin, get_type_hints, override
+from typing import Annotated, Any, ClassVar, Self, cast, get_origin, get_type_hints, override
 
-from pydantic import BaseModel, ValidatorFunctionWrapHandler, computed_field, model_validator
+from pydantic import (
+	BaseModel,
+	ValidationInfo,
+	ValidatorFunctionWrapHandler,
+	computed_field,
+	model_validator,
+)
 
 
 
@@ -40,6 +49,8 @@ class ItemField:
 	format: str | Callable[[Any], str] | None = None
 	editable: bool | None = None
 	choices: Callable[[Any], Iterable[Any]] | None = None
+	# Expensive to calculate, see `GenericItemModel.deferredValues`.
+	deferred: bool | None = None
 
 
 
@@ -57,6 +68,7 @@ class ItemFieldInfo:
 	format: str | Callable[[Any], str] = '{0}'
 	editable: bool = False
 	choices: Callable[[Any], Iterable[Any]] | None = None
+	deferred: bool = False
 	
 	
 	@classmethod
@@ -75,6 +87,7 @@ class ItemFieldInfo:
 			'format',
 			'editable',
 			'choices',
+			'deferred',
 		]
 		
 		for field in fields:
@@ -93,7 +106,13 @@ class ItemFieldInfo:
 		Return the formatted value of this field from `instance`.
 		'''
 		
-		value = getattr( instance, self.name )
+		return self.formatValue( getattr( instance, self.name ) )
+	
+	
+	def formatValue( self, value: Any ) -> str:
+		'''
+		Format `value` of this field, e.g. calculated elsewhere.
+		'''
 		
 		if callable( self.format ):
 			return self.format( value )
@@ -118,6 +137,23 @@ class ItemFieldInfo:
 
 
 
+def getItemType( value: Any ) -> str | None:
+	'''
+	Qualified class name of a `GenericItem` instance or of its serialized data.
+	
+	Ex.: `Annotated[Annotated[Foo, Tag( 'module.Foo' )] | …, Discriminator( getItemType )]`
+	'''
+	
+	match value:
+		case GenericItem():
+			return value.__getQualifiedName__()
+		case { '__type__': str( qualifiedName ) }:
+			return qualifiedName
+		case _:
+			return None
+
+
+
 class GenericItem( BaseModel ):
 	'''
 	Base class for items in a `GenericItemModel`.
@@ -125,39 +161,60 @@ class GenericItem( BaseModel ):
 	Attributes and properties annotated with `ItemField` are available in the model.
 	'''
 	
+	# Classes by qualified name, for deserialization.
+	__itemClasses__: ClassVar[dict[str, type[GenericItem]]] = {}
+	
+	
+	@classmethod
+	@override
+	def __pydantic_init_subclass__( cls, **kwargs: Any ) -> None:
+		super().__pydantic_init_subclass__( **kwargs )
+		
+		GenericItem.__itemClasses__[cls.__getQualifiedName__()] = cls
+	
+	
 	@model_validator( mode = 'wrap' )
 	@classmethod
 	def _deserializeAsSubclass(
 		cls,
 		data: Any | dict[str, Any],
 		handler: ValidatorFunctionWrapHandler,
+		info: ValidationInfo,
 	) -> Self:
 		'''
 		Always deserialize instances of subclasses of this class as their actual class.
+		
+		Fields holding items of different classes should use a discriminated union with
+		`getItemType()` instead, so each item is validated directly as its actual class.
 		'''
 		
 		if not isinstance( data, dict ) or '__type__' not in data:
 			return handler( data )
 		
-		qualifiedName = data.pop( '__type__' )
+		fields = cast( dict[str, Any], data )
+		qualifiedName = fields['__type__']
 		
 		if not isinstance( qualifiedName, str ):
 			raise TypeError( '`__type__` is not a valid class name.' )
 		
-		def iterSubclasses( baseClass: type[Self] ) -> Generator[type[Self], None, None]:
-			yield baseClass
-			
-			for subclass in baseClass.__subclasses__():
-				yield from iterSubclasses( subclass )
+		subclass = cls.__itemClasses__.get( qualifiedName )
+		
+		if not subclass or not issubclass( subclass, cls ):
+			raise TypeError(
+				f'`{qualifiedName}` is not a valid subclass of `{cls.__getQualifiedName__()}`.'
+			)
+		
+		# Don't modify `data`, it may be shared with other items.
+		fields = { key: value for key, value in fields.items() if key != '__type__' }
 		
-		for subclass in iterSubclasses( cls ):
-			if qualifiedName == subclass.__getQualifiedName__():
-				return subclass.model_validate( data )
+		if subclass is cls:
+			return handler( fields )
 		
-		raise TypeError( f'`{qualifiedName}` is not a valid subclass of `{cls.__getQualifiedName__()}`.' )
+		return subclass.model_validate( fields, context = info.context )
 	
 	
 	@classmethod
+	@cache
 	def __getQualifiedName__( cls ) -> str:
 		'''
 		Qualified name of this class.
@@ -0,0 +1,281 @@
+'''
+Append-only journal of edits to `GenericItemModel`s, for autosave and crash recovery.
+'''
+
+import json
+import os
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from tempfile import mkstemp
+from typing import Any, override
+
+from PySide6.QtCore import QObject, QTimer, Slot
+from pydantic_core import from_json
+
+from nbr_5410_calculator.generic_model_views.models import Edit, GenericItemModel
+
+
+
+@dataclass( frozen = True )
+class JournalContents:
+	'''
+	Contents of a journal file, see `EditJournal.read()`.
+	'''
+	
+	snapshot: bytes
+	edits: list[tuple[str, Edit]]
+	modified: bool
+
+
+
+class EditJournal( QObject ):
+	'''
+	Journal of edits to attached models, written to `path`.
+	
+	The file starts with a header line and a snapshot, which can span multiple lines, followed by one
+	line for each edit, see `GenericItemModel.edited`. Edits are appended every `flushInterval`
+	milliseconds, and the file is replaced by a new snapshot after `compactThreshold` edits. Writing
+	an edit costs proportional to the edit, not to the size of the models.
+	
+	`snapshot` returns the snapshot in chunks, which are created in separate event loop iterations
+	so compacting doesn't block the user interface, see `compact()`.
+	
+	Nothing is written while `paused`, e.g. until a previous journal at `path` is recovered.
+	'''
+	
+	@override
+	def __init__(
+		self,
+		path: Path,
+		snapshot: Callable[[], Iterable[bytes]],
+		flushInterval: int = 2000,
+		compactThreshold: int = 10_000,
+		parent: QObject | None = None,
+	) -> None:
+		super().__init__( parent )
+		
+		self.path = path
+		self.snapshot = snapshot
+		self.compactThreshold = compactThreshold
+		self.modified = False
+		self.paused = False
+		
+		self._models: dict[str, GenericItemModel[Any]] = {}
+		self._pendingEdits: list[bytes] = []
+		self._editCount = 0
+		# Remaining chunks and chunks created so far of the snapshot being compacted.
+		self._compaction: tuple[Iterator[bytes], list[bytes]] | None = None
+		
+		self._timer = QTimer( self )
+		self._timer.setInterval( flushInterval )
+		self._timer.timeout.connect( self.flush )
+	
+	
+	def attach( self, name: str, model: GenericItemModel[Any] ) -> None:
+		'''
+		Record edits to `model` as `name`, which must be the same when replaying them.
+		'''
+		
+		self._models[name] = model
+		model.edited.connect( self._recordEdit )
+	
+	
+	def detachAll( self ) -> None:
+		'''
+		Stop recording edits to all models.
+		'''
+		
+		for model in self._models.values():
+			model.edited.disconnect( self._recordEdit )
+		
+		self._models.clear()
+	
+	
+	@Slot( object )
+	def _recordEdit( self, edit: Edit ) -> None:
+		'''
+		Queue `edit` to be written on the next flush.
+		'''
+		
+		name = next( name for name, model in self._models.items() if model is self.sender() )
+		
+		self._pendingEdits.append( json.dumps( [ name, edit ], ensure_ascii = False ).encode() )
+		self.modified = True
+		
+		# The snapshot being compacted may or may not include this edit.
+		self._compaction = None
+		
+		if not self._timer.isActive():
+			self._timer.start()
+	
+	
+	@property
+	def compacting( self ) -> bool:
+		'''
+		Whether a snapshot is being created, see `compact()`.
+		'''
+		
+		return self._compaction is not None
+	
+	
+	@Slot()
+	def flush( self ) -> None:
+		'''
+		Append pending edits to the file, and compact it after too many edits.
+		'''
+		
+		self._timer.stop()
+		
+		if self.paused or not self._pendingEdits:
+			return
+		
+		self._appendPendingEdits()
+		
+		if self._editCount > self.compactThreshold:
+			self.compact()
+	
+	
+	def compact( self, snapshot: bytes | None = None ) -> None:
+		'''
+		Replace the file with a new snapshot and no edits. `snapshot` can be given if it was already
+		created, e.g. in another thread, and is written immediately.
+		
+		Otherwise pending edits are appended first and the snapshot is created in later event loop
+		iterations. It's abandoned if any edit is recorded in the meantime, since it may not include
+		it. The file keeps all edits until the next compaction.
+		'''
+		
+		self._timer.stop()
+		self._compaction = None
+		
+		if self.paused:
+			return
+		
+		if snapshot is not None:
+			self._writeSnapshot( snapshot )
+			return
+		
+		self._appendPendingEdits()
+		
+		self._compaction = ( iter( self.snapshot() ), [] )
+		QTimer.singleShot( 0, self, partial( self._continueCompaction, self._compaction ) )
+	
+	
+	def _continueCompaction( self, compaction: tuple[Iterator[bytes], list[bytes]] ) -> None:
+		'''
+		Create the next chunk of the snapshot being compacted, or write it once it's complete.
+		'''
+		
+		if compaction is not self._compaction:
+			return
+		
+		chunks, snapshot = compaction
+		
+		if ( chunk := next( chunks, None ) ) is not None:
+			snapshot.append( chunk )
+			QTimer.singleShot( 0, self, partial( self._continueCompaction, compaction ) )
+			return
+		
+		self._compaction = None
+		self._writeSnapshot( b''.join( snapshot ) )
+	
+	
+	def _appendPendingEdits( self ) -> None:
+		'''
+		Append pending edits to the file.
+		'''
+		
+		if not self._pendingEdits:
+			return
+		
+		with open( self.path, 'ab' ) as file:
+			file.write( b''.join( edit + b'\n' for edit in self._pendingEdits ) )
+			file.flush()
+			os.fsync( file.fileno() )
+		
+		self._editCount += len( self._pendingEdits )
+		self._pendingEdits.clear()
+	
+	
+	def _writeSnapshot( self, snapshot: bytes ) -> None:
+		'''
+		Replace the file with `snapshot`, which includes all edits so far.
+		'''
+		
+		header = json.dumps(
+			{ 'journal': 1, 'modified': self.modified, 'snapshotSize': len( snapshot ) }
+		).encode()
+		
+		# Never leave a partially written snapshot, even with other instances using the same path.
+		descriptor, temporaryPath = mkstemp( prefix = f'{self.path.name}.', dir = self.path.parent )
+		
+		try:
+			with open( descriptor, 'wb' ) as file:
+				file.write( header + b'\n' + snapshot + b'\n' )
+				file.flush()
+				os.fsync( file.fileno() )
+			
+			os.replace( temporaryPath, self.path )
+		finally:
+			Path( temporaryPath ).unlink( missing_ok = True )
+		
+		self._editCount = 0
+		self._pendingEdits.clear()
+	
+	
+	def markSaved( self, snapshot: bytes | None = None ) -> None:
+		'''
+		Mark the current state as saved elsewhere, so there's nothing to recover, see `compact()`.
+		'''
+		
+		self.modified = False
+		self.compact( snapshot )
+	
+	
+	@staticmethod
+	def read( path: Path ) -> JournalContents | None:
+		'''
+		Read journal file at `path`, if it exists.
+		
+		A partially written last edit, e.g. after a crash, is ignored.
+		'''
+		
+		try:
+			with open( path, 'rb' ) as file:
+				headerLine, _, contents = file.read().partition( b'\n' )
+			
+			header = from_json( headerLine )
+		except ( FileNotFoundError, ValueError ):
+			return None
+		
+		# Journals without snapshot size have a single line snapshot.
+		snapshotSize = header.get( 'snapshotSize', contents.find( b'\n' ) )
+		snapshot = contents[:snapshotSize]
+		lines = contents[snapshotSize + 1:].split( b'\n' )
+		
+		edits: list[tuple[str, Edit]] = []
+		for line in lines:
+			try:
+				name, edit = from_json( line )
+			except ValueError:
+				break
+			
+			edits.append( ( name, edit ) )
+		
+		return JournalContents(
+			snapshot = snapshot,
+			edits = edits,
+			modified = bool( edits ) or bool( header.get( 'modified' ) ),
+		)
+	
+	
+	def replay( self, edits: list[tuple[str, Edit]] ) -> None:
+		'''
+		Apply `edits` read from a journal to the attached models with the same names. Edits are
+		recorded again, so the file stays consistent with the models.
+		'''
+		
+		for name, edit in edits:
+			self._models[name].applyEdit( edit )
\ No newline at end of file
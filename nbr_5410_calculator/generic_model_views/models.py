@@ -2,7 +2,7 @@
 Partial implementation of `QAbstractItemModel`.
 '''
 
-from collections.abc import Mapping, Sequence
+from collections.abc import Callable, Collection, Mapping, Sequence
 from functools import cache
 from typing import Any, cast, overload, override
 
@@ -13,8 +13,10 @@ from PySide6.QtCore import (
 	QObject,
 	QPersistentModelIndex,
 	Qt,
+	Signal,
 )
 from pydantic import TypeAdapter, ValidationError
+from pydantic_core import to_jsonable_python
 
 from nbr_5410_calculator.generic_model_views.items import GenericItem, ItemFieldInfo, RootItem
 
@@ -22,6 +24,8 @@ from nbr_5410_calculator.generic_model_views.items import GenericItem, ItemField
 
 type ModelIndex = QModelIndex | QPersistentModelIndex
 type FieldOrder[T] = Mapping[type[T], Sequence[str | None]]
+type Edit = dict[str, Any]
+type DeferredValues = Callable[[GenericItem, ItemFieldInfo], str | None]
 
 
 
@@ -32,6 +36,9 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 	
 	jsonMimeType = 'application/json'
 	
+	# Emitted after each edit with a JSON-compatible description of it, see `applyEdit()`.
+	edited = Signal( object )
+	
 	
 	@override
 	def __init__(
@@ -46,6 +53,13 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 		self.root.items = datasource	# TODO: Don't copy list in constructor.
 		self.dataTypes = dataTypes
 		self.updateFieldOrder()
+		
+		# Formatted values of deferred fields, e.g. calculated in another thread, or a placeholder
+		# until they're ready. Deferred fields are read directly if not set, see `ItemField.deferred`.
+		self.deferredValues: DeferredValues | None = None
+		
+		# Parent and row of each item by ID, see `_parentOf()`.
+		self._parents: dict[int, tuple[GenericItem, int]] = {}
 	
 	
 	def updateFieldOrder( self, fieldOrder: FieldOrder[ItemT] | None = None ) -> None:
@@ -77,7 +91,7 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 		Return the item associated with the given `index`.
 		'''
 		
-		if item := cast( ItemT | None, index.internalPointer() ):
+		if item := cast( 'ItemT | None', index.internalPointer() ):
 			return item
 		
 		raise LookupError( 'Index points to `None`.' )
@@ -97,6 +111,34 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 		raise TypeError( f'No field for type `{type( item )}`.' )
 	
 	
+	def pathFromIndex( self, index: ModelIndex ) -> list[int]:
+		'''
+		Rows from the root index to `index`. Unlike indexes, paths can be stored and used with a
+		different model with the same items.
+		'''
+		
+		path: list[int] = []
+		
+		while index.isValid() and self.itemFromIndex( index ) is not self.root:
+			path.append( index.row() )
+			index = self.parent( index )
+		
+		return path[::-1]
+	
+	
+	def indexFromPath( self, path: Sequence[int], column: int = 0 ) -> QModelIndex:
+		'''
+		Index at `path`, see `pathFromIndex()`.
+		'''
+		
+		index = self.index( 0, column if not path else 0 )
+		
+		for depth, row in enumerate( path, 1 ):
+			index = self.index( row, column if depth == len( path ) else 0, index )
+		
+		return index
+	
+	
 	@override
 	def index( self, row: int, column: int, parent: ModelIndex = QModelIndex() ) -> QModelIndex:
 		'''
@@ -134,23 +176,57 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 			return super().parent()
 		
 		
-		# Iterate all children recursively.
-		parents: list[tuple[int, GenericItem]] = [ ( 0, self.root ) ]
-		while parents:
-			parentIndex, parent = parents.pop()
-			
-			if not parent.children:
-				continue
-			
-			if self.itemFromIndex( child ) in parent.children:
-				return self.createIndex( parentIndex, 0, parent )
-			
-			parents += enumerate( parent.children )
+		item = self.itemFromIndex( child )
 		
-		if self.itemFromIndex( child ) is self.root:
+		if item is self.root:
 			return QModelIndex()
 		
-		raise LookupError( 'Could not find child in datasource hierarchy.' )
+		parent, _ = self._parentOf( item )
+		
+		if parent is self.root:
+			return self.createIndex( 0, 0, parent )
+		
+		return self.createIndex( self._parentOf( parent )[1], 0, parent )
+	
+	
+	def _parentOf( self, item: GenericItem ) -> tuple[GenericItem, int]:
+		'''
+		Parent and row of `item`, in constant time.
+		
+		The index is kept up to date by edits made through the model. Entries are checked before
+		use, and the index is rebuilt if items were moved elsewhere, e.g. by replacing `root.items`.
+		'''
+		
+		entry = self._parents.get( id( item ) )
+		
+		if not entry or not _isChildAt( item, *entry ):
+			self._indexChildren( self.root )
+			
+			if not ( entry := self._parents.get( id( item ) ) ):
+				raise LookupError( 'Could not find child in datasource hierarchy.' )
+		
+		return entry
+	
+	
+	def _indexChildren( self, parent: GenericItem, firstRow: int = 0, recursive: bool = True ) -> None:
+		'''
+		Update parent index for children of `parent` from `firstRow` onwards, and optionally for
+		their descendants.
+		'''
+		
+		if parent is self.root and firstRow == 0 and recursive:
+			self._parents.clear()
+		
+		parents = [ ( parent, firstRow ) ]
+		while parents:
+			parent, firstRow = parents.pop()
+			
+			for row, item in enumerate( parent.children[firstRow:], firstRow ):
+				self._parents[id( item )] = ( parent, row )
+				
+				# Only rows shown by the model, items may also be children of other items.
+				if recursive and item.children and self.rowCount( self.createIndex( row, 0, item ) ):
+					parents.append( ( item, 0 ) )
 	
 	
 	@override
@@ -241,6 +317,9 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 			case _ if not field:
 				return None
 			
+			case Qt.ItemDataRole.DisplayRole if field.deferred and self.deferredValues:
+				return self.deferredValues( item, field )
+			
 			case Qt.ItemDataRole.DisplayRole:
 				return field.valueForDisplay( item )
 			
@@ -268,10 +347,70 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 		
 		try:
 			field.setValue( item, value )
-			self.dataChanged.emit( index, index, [ role ] )
-			return True
 		except ValidationError:
 			return False
+		
+		self.dataChanged.emit( index, index, [ role ] )
+		self.edited.emit( {
+			'edit': 'setData',
+			'path': self.pathFromIndex( index ),
+			'field': field.name,
+			'value': to_jsonable_python( field.valueForEdition( item ) ),
+		} )
+		
+		return True
+	
+	
+	def updateDeferredFields( self, items: Collection[GenericItem] | None = None ) -> None:
+		'''
+		Emit `dataChanged` for deferred fields of `items`, or of all items, once their values are
+		ready. Rows under the same parent are coalesced into a single range.
+		'''
+		
+		columns = [
+			column
+			for fields in self.fields.values()
+			for column, field in enumerate( fields )
+			if field and field.deferred
+		]
+		
+		if not columns or not self.root.children:
+			return
+		
+		roles = [ Qt.ItemDataRole.DisplayRole ]
+		
+		if items is None:
+			rowsByParent = { 0: ( self.index( 0, 0 ), [ 0, len( self.root.children ) - 1 ] ) }
+		else:
+			rowsByParent = self._rowsByParent( { id( item ) for item in items } )
+		
+		for parent, rows in rowsByParent.values():
+			self.dataChanged.emit(
+				self.index( min( rows ), min( columns ), parent ),
+				self.index( max( rows ), max( columns ), parent ),
+				roles,
+			)
+	
+	
+	def _rowsByParent( self, itemIds: set[int] ) -> dict[int, tuple[QModelIndex, list[int]]]:
+		'''
+		Parent index and rows of each item in `itemIds`, grouped by parent.
+		'''
+		
+		rowsByParent: dict[int, tuple[QModelIndex, list[int]]] = {}
+		parents: list[tuple[QModelIndex, GenericItem]] = [ ( self.index( 0, 0 ), self.root ) ]
+		
+		while parents:
+			parentIndex, parent = parents.pop()
+			
+			for row, item in enumerate( parent.children ):
+				if id( item ) in itemIds:
+					rowsByParent.setdefault( id( parent ), ( parentIndex, [] ) )[1].append( row )
+				
+				if item.children and self.rowCount( index := self.createIndex( row, 0, item ) ):
+					parents.append( ( index, item ) )
+		
+		return rowsByParent
 	
 	
 	def insertItem( self, item: ItemT, row: int = -1, parent: ModelIndex | None = None ) -> None:
@@ -292,7 +431,17 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 		
 		self.beginInsertRows( parent, row, row )
 		parentItem.insertChild( row, item )
+		self._indexChildren( parentItem, row + 1, recursive = False )
+		self._parents[id( item )] = ( parentItem, row )
+		self._indexChildren( item )
 		self.endInsertRows()
+		
+		self.edited.emit( {
+			'edit': 'insertItem',
+			'path': self.pathFromIndex( parent ),
+			'row': row,
+			'item': item.model_dump( mode = 'json' ),
+		} )
 	
 	
 	@override
@@ -307,8 +456,17 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 		for _ in range( count ):
 			item = parentItem.children[row]
 			parentItem.removeChild( row, item )
+			self._parents.pop( id( item ), None )
+		self._indexChildren( parentItem, row, recursive = False )
 		self.endRemoveRows()
 		
+		self.edited.emit( {
+			'edit': 'removeRows',
+			'path': self.pathFromIndex( parent ),
+			'row': row,
+			'count': count,
+		} )
+		
 		return True
 	
 	
@@ -329,6 +487,13 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 		if destinationChild == -1:
 			destinationChild = self.rowCount( destinationParent )
 		
+		sourceParentItem = self.itemFromIndex( sourceParent )
+		destinationParentItem = self.itemFromIndex( destinationParent )
+		items = sourceParentItem.children[sourceRow:sourceRow + count]
+		
+		if not all( destinationParentItem.isChildValid( item ) for item in items ):
+			raise ValueError( 'Source item is not a valid children of destination.' )
+		
 		if not self.beginMoveRows(
 			sourceParent,
 			sourceRow,
@@ -338,26 +503,82 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 		) or destinationChild < 0 or destinationChild > self.rowCount( destinationParent ):
 			return False
 		
-		sourceParentItem = self.itemFromIndex( sourceParent )
-		items: list[ItemT] = []
-		for _ in range( count ):
-			items.append( sourceParentItem.children.pop( sourceRow ) )
+		edit: Edit = {
+			'edit': 'moveRows',
+			'sourcePath': self.pathFromIndex( sourceParent ),
+			'row': sourceRow,
+			'count': count,
+			'destinationPath': self.pathFromIndex( destinationParent ),
+			'destinationRow': destinationChild,
+		}
+		
+		# Through hooks, so items can update back-references and cached values.
+		for item in items:
+			sourceParentItem.removeChild( sourceRow, item )
 		
 		# Update destination after we removed items from the list.
 		if destinationParent == sourceParent and destinationChild >= sourceRow:
 			destinationChild -= count
 		
-		destinationParentItem = self.itemFromIndex( destinationParent )
 		for item in reversed( items ):
-			if not destinationParentItem.isChildValid( item ):
-				raise ValueError( 'Source item is not a valid children of destination.' )
-			destinationParentItem.children.insert( destinationChild, item )
+			destinationParentItem.insertChild( destinationChild, item )
+		
+		firstRow = destinationChild
+		if destinationParentItem is sourceParentItem:
+			firstRow = min( firstRow, sourceRow )
 		
+		self._indexChildren( sourceParentItem, sourceRow, recursive = False )
+		self._indexChildren( destinationParentItem, firstRow, recursive = False )
 		self.endMoveRows()
+		self.edited.emit( edit )
 		
 		return True
 	
 	
+	def applyEdit( self, edit: Edit ) -> None:
+		'''
+		Repeat an edit emitted by `edited`, possibly from another model with the same items.
+		'''
+		
+		match edit:
+			case { 'edit': 'setData', 'path': path, 'field': str( name ), 'value': value }:
+				item = self.itemFromIndex( self.indexFromPath( path ) )
+				fields = next(
+					fields for rowType, fields in self.fields.items() if isinstance( item, rowType )
+				)
+				column = [ field and field.name for field in fields ].index( name )
+				
+				if not self.setData( self.indexFromPath( path, column ), value, Qt.ItemDataRole.EditRole ):
+					raise ValueError( f'Invalid value for field `{name}`.' )
+			
+			case { 'edit': 'insertItem', 'path': path, 'row': int( row ), 'item': itemData }:
+				item = cast( ItemT, GenericItem.model_validate( itemData ) )
+				self.insertItem( item, row, self.indexFromPath( path ) )
+			
+			case { 'edit': 'removeRows', 'path': path, 'row': int( row ), 'count': int( count ) }:
+				self.removeRows( row, count, self.indexFromPath( path ) )
+			
+			case {
+				'edit': 'moveRows',
+				'sourcePath': sourcePath,
+				'row': int( row ),
+				'count': int( count ),
+				'destinationPath': destinationPath,
+				'destinationRow': int( destinationRow ),
+			}:
+				if not self.moveRows(
+					self.indexFromPath( sourcePath ),
+					row,
+					count,
+					self.indexFromPath( destinationPath ),
+					destinationRow,
+				):
+					raise ValueError( 'Invalid move.' )
+			
+			case _:
+				raise ValueError( f'Invalid edit `{edit}`.' )
+	
+	
 	# @override
 	# def sort( self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder ) -> None:
 	# 	'''
@@ -481,4 +702,15 @@ class GenericItemModel[ItemT: GenericItem]( QAbstractItemModel ):
 	) -> bool:
 		parentItem = self.itemFromIndex( parent )
 		
-		return all( parentItem.isChildValid( item ) for item in self.itemsFromMimeData( data ) )
\ No newline at end of file
+		return all( parentItem.isChildValid( item ) for item in self.itemsFromMimeData( data ) )
+
+
+
+def _isChildAt( item: GenericItem, parent: GenericItem, row: int ) -> bool:
+	'''
+	Whether `item` is the child of `parent` at `row`.
+	'''
+	
+	children = parent.children
+	
+	return row < len( children ) and children[row] is item
\ No newline at end of file
@@ -0,0 +1,13 @@
+'''
+Calculation core for electrical installations, independent of the user interface.
+
+Must not import Qt, directly or indirectly. Models only depend on `generic_model_views.items`, which
+is also free of Qt.
+'''
+
+# Import `circuit` before any other module, due to circular dependencies.
+from nbr_5410_calculator.installation import circuit
+
+
+
+__all__ = [ 'circuit' ]
\ No newline at end of file
@@ -0,0 +1,170 @@
+'''
+Catalogs of wires, breakers, conduits and correction factors.
+
+Catalogs are compiled from JSON5 files in `share/data/` into a single artifact shipped with the
+package, see `build/pdm_plugins/backend.py`. Without the artifact, as in development, the JSON5
+files are compiled on first use instead.
+
+This module is also loaded by the build backend, so it must only depend on the standard library and
+`pyjson5`.
+'''
+
+import pickle
+from functools import cache
+from importlib import resources
+from math import pi
+from pathlib import Path
+from typing import Any
+
+from pyjson5 import decode_buffer
+
+
+
+type Catalogs = dict[str, Any]
+
+# Path of compiled catalogs, relative to the `nbr_5410_calculator` package.
+ARTIFACT_PATH = 'data/catalogs.pickle'
+
+# Source catalogs, relative to this file.
+SOURCE_PATH = Path( __file__ ).parents[2] / 'share/data/'
+
+
+
+def compileCatalogs( dataPath: Path = SOURCE_PATH ) -> Catalogs:
+	'''
+	Load and validate all catalogs in `dataPath`, indexed by path relative to `dataPath` without
+	extension, e.g. `wireTypes/copper-pvc`.
+	
+	Lists are converted to tuples and derived arrays are precomputed.
+	'''
+	
+	catalogs: Catalogs = {}
+	
+	for path in sorted( dataPath.rglob( '*.json5' ) ):
+		name = path.relative_to( dataPath ).with_suffix( '' ).as_posix()
+		
+		with open( path, 'rb' ) as file:
+			data = decode_buffer( file.read() )
+		
+		try:
+			catalogs[name] = _compileCatalog( name, data )
+		except ( KeyError, TypeError, ValueError ) as error:
+			raise ValueError( f'Invalid catalog `{path}`: {error!r}' ) from error
+	
+	return catalogs
+
+
+def _compileCatalog( name: str, data: Any ) -> Any:
+	'''
+	Validate catalog `data` and precompute derived arrays, according to the kind of catalog.
+	'''
+	
+	match name.split( '/' ):
+		case [ 'breakers' ]:
+			return {
+				curve: tuple( sorted( int( current ) for current in currents ) )
+				for curve, currents in data.items()
+			}
+		
+		case [ 'temperatureCorrectionFactor' ]:
+			return tuple( sorted(
+				(
+					{ 'temperature': float( factor['temperature'] ), 'value': float( factor['value'] ) }
+					for factor in data
+				),
+				key = lambda factor: factor['temperature'],
+			) )
+		
+		case [ 'groupingCorrectionFactor' ]:
+			if sorted( map( int, data ) ) != list( range( len( data ) ) ):
+				raise ValueError( 'Groupings must start at 0 and be contiguous.' )
+			
+			return { key: float( value ) for key, value in data.items() }
+		
+		case [ 'conduit', _ ]:
+			internalDiameters = tuple( map( float, data['internalDiameters'] ) )
+			_validateLengths( data['nominalDiameters'], data['externalDiameters'], internalDiameters )
+			
+			return {
+				**data,
+				'nominalDiameters': tuple( data['nominalDiameters'] ),
+				'externalDiameters': tuple( map( float, data['externalDiameters'] ) ),
+				'internalDiameters': internalDiameters,
+				'internalSections': tuple( pi * ( diameter / 2 ) ** 2 for diameter in internalDiameters ),
+			}
+		
+		case [ 'wireTypes', _ ]:
+			conductorSections = tuple( map( float, data['conductorSections'] ) )
+			# Diameters aren't available for all wire types.
+			missingDiameters = ( None, ) * len( conductorSections )
+			conductorDiameters = tuple( data.get( 'conductorDiameters', missingDiameters ) )
+			externalDiameters = tuple( data.get( 'externalDiameters', missingDiameters ) )
+			referenceMethods = {
+				referenceMethod: {
+					loadedWireCount: tuple( map( float, capacities ) )
+					for loadedWireCount, capacities in capacitiesByCount.items()
+				}
+				for referenceMethod, capacitiesByCount in data['referenceMethods'].items()
+			}
+			_validateLengths(
+				conductorSections,
+				conductorDiameters,
+				externalDiameters,
+				*(
+					capacities
+					for capacitiesByCount in referenceMethods.values()
+					for capacities in capacitiesByCount.values()
+				),
+			)
+			
+			return {
+				**data,
+				'resistivity': float( data['resistivity'] ),
+				'conductorSections': conductorSections,
+				'conductorDiameters': conductorDiameters,
+				'externalDiameters': externalDiameters,
+				'referenceMethods': referenceMethods,
+			}
+		
+		case _:
+			raise ValueError( 'Unknown kind of catalog.' )
+
+
+def _validateLengths( *columns: tuple[Any, ...] | list[Any] ) -> None:
+	'''
+	Raise `ValueError` if not all `columns` have the same length.
+	'''
+	
+	if len( { len( column ) for column in columns } ) > 1:
+		raise ValueError( 'All columns must have the same length.' )
+
+
+
+def dumpCatalogs( catalogs: Catalogs ) -> bytes:
+	'''
+	Serialize compiled catalogs to be loaded by `loadCatalogs()`.
+	'''
+	
+	return pickle.dumps( catalogs, pickle.HIGHEST_PROTOCOL )
+
+
+@cache
+def loadCatalogs() -> Catalogs:
+	'''
+	Load compiled catalogs shipped with the package, or compile them from source if not available.
+	'''
+	
+	try:
+		artifact = resources.files( 'nbr_5410_calculator' ).joinpath( ARTIFACT_PATH ).read_bytes()
+	except FileNotFoundError:
+		return compileCatalogs()
+	
+	return pickle.loads( artifact )
+
+
+def loadCatalog( name: str ) -> Any:
+	'''
+	Return catalog by `name`, e.g. `wireTypes/copper-pvc`. See `compileCatalogs()`.
+	'''
+	
+	return loadCatalogs()[name]
\ No newline at end of file
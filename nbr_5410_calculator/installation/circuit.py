@@ -4,18 +4,32 @@
 
 from __future__ import annotations
 
+from bisect import bisect_left
+from collections.abc import Callable
+from dataclasses import dataclass
 from enum import Enum, StrEnum, auto
 from functools import cache
 from math import pi
-from typing import Annotated, Any, Self, override
+from typing import Annotated, Any, ClassVar, Self, cast, override
+from weakref import WeakSet
 
 from annotated_types import Ge, Gt, MinLen
-from pydantic import BaseModel, Field, SerializeAsAny, SkipValidation
-from pyjson5 import decode_buffer
+from pydantic import (
+	BaseModel,
+	ConfigDict,
+	Discriminator,
+	Field,
+	GetPydanticSchema,
+	model_validator,
+	PrivateAttr,
+	SkipValidation,
+	Tag,
+	ValidatorFunctionWrapHandler,
+)
 
-from nbr_5410_calculator.generic_model_views.items import ItemField
-from nbr_5410_calculator.generic_model_views.models import GenericItem
-from nbr_5410_calculator.installation.util import ProjectError, UniqueSerializable
+from nbr_5410_calculator.generic_model_views.items import GenericItem, ItemField, getItemType
+from nbr_5410_calculator.installation.catalogs import loadCatalog
+from nbr_5410_calculator.installation.util import ProjectError, Reference, UniqueSerializable
 
 
 
@@ -67,6 +81,32 @@ class LoadType( UniqueSerializable, GenericItem ):
 	minimumWireSection: Annotated[float, Gt( 0.0 ), ItemField( 'Minimum Section' )]
 	demandFactor: Annotated[float, Ge( 0.0 ), ItemField( 'Demand Factor' )]
 	
+	# Upstream circuits whose power depends on the demand factor, see `demandFactorFor()`.
+	_upstreams: WeakSet[UpstreamCircuit] = PrivateAttr( default_factory = WeakSet['UpstreamCircuit'] )
+	
+	
+	@model_validator( mode = 'after' )
+	def _invalidateUpstreamPower( self ) -> Self:
+		'''
+		Invalidate power of upstream circuits using this load type after any change to it.
+		'''
+		
+		for upstreamCircuit in list( self._upstreams ):
+			upstreamCircuit.invalidatePower()
+		
+		return self
+	
+	
+	def demandFactorFor( self, upstreamCircuit: UpstreamCircuit ) -> float:
+		'''
+		Demand factor for the power of `upstreamCircuit`, invalidated whenever this load type changes.
+		'''
+		
+		self._upstreams.add( upstreamCircuit )
+		
+		return self.demandFactor
+	
+	
 	@override
 	def __str__( self ) -> str:
 		return self.name
@@ -106,12 +146,7 @@ class WireType( UniqueSerializable, GenericItem ):
 	material: Annotated[WireMaterial, ItemField( 'Material' )]
 	insulation: Annotated[WireInsulation, ItemField( 'Insulation' )]
 	
-	# TODO: Improve this.
 	_resistivity: float
-	_conductorSections: list[float]
-	_conductorDiameters: list[float]
-	_externalDiameters: list[float | None]
-	_referenceMethods: dict[str, dict[str, list[float]]]
 	
 	
 	@classmethod
@@ -121,21 +156,34 @@ class WireType( UniqueSerializable, GenericItem ):
 		TODO: Proper class with Pydantic.
 		'''
 		
-		with open( f'share/data/wireTypes/{material.value}-{insulation.value}.json5', 'rb' ) as file:
-			return decode_buffer( file.read() )
+		return loadCatalog( f'wireTypes/{material.value}-{insulation.value}' )
+	
+	
+	@classmethod
+	@cache
+	def loadWireTable(
+		cls,
+		material: WireMaterial,
+		insulation: WireInsulation,
+		referenceMethod: ReferenceMethod,
+		loadedWireCount: int,
+	) -> WireTable:
+		'''
+		Return the shared `WireTable` for a given wire type, reference method and wire configuration.
+		'''
+		
+		return WireTable.fromWireData(
+			cls.loadWires( material, insulation ),
+			referenceMethod,
+			loadedWireCount,
+		)
 	
 	
 	@override
 	def model_post_init( self, __context: Any ) -> None:
 		super().model_post_init( __context )
 		
-		wires = self.loadWires( self.material, self.insulation )
-		
-		self._resistivity = wires['resistivity']
-		self._conductorSections = wires['conductorSections']
-		self._conductorDiameters = wires['conductorDiameters']
-		self._externalDiameters = wires['externalDiameters']
-		self._referenceMethods = wires['referenceMethods']
+		self._resistivity = self.loadWires( self.material, self.insulation )['resistivity']
 	
 	
 	@override
@@ -152,6 +200,16 @@ class WireType( UniqueSerializable, GenericItem ):
 		return self._resistivity
 	
 	
+	def getWireTable( self, referenceMethod: ReferenceMethod, loadedWireCount: int ) -> WireTable:
+		'''
+		Get table of all wire sizes for a given reference method and wire configuration.
+		
+		See NBR 5410 tables 36~39.
+		'''
+		
+		return self.loadWireTable( self.material, self.insulation, referenceMethod, loadedWireCount )
+	
+	
 	def getWires(
 		self,
 		referenceMethod: ReferenceMethod,
@@ -164,26 +222,183 @@ class WireType( UniqueSerializable, GenericItem ):
 		See NBR 5410 tables 36~39.
 		'''
 		
-		capacities = self._referenceMethods[referenceMethod.name][str( loadedWireCount )]
+		wireTable = self.getWireTable( referenceMethod, loadedWireCount )
 		
-		return [
-			Wire(
-				type = self,
-				section = section,
-				uncorrectedCapacity = uncorrectedCapacity,
-				conductorDiameter = conductorDiameter,
-				externalDiameter = externalDiameter,
-				correctionFactor = correctionFactor,
-			)
+		return [ wireTable.wire( index, self, correctionFactor ) for index in range( len( wireTable ) ) ]
+
+
+
+@dataclass( frozen = True, slots = True, eq = False )
+class WireTable:
+	'''
+	All sizes of a `WireType` for a given reference method and wire configuration, stored as
+	parallel arrays sorted by section.
+	
+	Wire selection is done by index so only the selected size needs to be created as a `Wire`.
+	Tables are shared and compared by identity, see `WireType.loadWireTable()`.
+	'''
+	
+	resistivity: float
+	sections: tuple[float, ...]
+	uncorrectedCapacities: tuple[float, ...]
+	conductorDiameters: tuple[float, ...]
+	externalDiameters: tuple[float, ...]
+	externalSections: tuple[float, ...]
+	resistancesPerMeter: tuple[float, ...]
+	
+	# Indexes sorted by capacity.
+	capacityOrder: tuple[int, ...]
+	# Index of the size with the smallest capacity among each size and all larger sizes.
+	smallestCapacityFrom: tuple[int, ...]
+	
+	
+	@classmethod
+	def fromWireData(
+		cls,
+		wires: dict[str, Any],
+		referenceMethod: ReferenceMethod,
+		loadedWireCount: int,
+	) -> Self:
+		'''
+		Create table from wire type data as loaded by `WireType.loadWires()`.
+		'''
+		
+		capacities = wires['referenceMethods'][referenceMethod.name][str( loadedWireCount )]
+		rows = [
+			( section, uncorrectedCapacity, conductorDiameter, externalDiameter )
 			for section, uncorrectedCapacity, conductorDiameter, externalDiameter in zip(
-				self._conductorSections,
+				wires['conductorSections'],
 				capacities,
-				self._conductorDiameters,
-				self._externalDiameters,
+				wires['conductorDiameters'],
+				wires['externalDiameters'],
 			)
 			# TODO: Remove this.
 			if externalDiameter is not None
 		]
+		rows.sort( key = lambda row: row[0] )
+		
+		sections = tuple( row[0] for row in rows )
+		uncorrectedCapacities = tuple( row[1] for row in rows )
+		
+		smallestCapacityFrom = list( range( len( rows ) ) )
+		for index in reversed( range( len( rows ) - 1 ) ):
+			nextIndex = smallestCapacityFrom[index + 1]
+			if uncorrectedCapacities[nextIndex] < uncorrectedCapacities[index]:
+				smallestCapacityFrom[index] = nextIndex
+		
+		return cls(
+			resistivity = wires['resistivity'],
+			sections = sections,
+			uncorrectedCapacities = uncorrectedCapacities,
+			conductorDiameters = tuple( row[2] for row in rows ),
+			externalDiameters = tuple( row[3] for row in rows ),
+			externalSections = tuple( pi * ( row[3] / 2 ) ** 2 for row in rows ),
+			resistancesPerMeter = tuple(
+				wires['resistivity'] / ( section / 1000**2 ) for section in sections
+			),
+			capacityOrder = tuple( sorted( range( len( rows ) ), key = uncorrectedCapacities.__getitem__ ) ),
+			smallestCapacityFrom = tuple( smallestCapacityFrom ),
+		)
+	
+	
+	def __len__( self ) -> int:
+		return len( self.sections )
+	
+	
+	def wire( self, index: int, wireType: WireType, correctionFactor: float ) -> Wire:
+		'''
+		Create `Wire` for the size at `index`.
+		'''
+		
+		return Wire(
+			type = wireType,
+			section = self.sections[index],
+			uncorrectedCapacity = self.uncorrectedCapacities[index],
+			conductorDiameter = self.conductorDiameters[index],
+			externalDiameter = self.externalDiameters[index],
+			correctionFactor = correctionFactor,
+		)
+	
+	
+	def indexFrom( self, firstIndex: int ) -> int | None:
+		'''
+		Index of the size with the smallest capacity among size `firstIndex` and all larger sizes.
+		'''
+		
+		if firstIndex >= len( self ):
+			return None
+		
+		return self.smallestCapacityFrom[firstIndex]
+	
+	
+	def indexBySection( self, minimumSection: float ) -> int | None:
+		'''
+		Index of the size with the smallest capacity with section of at least `minimumSection`.
+		'''
+		
+		return self.indexFrom( bisect_left( self.sections, minimumSection ) )
+	
+	
+	def indexByCapacity( self, current: float, correctionFactor: float ) -> int | None:
+		'''
+		Index of the size with the smallest corrected capacity of at least `current`.
+		'''
+		
+		position = bisect_left(
+			self.capacityOrder,
+			current,
+			key = lambda index: self.uncorrectedCapacities[index] * correctionFactor,
+		)
+		
+		if position >= len( self ):
+			return None
+		
+		return self.capacityOrder[position]
+	
+	
+	def indexByVoltageDrop(
+		self,
+		current: float,
+		length: float,
+		voltage: float,
+		limit: float,
+	) -> int | None:
+		'''
+		Index of the size with the smallest capacity with voltage drop of at most `limit`.
+		
+		Voltage drop is inversely proportional to section, so the minimum section is calculated
+		directly and then adjusted for rounding against `calculateVoltageDrop()`.
+		'''
+		
+		def isValid( index: int ) -> bool:
+			return calculateVoltageDrop( self.resistancesPerMeter[index], length, current, voltage ) <= limit
+		
+		minimumSection = self.resistivity * 1000**2 * length * 2 * current / ( voltage * limit )
+		firstIndex = bisect_left( self.sections, minimumSection )
+		
+		while firstIndex < len( self ) and not isValid( firstIndex ):
+			firstIndex += 1
+		
+		while firstIndex > 0 and isValid( firstIndex - 1 ):
+			firstIndex -= 1
+		
+		return self.indexFrom( firstIndex )
+
+
+
+def calculateVoltageDrop(
+	resistancePerMeter: float,
+	length: float,
+	current: float,
+	voltage: float,
+) -> float:
+	'''
+	Voltage drop as a fraction of nominal voltage for a circuit with two wires of `length`.
+	'''
+	
+	resistance = resistancePerMeter * length * 2
+	
+	return current * resistance / voltage
 
 
 
@@ -204,6 +419,8 @@ class Wire( BaseModel ):
 	configuration, temperature and grouping.
 	'''
 	
+	model_config = ConfigDict( defer_build = True )
+	
 	type: WireType
 	section: float
 	uncorrectedCapacity: float
@@ -268,12 +485,35 @@ class BreakerCurve( StrEnum ):
 class Breaker( BaseModel ):
 	'''
 	Circuit breaker of a specific capacity.
+	
+	Instances are immutable and shared, there's only one instance for each curve and current.
 	'''
 	
+	# Class variables.
+	model_config = ConfigDict( frozen = True, defer_build = True )
+	__instances__: ClassVar[dict[tuple[BreakerCurve, int], Self]] = {}
+	
+	# Fields.
 	current: int
 	curve: BreakerCurve
 	
 	
+	@model_validator( mode = 'wrap' )
+	@classmethod
+	def _shareInstanceByValue(
+		cls,
+		data: Any | dict[str, Any],
+		handler: ValidatorFunctionWrapHandler,
+	) -> Self:
+		'''
+		Reuse previously created instance with the same curve and current.
+		'''
+		
+		instance: Self = handler( data )
+		
+		return cls.__instances__.setdefault( ( instance.curve, instance.current ), instance )
+	
+	
 	@classmethod
 	@cache
 	def loadBreakers( cls ) -> dict[str, list[int]]:
@@ -281,19 +521,44 @@ class Breaker( BaseModel ):
 		TODO: Proper class with Pydantic.
 		'''
 		
-		with open( 'share/data/breakers.json5', 'rb' ) as file:
-			return decode_buffer( file.read() )
+		return loadCatalog( 'breakers' )
 	
 	
 	@classmethod
-	def getBreakers( cls, curve: BreakerCurve ) -> list[Self]:
+	@cache
+	def getBreakers( cls, curve: BreakerCurve ) -> tuple[Self, ...]:
 		'''
-		Return breakers by curve.
+		Return breakers by curve, sorted by current.
 		'''
 		
 		breakers = cls.loadBreakers()
 		
-		return [ cls( current = current, curve = curve ) for current in breakers[curve.value] ]
+		return tuple(
+			cls.model_validate( { 'current': current, 'curve': curve } )
+			for current in sorted( breakers[curve.value] )
+		)
+	
+	
+	@classmethod
+	@cache
+	def getCurrents( cls, curve: BreakerCurve ) -> tuple[int, ...]:
+		'''
+		Return current of breakers by curve, in the same order as `getBreakers()`.
+		'''
+		
+		return tuple( breaker.current for breaker in cls.getBreakers( curve ) )
+	
+	
+	@classmethod
+	def forCurrent( cls, curve: BreakerCurve, current: float ) -> Self | None:
+		'''
+		Return smallest breaker of the given curve for `current`, if any.
+		'''
+		
+		index = bisect_left( cls.getCurrents( curve ), current )
+		breakers = cls.getBreakers( curve )
+		
+		return breakers[index] if index < len( breakers ) else None
 	
 	
 	@override
@@ -333,6 +598,7 @@ class BaseCircuit( UniqueSerializable, GenericItem ):
 	
 	supply: Annotated[
 		Supply,
+		Reference,
 		ItemField(
 			'Supply',
 			description = 'The supply for this circuit.',
@@ -342,6 +608,7 @@ class BaseCircuit( UniqueSerializable, GenericItem ):
 	
 	loadType: Annotated[
 		LoadType,
+		Reference,
 		ItemField(
 			'Load Type',
 			description = 'The type of load for this circuit.',
@@ -351,6 +618,7 @@ class BaseCircuit( UniqueSerializable, GenericItem ):
 	
 	wireType: Annotated[
 		WireType,
+		Reference,
 		ItemField(
 			'Wire Type',
 			description = 'Type of wire for this circuit.',
@@ -378,6 +646,67 @@ class BaseCircuit( UniqueSerializable, GenericItem ):
 	
 	project: Annotated[SkipValidation[Project] | None, Field( exclude = True )] = None
 	conduitRun: Annotated[ConduitRun | None, Field( exclude = True )] = None
+	upstreamCircuit: Annotated[SkipValidation[UpstreamCircuit] | None, Field( exclude = True )] = None
+	
+	# Cached results of calculations, see `_cached()`.
+	_cacheKey: tuple[Any, ...] | None = None
+	_cache: dict[str, Any] = PrivateAttr( default_factory = dict )
+	
+	
+	@model_validator( mode = 'after' )
+	def _invalidateUpstreamPower( self ) -> Self:
+		'''
+		Invalidate power of upstream circuits after any change to this circuit.
+		'''
+		
+		if self.upstreamCircuit:
+			self.upstreamCircuit.invalidatePower()
+		
+		return self
+	
+	
+	def inputsKey( self ) -> tuple[Any, ...]:
+		'''
+		Values of all inputs used in this circuit's calculations. Results calculated elsewhere, e.g.
+		by `sizeCircuits()`, are still valid while it doesn't change.
+		'''
+		
+		conduitRunInputs = None
+		if self.conduitRun:
+			conduitRunInputs = (
+				self.conduitRun.referenceMethod,
+				self.conduitRun.temperature,
+				self.conduitRun.grouping,
+			)
+		
+		return (
+			self.power,
+			self.length,
+			self.breakerCurve,
+			self.supply.voltage,
+			self.supply.phases,
+			self.supply.hasNeutral,
+			self.loadType.minimumWireSection,
+			self.wireType.material,
+			self.wireType.insulation,
+			conduitRunInputs,
+		)
+	
+	
+	def _cached[T]( self, name: str, calculate: Callable[[], T] ) -> T:
+		'''
+		Return the result of `calculate`, only calling it again after any input in `inputsKey()`
+		changed.
+		'''
+		
+		if ( key := self.inputsKey() ) != self._cacheKey:
+			self._cache.clear()
+			self._cacheKey = key
+		
+		if name not in self._cache:
+			self._cache[name] = calculate()
+		
+		return self._cache[name]
 	
 	
 	@property
@@ -407,87 +736,99 @@ class BaseCircuit( UniqueSerializable, GenericItem ):
 		Project current.
 		'''
 		
-		return self.power / self.supply.voltage / self.supply.phases
+		return self._cached( 'current', lambda: self.power / self.supply.voltage / self.supply.phases )
 	
 	
 	@property
 	def breaker( self ) -> Annotated[
 		Breaker,
-		ItemField( 'Breaker', format = lambda value: f'{value.current} A' )
+		ItemField( 'Breaker', format = lambda value: f'{value.current} A', deferred = True )
 	]:
 		'''
 		Suitable breaker for this circuit.
 		'''
 		
-		breakers = list( filter(
-			lambda breaker: breaker.current >= self.current,
-			Breaker.getBreakers( self.breakerCurve ),
-		) )
+		return self._cached( 'breaker', self._selectBreaker )
+	
+	
+	def _selectBreaker( self ) -> Breaker:
+		'''
+		Select smallest breaker for this circuit's current.
+		'''
 		
-		if not breakers:
+		if not ( breaker := Breaker.forCurrent( self.breakerCurve, self.current ) ):
 			raise ProjectError( 'No suitable breaker found.' )
 		
-		return min( breakers )
+		return breaker
 	
 	
 	@property
 	def wire( self ) -> Annotated[
 		Wire,
-		ItemField( 'Wire Section', format = lambda value: f'{value.section:,.1f} mm²' )
+		ItemField(
+			'Wire Section',
+			format = lambda value: f'{value.section:,.1f} mm²',
+			deferred = True,
+		),
 	]:
 		'''
 		Suitable wire for this circuit considering current capacity, voltage drop and short-circuit
 		current.
 		'''
 		
-		wireByCriteria: dict[str, Wire] = {}
+		return self._cached( 'wire', self._selectWire )
+	
+	
+	def _selectWire( self ) -> Wire:
+		'''
+		Select wire with largest section required by all criteria.
+		'''
+		
 		if self.conduitRun:
-			allWires = self.wireType.getWires(
-				self.conduitRun.referenceMethod,
-				self.supply.loadedWireCount,
-				self.conduitRun.correctionFactor,
-			)
+			referenceMethod = self.conduitRun.referenceMethod
+			correctionFactor = self.conduitRun.correctionFactor
 		else:
-			allWires = self.wireType.getWires(
-				ReferenceMethod.A1,
-				self.supply.loadedWireCount,
-				1.0,
-			)
+			referenceMethod = ReferenceMethod.A1
+			correctionFactor = 1.0
+		
+		wireTable = self.wireType.getWireTable( referenceMethod, self.supply.loadedWireCount )
+		indexByCriteria: dict[str, int | None] = {}
 		
 		# Wire section by minimum section.
-		wireByCriteria['minimumSection'] = min( filter(
-			lambda wire: wire.section >= self.loadType.minimumWireSection,
-			allWires,
-		) )
+		indexByCriteria['minimumSection'] = wireTable.indexBySection( self.loadType.minimumWireSection )
 		
 		# Wire section by current capacity.
-		wireByCriteria['currentCapacity'] = min( filter(
-			lambda wire: wire.capacity >= self.current,
-			allWires,
-		) )
+		indexByCriteria['currentCapacity'] = wireTable.indexByCapacity( self.current, correctionFactor )
 		
 		# Wire section by voltage drop.
-		wireByCriteria['voltageDrop'] = min( filter(
-			lambda wire: self._voltageDrop( wire ) <= VoltageDropLimit.TERMINAL,
-			allWires,
-		) )
+		indexByCriteria['voltageDrop'] = wireTable.indexByVoltageDrop(
+			self.current,
+			self.length,
+			self.supply.voltage,
+			VoltageDropLimit.TERMINAL,
+		)
 		
 		# Wire section by breaker.
-		wireByCriteria['breaker'] = min( filter(
-			lambda wire: wire.capacity >= self.breaker.current,
-			allWires,
-		) )
+		indexByCriteria['breaker'] = wireTable.indexByCapacity( self.breaker.current, correctionFactor )
 		
-		# Select wire with largest section.
-		wire = max( wireByCriteria.values() )
-		if not wire:
+		indexes = [ index for index in indexByCriteria.values() if index is not None ]
+		if len( indexes ) < len( indexByCriteria ):
 			raise ProjectError( 'No suitable wire found.' )
 		
-		return wire
+		# Select wire with largest section.
+		index = max(
+			indexes,
+			key = lambda index: wireTable.uncorrectedCapacities[index] * correctionFactor,
+		)
+		
+		return wireTable.wire( index, self.wireType, correctionFactor )
 	
 	
 	@property
-	def _wireCapacity( self ) -> Annotated[float, ItemField( 'Wire Capacity', format = '{0:,.1f} A' )]:
+	def _wireCapacity( self ) -> Annotated[
+		float,
+		ItemField( 'Wire Capacity', format = '{0:,.1f} A', deferred = True ),
+	]:
 		'''
 		Wire capacity, as a direct field.
 		'''
@@ -495,26 +836,21 @@ class BaseCircuit( UniqueSerializable, GenericItem ):
 		return self.wire.capacity
 	
 	
-	def _voltageDrop( self, wire: Wire ) -> float:
-		'''
-		Voltage drop as a fraction of nominal voltage.
-		Helper function used to calculate voltage drop for different wire sizes.
-		Used in `calculate()`.
-		'''
-		
-		resistance = wire.resistancePerMeter * self.length * 2
-		voltageDrop = self.current * resistance
-		
-		return voltageDrop / self.supply.voltage
-	
-	
 	@property
-	def voltageDrop( self ) -> Annotated[float, ItemField( 'Voltage Drop', format = '{0:.1%}' )]:
+	def voltageDrop( self ) -> Annotated[
+		float,
+		ItemField( 'Voltage Drop', format = '{0:.1%}', deferred = True ),
+	]:
 		'''
 		Voltage drop as a fraction of nominal voltage.
 		'''
 		
-		return self._voltageDrop( self.wire )
+		return self._cached( 'voltageDrop', lambda: calculateVoltageDrop(
+			self.wire.resistancePerMeter,
+			self.length,
+			self.current,
+			self.supply.voltage,
+		) )
 
 
 
@@ -544,7 +880,44 @@ class UpstreamCircuit( BaseCircuit ):
 	Represents a circuit whose load is a group of downstream circuits.
 	'''
 	
-	circuits: list[SerializeAsAny[BaseCircuit]] = Field( default_factory = list )
+	circuits: list[Annotated[BaseCircuit, AnyCircuit, Reference]] = Field(
+		default_factory = list[BaseCircuit]
+	)
+	
+	# Cached total power, see `invalidatePower()`.
+	_power: float | None = None
+	
+	
+	@model_validator( mode = 'after' )
+	def _updateReferences( self ) -> Self:
+		'''
+		Update back-references in downstream circuits.
+		'''
+		
+		for circuit in self.circuits:
+			if circuit.upstreamCircuit is not self:
+				circuit.upstreamCircuit = self
+		
+		self.invalidatePower()
+		
+		return self
+	
+	
+	def invalidatePower( self ) -> None:
+		'''
+		Invalidate cached power of this circuit and all upstream circuits.
+		
+		Stops at the first upstream circuit already invalidated, since a circuit's power is never
+		cached before the power of its downstream circuits.
+		'''
+		
+		if self._power is None:
+			return
+		
+		self._power = None
+		
+		if self.upstreamCircuit:
+			self.upstreamCircuit.invalidatePower()
 	
 	
 	@property
@@ -554,7 +927,12 @@ class UpstreamCircuit( BaseCircuit ):
 		Total power consumed by all downstream circuits, corrected by each circuit's demand factor.
 		'''
 		
-		return sum( circuit.power * circuit.loadType.demandFactor for circuit in self.circuits )
+		if self._power is None:
+			self._power = sum(
+				circuit.power * circuit.loadType.demandFactorFor( self ) for circuit in self.circuits
+			)
+		
+		return self._power
 	
 	
 	@power.setter
@@ -565,13 +943,52 @@ class UpstreamCircuit( BaseCircuit ):
 	
 	@property
 	@override
-	def children( self ) -> list[BaseCircuit]:
-		return self.circuits
+	def children( self ) -> list[GenericItem]:
+		return cast( list[GenericItem], self.circuits )
 	
 	
 	@override
 	def isChildValid( self, item: GenericItem ) -> bool:
 		return isinstance( item, BaseCircuit )
+	
+	
+	@override
+	def insertChild( self, index: int, item: GenericItem ) -> None:
+		super().insertChild( index, item )
+		cast( BaseCircuit, item ).upstreamCircuit = self	# See `isChildValid()`.
+		self.invalidatePower()
+	
+	
+	@override
+	def removeChild( self, index: int, item: GenericItem ) -> None:
+		super().removeChild( index, item )
+		cast( BaseCircuit, item ).upstreamCircuit = None	# See `isChildValid()`.
+		self.invalidatePower()
+
+
+
+def _getCircuitType( value: Any ) -> str | None:
+	'''
+	Same as `getItemType()`, but also accepts references to circuits, see `UniqueSerializable`.
+	'''
+	
+	if isinstance( value, str ):
+		value = UniqueSerializable.getInstance( value )
+	
+	return getItemType( value )
+
+
+# Any concrete `BaseCircuit`, validated according to `__type__`.
+type _ConcreteCircuit = Annotated[
+	Annotated[Circuit, Tag( Circuit.__getQualifiedName__() )]
+	| Annotated[UpstreamCircuit, Tag( UpstreamCircuit.__getQualifiedName__() )],
+	Discriminator( _getCircuitType ),
+]
+
+# Annotation for `BaseCircuit` fields, validating each circuit directly as its actual class, see
+# `getItemType()`. Fields are still typed as `BaseCircuit`.
+# pylint: disable-next = invalid-name
+AnyCircuit = GetPydanticSchema( lambda _, handler: handler( _ConcreteCircuit ) )
 
 
 
@@ -4,19 +4,25 @@ Models related to conduits.
 
 from __future__ import annotations
 
+from bisect import bisect_left
+from collections.abc import Callable
+from dataclasses import dataclass
 from enum import StrEnum, auto
 from functools import cache
 from math import pi
-from typing import Annotated, Any, Self, override
+from typing import TYPE_CHECKING, Annotated, Any, Self, cast, override
 
 from annotated_types import Ge, MinLen
-from pydantic import BaseModel, Field, SerializeAsAny
-from pyjson5 import decode_buffer
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 
-from nbr_5410_calculator.generic_model_views.items import ItemField
-from nbr_5410_calculator.generic_model_views.models import GenericItem
-from nbr_5410_calculator.installation.circuit import BaseCircuit
-from nbr_5410_calculator.installation.util import ProjectError, UniqueSerializable
+from nbr_5410_calculator.generic_model_views.items import GenericItem, ItemField
+from nbr_5410_calculator.installation.catalogs import loadCatalog, loadCatalogs
+from nbr_5410_calculator.installation.circuit import AnyCircuit, BaseCircuit
+from nbr_5410_calculator.installation.util import ProjectError, Reference, UniqueSerializable
+
+if TYPE_CHECKING:
+	import numpy as np
+	from numpy.typing import ArrayLike, NDArray
 
 
 
@@ -35,6 +41,8 @@ class Conduit( BaseModel ):
 	Conduit of specific type and size.
 	'''
 	
+	model_config = ConfigDict( defer_build = True )
+	
 	conduitType: ConduitType
 	nominalDiameter: str
 	externalDiameter: float
@@ -45,52 +53,123 @@ class Conduit( BaseModel ):
 	model: str = ''
 	
 	
+	def __gt__( self, other: Self ) -> bool:
+		return self.section > other.section
+	
+	
+	@property
+	def section( self ) -> float:
+		'''
+		Internal section in mm².
+		'''
+		
+		return pi * ( self.internalDiameter / 2 ) ** 2
+
+
+
+@dataclass( frozen = True, slots = True, eq = False )
+class ConduitCatalog:
+	'''
+	All sizes of a conduit model, sorted by section.
+	'''
+	
+	conduitType: ConduitType
+	brand: str
+	model: str
+	conduits: tuple[Conduit, ...]
+	sections: tuple[float, ...]
+	
+	
 	@classmethod
 	@cache
-	def allConduits( cls ) -> list[Self]:
+	def loadCatalogs( cls ) -> dict[tuple[ConduitType, str, str], Self]:
 		'''
-		Return all available sizes of this model of conduit.
+		Load all conduit catalogs, indexed by conduit type, brand and model.
+		'''
+		
+		catalogs: dict[tuple[ConduitType, str, str], Self] = {}
+		
+		for name, conduitData in loadCatalogs().items():
+			if name.startswith( 'conduit/' ):
+				catalog = cls.fromConduitData( conduitData )
+				catalogs[( catalog.conduitType, catalog.brand, catalog.model )] = catalog
+		
+		return catalogs
+	
+	
+	@classmethod
+	def fromConduitData( cls, conduitData: dict[str, Any] ) -> Self:
+		'''
+		Create catalog from conduit data as compiled by `compileCatalogs()`.
 		'''
 		
 		# TODO: Proper class with Pydantic.
-		with open( 'share/data/conduit/rigid.json5', 'rb' ) as file:
-			jsonData = decode_buffer( file.read() )
+		conduitType = ConduitType( conduitData['conduitType'] )
+		brand = conduitData['brand']
+		model = conduitData['model']
 		
-		conduitType = ConduitType( jsonData['conduitType'] )
-		nominalDiameters = jsonData['nominalDiameters']
-		externalDiameters = jsonData['externalDiameters']
-		internalDiameters = jsonData['internalDiameters']
+		rows = sorted( zip(
+			conduitData['internalSections'],
+			conduitData['nominalDiameters'],
+			conduitData['externalDiameters'],
+			conduitData['internalDiameters'],
+		) )
 		
-		brand = jsonData['brand']
-		model = jsonData['model']
+		return cls(
+			conduitType = conduitType,
+			brand = brand,
+			model = model,
+			conduits = tuple(
+				Conduit(
+					conduitType = conduitType,
+					nominalDiameter = nominalDiameter,
+					externalDiameter = externalDiameter,
+					internalDiameter = internalDiameter,
+					brand = brand,
+					model = model,
+				)
+				for _, nominalDiameter, externalDiameter, internalDiameter in rows
+			),
+			sections = tuple( row[0] for row in rows ),
+		)
+	
+	
+	@classmethod
+	@cache
+	def getCatalog(
+		cls,
+		conduitType: ConduitType,
+		brand: str | None = None,
+		model: str | None = None,
+	) -> Self:
+		'''
+		Return first catalog for `conduitType`, optionally restricted to `brand` and `model`.
+		'''
 		
-		conduits = [
-			cls(
-				conduitType = conduitType,
-				nominalDiameter = nominalDiameter,
-				externalDiameter = externalDiameter,
-				internalDiameter = internalDiameter,
-				brand = brand,
-				model = model,
-			)
-			for nominalDiameter, externalDiameter, internalDiameter
-			in zip( nominalDiameters, externalDiameters, internalDiameters )
-		]
+		for ( catalogType, catalogBrand, catalogModel ), catalog in cls.loadCatalogs().items():
+			if (
+				catalogType is conduitType and
+				brand in ( None, catalogBrand ) and
+				model in ( None, catalogModel )
+			):
+				return catalog
 		
-		return conduits
+		raise ProjectError( f'No catalog for {conduitType} conduit.' )
 	
 	
-	def __gt__( self, other: Self ) -> bool:
-		return self.section > other.section
+	def __len__( self ) -> int:
+		return len( self.conduits )
 	
 	
-	@property
-	def section( self ) -> float:
+	def forFilledSection( self, filledSection: float, maxFillFactor: float ) -> Conduit | None:
 		'''
-		Internal section in mm².
+		Return smallest conduit for wires with a total of `filledSection` within `maxFillFactor`, if
+		any.
 		'''
 		
-		return pi * ( self.internalDiameter / 2 ) ** 2
+		index = bisect_left( self.sections, filledSection, key = lambda section: section * maxFillFactor )
+		
+		return self.conduits[index] if index < len( self ) else None
 
 
 
@@ -130,31 +209,72 @@ class TemperatureCorrectionFactor:
 		TODO: Proper class with Pydantic.
 		'''
 		
-		with open( 'share/data/temperatureCorrectionFactor.json5', 'rb' ) as file:
-			return decode_buffer( file.read() )
+		return loadCatalog( 'temperatureCorrectionFactor' )
+	
+	
+	@classmethod
+	@cache
+	def getFactors( cls ) -> tuple[tuple[float, ...], tuple[float, ...]]:
+		'''
+		Return temperatures and their correction factors, sorted by temperature.
+		'''
+		
+		factors = sorted( cls.loadFactors(), key = lambda factor: factor['temperature'] )
+		
+		return (
+			tuple( factor['temperature'] for factor in factors ),
+			tuple( factor['value'] for factor in factors ),
+		)
 	
 	
 	@classmethod
-	def forTemperature( cls, temperature: int ) -> float:
+	def forTemperature( cls, temperature: float ) -> float:
 		'''
 		Return the interpolated correction factor for a given temperature.
 		'''
 		
-		factors = cls.loadFactors()
+		temperatures, values = cls.getFactors()
 		
-		if temperature <= factors[0]['temperature']:
-			return factors[0]['value']
+		if temperature <= temperatures[0]:
+			return values[0]
 		
-		for factor, nextFactor in zip( factors, factors[1:] ):
-			if nextFactor['temperature'] >= temperature:
-				return (
-					factor['value'] +
-					( nextFactor['value'] - factor['value'] ) *
-					( temperature - factor['temperature'] ) / 
-					( nextFactor['temperature'] - factor['temperature'] )
-				)
+		if ( index := bisect_left( temperatures, temperature ) ) == len( temperatures ):
+			raise ProjectError( 'TODO: Temperature outside range.' )
 		
-		raise ProjectError( 'TODO: Temperature outside range.' )
+		return (
+			values[index - 1] +
+			( values[index] - values[index - 1] ) *
+			( temperature - temperatures[index - 1] ) /
+			( temperatures[index] - temperatures[index - 1] )
+		)
+	
+	
+	@classmethod
+	def forTemperatures( cls, temperatures: ArrayLike ) -> NDArray[np.float64]:
+		'''
+		Vectorized variant of `forTemperature()`.
+		'''
+		
+		# Only import NumPy when needed, see `benchmarks/importtime.py`.
+		# pylint: disable-next = import-outside-toplevel
+		import numpy as np
+		
+		table, values = ( np.array( column, np.float64 ) for column in cls.getFactors() )
+		temperatures = np.asarray( temperatures, np.float64 )
+		
+		index = np.searchsorted( table, temperatures )
+		if np.any( index == len( table ) ):
+			raise ProjectError( 'TODO: Temperature outside range.' )
+		
+		index = np.maximum( index, 1 )
+		interpolated = (
+			values[index - 1] +
+			( values[index] - values[index - 1] ) *
+			( temperatures - table[index - 1] ) /
+			( table[index] - table[index - 1] )
+		)
+		
+		return np.where( temperatures <= table[0], values[0], interpolated )
 
 
 
@@ -172,23 +292,44 @@ class GroupingCorrectionFactor:
 		TODO: Proper class with Pydantic.
 		'''
 		
-		with open( 'share/data/groupingCorrectionFactor.json5', 'rb' ) as file:
-			return decode_buffer( file.read() )
+		return loadCatalog( 'groupingCorrectionFactor' )
 	
 	
 	@classmethod
-	def forGrouping( cls, grouping: int ) -> float:
+	@cache
+	def getFactors( cls ) -> tuple[float, ...]:
 		'''
-		Return the correction factor for a given circuit grouping.
+		Return correction factors indexed by grouping.
 		'''
 		
 		factors = cls.loadFactors()
 		
-		last = max( factors.keys() )
-		if grouping > int( last ):
-			return factors[last]
+		return tuple( factors[str( grouping )] for grouping in range( len( factors ) ) )
+	
+	
+	@classmethod
+	def forGrouping( cls, grouping: int ) -> float:
+		'''
+		Return the correction factor for a given circuit grouping.
+		
+		Groupings above the largest in the table use the factor for the largest.
+		'''
+		
+		factors = cls.getFactors()
 		
-		return factors[str( grouping )]
+		return factors[min( grouping, len( factors ) - 1 )]
+
+
+
+@dataclass( frozen = True, slots = True )
+class ConduitRunResults:
+	'''
+	Results of all calculations for a `ConduitRun`, see `ConduitRun.evaluate()`.
+	'''
+	
+	filledSection: float
+	conduit: Conduit
+	fillFactor: float
 
 
 
@@ -201,20 +342,61 @@ class ConduitRun( UniqueSerializable, GenericItem ):
 	referenceMethod: Annotated[ReferenceMethod, ItemField( 'Ref. Method' )]
 	temperature: Annotated[int, ItemField( 'Temperature', format = '{0}°C' )]
 	length: Annotated[float, Ge( 0.0 ), ItemField( 'Length', format = '{0:,} m' )]
+	conduitType: Annotated[ConduitType, ItemField( 'Conduit Type' )] = ConduitType.RIGID
 	
-	circuits: list[SerializeAsAny[BaseCircuit]] = Field( default_factory = list )
+	circuits: list[Annotated[BaseCircuit, AnyCircuit, Reference]] = Field(
+		default_factory = list[BaseCircuit]
+	)
 	
+	# Cached results of calculations and the inputs used for them, see `_cached()`.
+	_cache: dict[str, tuple[Any, Any]] = PrivateAttr( default_factory = dict )
 	
-	@property
-	def conduit( self ) -> Annotated[
-		Conduit,
-		ItemField( 'Diameter', format = lambda value: value.nominalDiameter ),
-	]:
+	
+	def _cached[T]( self, name: str, key: Any, calculate: Callable[[], T] ) -> T:
+		'''
+		Return the result of `calculate`, only calling it again after `key` changed.
+		'''
+		
+		if ( cached := self._cache.get( name ) ) and cached[0] == key:
+			return cached[1]
+		
+		result = calculate()
+		self._cache[name] = ( key, result )
+		
+		return result
+	
+	
+	def evaluate( self ) -> ConduitRunResults:
+		'''
+		Size all circuits in this run once, then calculate filled section and select conduit.
+		
+		Results are reused until the conduit type or the wire or wire count of any circuit changes.
+		'''
+		
+		wires = tuple(
+			( circuit.wire.externalSection, circuit.supply.wireCount ) for circuit in self.circuits
+		)
+		
+		return self._cached(
+			'evaluate',
+			( self.conduitType, wires ),
+			lambda: self.evaluateWires( ConduitCatalog.getCatalog( self.conduitType ), wires ),
+		)
+	
+	
+	@staticmethod
+	def evaluateWires(
+		catalog: ConduitCatalog,
+		wires: tuple[tuple[float, int], ...],
+	) -> ConduitRunResults:
 		'''
-		TODO
+		Calculate results for `evaluate()` given a conduit catalog and each circuit's wire external
+		section and wire count, without reading the conduit run itself or creating `Wire`s.
 		'''
 		
-		match sum( circuit.supply.wireCount for circuit in self.circuits ):
+		filledSection = sum( externalSection * wireCount for externalSection, wireCount in wires )
+		
+		match sum( wireCount for _, wireCount in wires ):
 			case 1:
 				maxFillFactor = 0.53
 			case 2:
@@ -222,12 +404,26 @@ class ConduitRun( UniqueSerializable, GenericItem ):
 			case _:
 				maxFillFactor = 0.40
 		
-		conduit = min( filter(
-			lambda conduit: conduit.section * maxFillFactor >= self.filledSection,
-			Conduit.allConduits(),
-		) )
+		if not ( conduit := catalog.forFilledSection( filledSection, maxFillFactor ) ):
+			raise ProjectError( 'No suitable conduit found.' )
+		
+		return ConduitRunResults(
+			filledSection = filledSection,
+			conduit = conduit,
+			fillFactor = filledSection / conduit.section,
+		)
+	
+	
+	@property
+	def conduit( self ) -> Annotated[
+		Conduit,
+		ItemField( 'Diameter', format = lambda value: value.nominalDiameter, deferred = True ),
+	]:
+		'''
+		Smallest conduit for all wires in this run within the maximum fill factor.
+		'''
 		
-		return conduit
+		return self.evaluate().conduit
 	
 	
 	@property
@@ -245,10 +441,14 @@ class ConduitRun( UniqueSerializable, GenericItem ):
 		Correction factor for temperature and grouping.
 		'''
 		
-		temperatureFactor = TemperatureCorrectionFactor.forTemperature( self.temperature )
-		groupingFactor = GroupingCorrectionFactor.forGrouping( self.grouping )
-		
-		return temperatureFactor * groupingFactor
+		return self._cached(
+			'correctionFactor',
+			( self.temperature, self.grouping ),
+			lambda: (
+				TemperatureCorrectionFactor.forTemperature( self.temperature ) *
+				GroupingCorrectionFactor.forGrouping( self.grouping )
+			),
+		)
 	
 	
 	@property
@@ -257,22 +457,25 @@ class ConduitRun( UniqueSerializable, GenericItem ):
 		Sum of external section of all wires in this conduit run, in mm².
 		'''
 		
-		return sum( circuit.wire.externalSection * circuit.supply.wireCount for circuit in self.circuits )
+		return self.evaluate().filledSection
 	
 	
 	@property
-	def fillFactor( self ) -> Annotated[float, ItemField( 'Fill Factor', format = '{0:.1%}' )]:
+	def fillFactor( self ) -> Annotated[
+		float,
+		ItemField( 'Fill Factor', format = '{0:.1%}', deferred = True ),
+	]:
 		'''
 		Fraction of conduit area occupied by wires.
 		'''
 		
-		return self.filledSection / self.conduit.section
+		return self.evaluate().fillFactor
 	
 	
 	@property
 	@override
-	def children( self ) -> list[BaseCircuit]:
-		return self.circuits
+	def children( self ) -> list[GenericItem]:
+		return cast( list[GenericItem], self.circuits )
 	
 	
 	@override
@@ -281,12 +484,12 @@ class ConduitRun( UniqueSerializable, GenericItem ):
 	
 	
 	@override
-	def insertChild( self, index: int, item: BaseCircuit ) -> None:
+	def insertChild( self, index: int, item: GenericItem ) -> None:
 		super().insertChild( index, item )
-		item.conduitRun = self
+		cast( BaseCircuit, item ).conduitRun = self	# See `isChildValid()`.
 	
 	
 	@override
-	def removeChild( self, index: int, item: BaseCircuit ) -> None:
+	def removeChild( self, index: int, item: GenericItem ) -> None:
 		super().removeChild( index, item )
-		item.conduitRun = None
\ No newline at end of file
+		cast( BaseCircuit, item ).conduitRun = None	# See `isChildValid()`.
\ No newline at end of file
@@ -0,0 +1,271 @@
+'''
+Dependency graph between items in a `Project`, to find which items are affected by an edit.
+'''
+
+from collections import defaultdict
+
+from nbr_5410_calculator.installation.circuit import (
+	BaseCircuit,
+	LoadType,
+	Supply,
+	UpstreamCircuit,
+	WireType,
+)
+from nbr_5410_calculator.installation.conduitRun import ConduitRun
+from nbr_5410_calculator.installation.project import Project
+from nbr_5410_calculator.installation.util import ProjectError
+
+
+
+type ProjectItem = Supply | LoadType | WireType | BaseCircuit | ConduitRun
+
+
+
+class DependencyGraph:
+	'''
+	Which items in a `Project` are affected when another item changes.
+	
+	- Circuits depend on their `Supply`, `LoadType` and `WireType`.
+	- Upstream circuits depend on their downstream circuits.
+	- Circuits depend on their `ConduitRun` through `ConduitRun.correctionFactor`.
+	- Conduit runs are affected by their circuits, but not through other circuits in the same run,
+	see `notifyChanged()`.
+	
+	Cached results are invalidated by their own inputs anyway, see `BaseCircuit.inputsKey()`. Call
+	`notifyChanged()` after editing an item and `recompute()` to refresh the affected items ahead of
+	reading them, or `takeDirtyItems()` to refresh them elsewhere, e.g. in another thread. Items are
+	tracked by identity. Call `rebuild()` after items are added to, moved in or removed from the
+	project.
+	'''
+	
+	def __init__( self, project: Project ) -> None:
+		super().__init__()
+		
+		self.project = project
+		self._items: dict[int, ProjectItem] = {}
+		self._dependents: defaultdict[int, set[int]] = defaultdict( set )
+		self._dependencies: defaultdict[int, set[int]] = defaultdict( set )
+		self._dirty: dict[int, None] = {}	# Ordered set.
+		
+		# Nothing has changed yet.
+		self.rebuild()
+		self._dirty.clear()
+	
+	
+	def rebuild( self ) -> None:
+		'''
+		Rebuild the whole graph from the project.
+		
+		Items added to the project or with different dependencies, e.g. upstream circuits with
+		different circuits, and conduit runs with different circuits are marked as changed, see
+		`notifyChanged()`.
+		'''
+		
+		previousItems = self._items.copy()
+		previousDependencies = { key: set( keys ) for key, keys in self._dependencies.items() }
+		previousDependents = { key: set( keys ) for key, keys in self._dependents.items() }
+		
+		self._items.clear()
+		self._dependents.clear()
+		self._dependencies.clear()
+		
+		for item in ( *self.project.supplies, *self.project.loadTypes, *self.project.wireTypes ):
+			self._addItem( item )
+		
+		for circuit in self.project.iterCircuits():
+			self._addCircuit( circuit )
+		
+		for conduitRun in self.project.conduitRuns:
+			self._addItem( conduitRun )
+			
+			for circuit in conduitRun.circuits:
+				self._addEdge( conduitRun, circuit )
+		
+		# Drop dirty items that are no longer in the project.
+		self._dirty = { key: None for key in self._dirty if key in self._items }
+		
+		for key, item in self._items.items():
+			if (
+				previousItems.get( key ) is not item
+				or self._dependencies[key] != previousDependencies.get( key, set() )
+			):
+				self._markChanged( item )
+			elif (
+				isinstance( item, ConduitRun )
+				and self._dependents[key] != previousDependents.get( key, set() )
+			):
+				# Its circuits don't depend on each other, see `notifyChanged()`.
+				self._dirty[key] = None
+	
+	
+	def _addItem( self, item: ProjectItem ) -> None:
+		'''
+		Add `item` as a node without edges.
+		'''
+		
+		self._items[id( item )] = item
+	
+	
+	def _addEdge( self, dependency: ProjectItem, dependent: ProjectItem ) -> None:
+		'''
+		Mark `dependent` as requiring recalculation whenever `dependency` changes.
+		'''
+		
+		self._addItem( dependency )
+		self._addItem( dependent )
+		self._dependents[id( dependency )].add( id( dependent ) )
+		self._dependencies[id( dependent )].add( id( dependency ) )
+	
+	
+	def _removeEdge( self, dependency: int, dependent: int ) -> None:
+		'''
+		Remove edge added by `_addEdge()`.
+		'''
+		
+		self._dependents[dependency].discard( dependent )
+		self._dependencies[dependent].discard( dependency )
+	
+	
+	def _addCircuit( self, circuit: BaseCircuit ) -> None:
+		'''
+		Add edges from `circuit`'s inputs to `circuit` and from `circuit` to its upstream circuits.
+		'''
+		
+		self._addItem( circuit )
+		
+		for dependency in ( circuit.supply, circuit.loadType, circuit.wireType ):
+			self._addEdge( dependency, circuit )
+		
+		if isinstance( circuit, UpstreamCircuit ):
+			for downstreamCircuit in circuit.circuits:
+				self._addEdge( downstreamCircuit, circuit )
+	
+	
+	def _updateCircuit( self, circuit: BaseCircuit ) -> None:
+		'''
+		Update edges to `circuit`, which may have a different `Supply`, `LoadType` or `WireType`.
+		'''
+		
+		for dependency in list( self._dependencies[id( circuit )] ):
+			if isinstance( self._items[dependency], Supply | LoadType | WireType ):
+				self._removeEdge( dependency, id( circuit ) )
+		
+		self._addCircuit( circuit )
+	
+	
+	def dependentsOf( self, item: ProjectItem ) -> list[ProjectItem]:
+		'''
+		All items that must be recalculated when `item` changes, not including `item` itself.
+		'''
+		
+		visited: dict[int, None] = {}
+		pending = list( self._dependents[id( item )] )
+		
+		while pending:
+			key = pending.pop()
+			
+			if key in visited or key == id( item ):
+				continue
+			
+			visited[key] = None
+			pending += self._dependents[key]
+		
+		return [ self._items[key] for key in visited ]
+	
+	
+	def notifyChanged( self, item: ProjectItem ) -> None:
+		'''
+		Mark `item`, all items depending on it and the conduit runs of affected circuits as
+		requiring recalculation.
+		
+		Conduit runs don't affect other circuits in the run through their circuits, since
+		`ConduitRun.correctionFactor` doesn't depend on them.
+		'''
+		
+		if id( item ) not in self._items:
+			raise KeyError( f'{item} is not part of the project.' )
+		
+		if isinstance( item, BaseCircuit ):
+			self._updateCircuit( item )
+		
+		self._markChanged( item )
+	
+	
+	def _markChanged( self, item: ProjectItem ) -> None:
+		'''
+		Mark items affected by `item`, see `notifyChanged()`.
+		'''
+		
+		for affected in ( item, *self.dependentsOf( item ) ):
+			self._dirty[id( affected )] = None
+			
+			if isinstance( affected, BaseCircuit ) and id( affected.conduitRun ) in self._items:
+				self._dirty[id( affected.conduitRun )] = None
+	
+	
+	@property
+	def dirtyItems( self ) -> list[ProjectItem]:
+		'''
+		Items marked by `notifyChanged()` and not yet recalculated.
+		'''
+		
+		return [ self._items[key] for key in self._dirty ]
+	
+	
+	def takeDirtyItems( self ) -> list[ProjectItem]:
+		'''
+		Return `dirtyItems` and unmark them, without recalculating them.
+		'''
+		
+		items = self.dirtyItems
+		self._dirty.clear()
+		
+		return items
+	
+	
+	def recompute( self ) -> list[ProjectItem]:
+		'''
+		Refresh cached results of each item marked by `notifyChanged()` once, and return them.
+		
+		Errors in calculations are left to be reported when the item's properties are read.
+		'''
+		
+		items = self.takeDirtyItems()
+		
+		# Downstream circuits before upstream circuits, conduit runs after their circuits.
+		for item in sorted( items, key = self._depth ):
+			try:
+				_recalculate( item )
+			except ( ProjectError, ValueError ):
+				pass
+		
+		return items
+	
+	
+	def _depth( self, item: ProjectItem ) -> int:
+		'''
+		Sort key for `recompute()`.
+		'''
+		
+		match item:
+			case UpstreamCircuit() | ConduitRun():
+				return 1 + max( ( self._depth( circuit ) for circuit in item.circuits ), default = 0 )
+			case BaseCircuit():
+				return 0
+			case _:
+				return -1
+
+
+
+def _recalculate( item: ProjectItem ) -> None:
+	'''
+	Read all calculated properties of `item`, refreshing their cached values.
+	'''
+	
+	match item:
+		case BaseCircuit():
+			_ = item.current, item.breaker, item.wire, item.voltageDrop
+		case ConduitRun():
+			_ = item.correctionFactor, item.conduit, item.fillFactor
+		case _:
+			pass
@@ -2,10 +2,11 @@
 Top-level project model.
 '''
 
-from typing import Generator, Iterable, Self
-from pydantic import Field, SerializeAsAny, model_validator
+from typing import Annotated, Generator, Iterable, Self
+from pydantic import Field, model_validator
 
 from nbr_5410_calculator.installation.circuit import (
+	AnyCircuit,
 	BaseCircuit,
 	LoadType,
 	Supply,
@@ -13,7 +14,7 @@ from nbr_5410_calculator.installation.circuit import (
 	WireType,
 )
 from nbr_5410_calculator.installation.conduitRun import ConduitRun
-from nbr_5410_calculator.installation.util import UniqueSerializable
+from nbr_5410_calculator.installation.util import Reference, UniqueSerializable
 
 
 
@@ -24,16 +25,18 @@ class Project( UniqueSerializable ):
 	
 	name: str
 	
-	supplies: list[Supply] = Field( default_factory = list )
-	loadTypes: list[LoadType] = Field( default_factory = list )
-	wireTypes: list[WireType] = Field( default_factory = list )
+	supplies: list[Supply] = Field( default_factory = list[Supply] )
+	loadTypes: list[LoadType] = Field( default_factory = list[LoadType] )
+	wireTypes: list[WireType] = Field( default_factory = list[WireType] )
 	
-	defaultSupply: Supply | None = None
-	defaultLoadType: LoadType | None = None
-	defaultWireType: WireType | None = None
+	defaultSupply: Annotated[Supply | None, Reference] = None
+	defaultLoadType: Annotated[LoadType | None, Reference] = None
+	defaultWireType: Annotated[WireType | None, Reference] = None
 	
-	circuits: list[SerializeAsAny[BaseCircuit]] = Field( default_factory = list )
-	conduitRuns: list[ConduitRun] = Field( default_factory = list )
+	circuits: list[Annotated[BaseCircuit, AnyCircuit, Reference]] = Field(
+		default_factory = list[BaseCircuit]
+	)
+	conduitRuns: list[ConduitRun] = Field( default_factory = list[ConduitRun] )
 	
 	
 	@model_validator( mode = 'after' )
@@ -0,0 +1,384 @@
+'''
+Reading and writing project files.
+
+Version 1 files are a serialized `Project`, with full copies of items wherever they are used.
+Version 2 files store each item once and refer to it by UUID everywhere else, see
+`UniqueSerializable`.
+Version 3 files are newline-delimited JSON, with the same references as version 2. The first line
+is a header with the project and its catalogs, followed by one record per circuit and conduit run.
+Records can be appended to existing files and loaded incrementally, see `ProjectWriter` and
+`readProject()`.
+'''
+
+from collections.abc import Generator, Iterable, Iterator
+from io import BytesIO
+from typing import Annotated, Any, BinaryIO, Literal, cast
+from uuid import UUID
+
+from pydantic import BaseModel
+from pydantic_core import from_json
+
+from nbr_5410_calculator.installation.circuit import AnyCircuit, BaseCircuit, UpstreamCircuit
+from nbr_5410_calculator.installation.conduitRun import ConduitRun
+from nbr_5410_calculator.installation.project import Project
+from nbr_5410_calculator.installation.util import UniqueSerializable
+
+
+
+class ProjectFile( BaseModel ):
+	'''
+	Top-level object of version 2 project files.
+	'''
+	
+	version: Literal[2] = 2
+	project: Project
+
+
+
+class ProjectHeader( BaseModel ):
+	'''
+	First line of version 3 project files. Circuits and conduit runs are stored in records.
+	'''
+	
+	version: Literal[3] = 3
+	project: Project
+
+
+
+class CircuitRecord( BaseModel ):
+	'''
+	Circuit in version 3 project files. Downstream circuits are stored in their own records, after
+	`upstreamCircuit`.
+	'''
+	
+	circuit: Annotated[BaseCircuit, AnyCircuit]
+	upstreamCircuit: UUID | None = None
+
+
+
+class ConduitRunRecord( BaseModel ):
+	'''
+	Conduit run in version 3 project files, after all its circuits.
+	'''
+	
+	conduitRun: ConduitRun
+
+
+
+class ProjectWriter:
+	'''
+	Write project to a version 3 project file, one record at a time.
+	'''
+	
+	def __init__( self, file: BinaryIO ) -> None:
+		super().__init__()
+		
+		self.file = file
+		self.context: dict[str, Any] = { 'references': set() }
+	
+	
+	def _write( self, record: BaseModel, exclude: dict[str, Any] ) -> None:
+		'''
+		Write `record` as a single line.
+		'''
+		
+		self.file.write( record.model_dump_json( context = self.context, exclude = exclude ).encode() )
+		self.file.write( b'\n' )
+	
+	
+	def writeHeader( self, project: Project ) -> None:
+		'''
+		Write `project`'s header, without circuits or conduit runs. Must be called first.
+		'''
+		
+		self.context['references'].update(
+			item.uuid for item in ( *project.supplies, *project.loadTypes, *project.wireTypes )
+		)
+		
+		self._write( ProjectHeader( project = project ), { 'project': { 'circuits', 'conduitRuns' } } )
+	
+	
+	def writeCircuit( self, circuit: BaseCircuit ) -> None:
+		'''
+		Write `circuit`, without downstream circuits.
+		'''
+		
+		upstreamCircuit = circuit.upstreamCircuit.uuid if circuit.upstreamCircuit else None
+		
+		self._write(
+			CircuitRecord( circuit = circuit, upstreamCircuit = upstreamCircuit ),
+			{ 'circuit': { 'circuits' } },
+		)
+		self.context['references'].add( circuit.uuid )
+	
+	
+	def writeConduitRun( self, conduitRun: ConduitRun ) -> None:
+		'''
+		Write `conduitRun`, with references to its circuits.
+		'''
+		
+		self._write( ConduitRunRecord( conduitRun = conduitRun ), {} )
+	
+	
+	def writeProject( self, project: Project ) -> None:
+		'''
+		Write header and all records of `project`.
+		'''
+		
+		self.writeHeader( project )
+		
+		for circuit in project.iterCircuits():
+			self.writeCircuit( circuit )
+		
+		for conduitRun in project.conduitRuns:
+			self.writeConduitRun( conduitRun )
+
+
+
+def dumpProject( project: Project ) -> bytes:
+	'''
+	Serialize `project` in the latest file format.
+	'''
+	
+	context = _dumpContext( project )
+	
+	return ProjectFile( project = project ).model_dump_json( context = context ).encode()
+
+
+def dumpProjectIncrementally( project: Project ) -> Iterator[bytes]:
+	'''
+	Serialize `project` as a version 3 project file, same as `ProjectWriter.writeProject()`.
+	
+	Yield the header, each top-level circuit with its downstream circuits and each conduit run in
+	separate chunks, so other threads can run between them.
+	'''
+	
+	buffer = BytesIO()
+	writer = ProjectWriter( buffer )
+	
+	def chunk() -> bytes:
+		data = buffer.getvalue()
+		buffer.seek( 0 )
+		buffer.truncate()
+		
+		return data
+	
+	writer.writeHeader( project )
+	yield chunk()
+	
+	for circuit in project.circuits:
+		for downstreamCircuit in project.iterCircuits( [ circuit ] ):
+			writer.writeCircuit( downstreamCircuit )
+		
+		yield chunk()
+	
+	for conduitRun in project.conduitRuns:
+		writer.writeConduitRun( conduitRun )
+		yield chunk()
+
+
+def _dumpContext( project: Project ) -> dict[str, Any]:
+	'''
+	Serialization context for version 2 project files.
+	'''
+	
+	# Items in these lists are serialized in full before any reference to them.
+	return {
+		'references': {
+			item.uuid for item in ( *project.supplies, *project.loadTypes, *project.wireTypes )
+		},
+	}
+
+
+def loadProject( data: bytes ) -> Project:
+	'''
+	Deserialize project file in any version.
+	
+	Items are shared with instances in the current session, see `UniqueSerializable.session()`.
+	'''
+	
+	fileData, streamed = _parseFile( data )
+	
+	if streamed:
+		*_, project = readProject( data.splitlines() )
+		return project
+	
+	if isinstance( fileData, dict ) and 'version' in fileData:
+		return ProjectFile.model_validate( fileData, context = { 'references': True } ).project
+	
+	return Project.model_validate( fileData )
+
+
+def loadProjectIncrementally( data: bytes ) -> Generator[tuple[Project, float], None, None]:
+	'''
+	Same as `loadProject()`, one top-level circuit or conduit run at a time, so other threads can run
+	between them.
+	
+	Yield the project with all items loaded so far, always the same instance, and the fraction of
+	items loaded.
+	'''
+	
+	fileData, streamed = _parseFile( data )
+	
+	if streamed:
+		lines = data.splitlines()
+		
+		for line, project in enumerate( readProject( lines ), 1 ):
+			yield project, line / len( lines )
+		
+		return
+	
+	context: dict[str, Any] | None = None
+	projectData: Any = fileData
+	
+	if isinstance( fileData, dict ) and 'version' in fileData:
+		context = { 'references': True }
+		projectData = cast( dict[str, Any], fileData ).get( 'project' )
+	
+	if not isinstance( projectData, dict ):
+		raise ValueError( 'Invalid project file.' )
+	
+	projectData = cast( dict[str, Any], projectData )
+	circuitsData: list[Any] = projectData.pop( 'circuits', [] )
+	conduitRunsData: list[Any] = projectData.pop( 'conduitRuns', [] )
+	total = 1 + len( circuitsData ) + len( conduitRunsData )
+	
+	if context:
+		linked = _LinkedItems( ProjectFile.model_validate( fileData, context = context ).project )
+	else:
+		linked = _LinkedItems( Project.model_validate( projectData ) )
+	
+	yield linked.project, 1 / total
+	
+	for loaded, circuitData in enumerate( circuitsData, 2 ):
+		linked.addCircuit( BaseCircuit.model_validate( circuitData, context = context ), None )
+		
+		yield linked.project, loaded / total
+	
+	for loaded, conduitRunData in enumerate( conduitRunsData, 2 + len( circuitsData ) ):
+		linked.addConduitRun( ConduitRun.model_validate( conduitRunData, context = context ) )
+		
+		yield linked.project, loaded / total
+
+
+def readProject( lines: Iterable[bytes] ) -> Generator[Project, None, None]:
+	'''
+	Deserialize version 3 project file incrementally.
+	
+	Yield the project after the header and after each record, always the same instance with all
+	records read so far. `lines` can be a file opened in binary mode, whose position can be used to
+	report progress.
+	'''
+	
+	context = { 'references': True }
+	linked: _LinkedItems | None = None
+	
+	for line in lines:
+		if not line.strip():
+			continue
+		
+		if linked is None:
+			linked = _LinkedItems( ProjectHeader.model_validate_json( line, context = context ).project )
+			yield linked.project
+			continue
+		
+		record = from_json( line )
+		
+		if isinstance( record, dict ) and 'conduitRun' in record:
+			linked.addConduitRun( ConduitRunRecord.model_validate( record, context = context ).conduitRun )
+		else:
+			circuitRecord = CircuitRecord.model_validate( record, context = context )
+			upstreamCircuit = None
+			
+			if circuitRecord.upstreamCircuit is not None:
+				upstreamCircuit = UniqueSerializable.getInstance( circuitRecord.upstreamCircuit )
+				
+				if not isinstance( upstreamCircuit, UpstreamCircuit ):
+					raise ValueError(
+						f'`{circuitRecord.upstreamCircuit}` is not a reference to an `UpstreamCircuit`.'
+					)
+			
+			linked.addCircuit( circuitRecord.circuit, upstreamCircuit )
+		
+		yield linked.project
+	
+	if linked is None:
+		raise ValueError( 'Missing project file header.' )
+
+
+
+class _LinkedItems:
+	'''
+	Add loaded items to `project`, updating back-references.
+	
+	Loading a project that is already open returns the same instances, so items already in `project`
+	aren't added again.
+	'''
+	
+	def __init__( self, project: Project ) -> None:
+		super().__init__()
+		
+		self.project = project
+		self.linkedCircuits = set( project.iterCircuits() )
+		self.linkedConduitRuns = set( project.conduitRuns )
+	
+	
+	def addCircuit( self, circuit: BaseCircuit, upstreamCircuit: UpstreamCircuit | None ) -> None:
+		'''
+		Add `circuit` and its downstream circuits to `upstreamCircuit`, or at the top level if `None`.
+		'''
+		
+		for downstreamCircuit in self.project.iterCircuits( [ circuit ] ):
+			downstreamCircuit.project = self.project
+		
+		if circuit in self.linkedCircuits:
+			return
+		
+		if upstreamCircuit is None:
+			self.project.circuits.append( circuit )
+		else:
+			upstreamCircuit.insertChild( len( upstreamCircuit.circuits ), circuit )
+	
+	
+	def addConduitRun( self, conduitRun: ConduitRun ) -> None:
+		'''
+		Add `conduitRun`, updating back-references in its circuits.
+		'''
+		
+		for circuit in conduitRun.circuits:
+			circuit.conduitRun = conduitRun
+		
+		if conduitRun not in self.linkedConduitRuns:
+			self.project.conduitRuns.append( conduitRun )
+
+
+def _parseFile( data: bytes ) -> tuple[Any, bool]:
+	'''
+	Parse project file and whether it's in version 3, detected by the `version` of its first line.
+	
+	Only the first line of version 3 files is parsed, since records are validated by `readProject()`.
+	'''
+	
+	header, _, records = data.partition( b'\n' )
+	
+	try:
+		headerData: Any = from_json( header )
+	except ValueError:
+		# Older files can span multiple lines.
+		return from_json( data ), False
+	
+	streamed = _isHeader( headerData )
+	
+	# Don't parse single line files twice.
+	if streamed or not records.strip():
+		return headerData, streamed
+	
+	return from_json( data ), False
+
+
+def _isHeader( data: Any ) -> bool:
+	'''
+	Whether parsed `data` is the header of a version 3 project file.
+	'''
+	
+	return isinstance( data, dict ) and cast( dict[str, Any], data ).get( 'version' ) == 3
\ No newline at end of file
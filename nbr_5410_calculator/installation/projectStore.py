@@ -0,0 +1,460 @@
+'''
+Storage of projects in SQLite databases, for projects too large to keep in a single file.
+
+Each item is stored in its own row, serialized as in version 2 project files, with references by
+UUID to items in other rows, see `UniqueSerializable`. Columns used for loading and queries, like
+a circuit's upstream circuit and conduit run, are stored separately and indexed. This allows
+loading a single circuit with its downstream circuits, and querying cached sizing results, without
+loading the whole project.
+'''
+
+import sqlite3
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from os import PathLike
+from typing import Any, Self
+from uuid import UUID
+
+from numpy.typing import NDArray
+from pydantic_core import from_json
+
+from nbr_5410_calculator.installation.circuit import (
+	BaseCircuit,
+	LoadType,
+	Supply,
+	UpstreamCircuit,
+	WireType,
+)
+from nbr_5410_calculator.installation.conduitRun import ConduitRun
+from nbr_5410_calculator.installation.project import Project
+from nbr_5410_calculator.installation.sizing import SizingResults
+from nbr_5410_calculator.installation.util import UniqueSerializable
+
+
+
+type CatalogItem = Supply | LoadType | WireType
+
+_catalogs: dict[str, type[CatalogItem]] = {
+	'supplies': Supply,
+	'loadTypes': LoadType,
+	'wireTypes': WireType,
+}
+
+_SCHEMA = '''
+	CREATE TABLE IF NOT EXISTS project (
+		uuid TEXT PRIMARY KEY,
+		data TEXT NOT NULL
+	);
+	
+	-- Items not listed in the project, but referenced by circuits, have no position.
+	CREATE TABLE IF NOT EXISTS supplies (
+		uuid TEXT PRIMARY KEY,
+		position INTEGER,
+		data TEXT NOT NULL
+	);
+	
+	CREATE TABLE IF NOT EXISTS loadTypes (
+		uuid TEXT PRIMARY KEY,
+		position INTEGER,
+		data TEXT NOT NULL
+	);
+	
+	CREATE TABLE IF NOT EXISTS wireTypes (
+		uuid TEXT PRIMARY KEY,
+		position INTEGER,
+		data TEXT NOT NULL
+	);
+	
+	CREATE TABLE IF NOT EXISTS circuits (
+		uuid TEXT PRIMARY KEY,
+		name TEXT NOT NULL,
+		upstreamCircuit TEXT REFERENCES circuits( uuid ),
+		position INTEGER NOT NULL,
+		conduitRun TEXT REFERENCES conduitRuns( uuid ),
+		conduitRunPosition INTEGER,
+		supply TEXT NOT NULL REFERENCES supplies( uuid ),
+		loadType TEXT NOT NULL REFERENCES loadTypes( uuid ),
+		wireType TEXT NOT NULL REFERENCES wireTypes( uuid ),
+		data TEXT NOT NULL
+	);
+	
+	CREATE INDEX IF NOT EXISTS circuitsByUpstreamCircuit ON circuits ( upstreamCircuit, position );
+	CREATE INDEX IF NOT EXISTS circuitsByConduitRun ON circuits ( conduitRun, conduitRunPosition );
+	
+	CREATE TABLE IF NOT EXISTS conduitRuns (
+		uuid TEXT PRIMARY KEY,
+		position INTEGER NOT NULL,
+		data TEXT NOT NULL
+	);
+	
+	-- Invalid results have `NULL` breaker and wire values.
+	CREATE TABLE IF NOT EXISTS results (
+		circuit TEXT PRIMARY KEY REFERENCES circuits( uuid ) ON DELETE CASCADE,
+		current REAL NOT NULL,
+		breaker INTEGER,
+		section REAL,
+		capacity REAL,
+		voltageDrop REAL,
+		valid INTEGER NOT NULL
+	);
+	
+	CREATE INDEX IF NOT EXISTS resultsByVoltageDrop ON results ( voltageDrop );
+'''
+
+
+
+@dataclass( frozen = True )
+class CircuitResult:
+	'''
+	Cached sizing result of a single circuit, see `ProjectStore.queryResults()`.
+	'''
+	
+	uuid: UUID
+	name: str
+	upstreamCircuit: UUID | None
+	current: float
+	breaker: int | None
+	section: float | None
+	capacity: float | None
+	voltageDrop: float | None
+	valid: bool
+
+
+
+class ProjectStore:
+	'''
+	Project stored in an SQLite database, created if it doesn't exist.
+	
+	Loaded items are shared with instances in the current session, see
+	`UniqueSerializable.session()`.
+	'''
+	
+	def __init__( self, path: str | PathLike[str] ) -> None:
+		super().__init__()
+		
+		self.connection = sqlite3.connect( path )
+		self.connection.execute( 'PRAGMA foreign_keys = ON' )
+		self.connection.executescript( _SCHEMA )
+	
+	
+	def __enter__( self ) -> Self:
+		return self
+	
+	
+	def __exit__( self, *args: object ) -> None:
+		self.close()
+	
+	
+	def close( self ) -> None:
+		'''
+		Close database connection.
+		'''
+		
+		self.connection.close()
+	
+	
+	def saveProject( self, project: Project ) -> None:
+		'''
+		Replace stored project with `project`, discarding cached results.
+		'''
+		
+		catalogItems: dict[str, dict[UUID, tuple[int | None, CatalogItem]]] = {
+			table: { item.uuid: ( position, item ) for position, item in enumerate( items ) }
+			for table, items in (
+				( 'supplies', project.supplies ),
+				( 'loadTypes', project.loadTypes ),
+				( 'wireTypes', project.wireTypes ),
+			)
+		}
+		
+		for circuit in project.iterCircuits():
+			catalogItems['supplies'].setdefault( circuit.supply.uuid, ( None, circuit.supply ) )
+			catalogItems['loadTypes'].setdefault( circuit.loadType.uuid, ( None, circuit.loadType ) )
+			catalogItems['wireTypes'].setdefault( circuit.wireType.uuid, ( None, circuit.wireType ) )
+		
+		references = { uuid for items in catalogItems.values() for uuid in items }
+		conduitRunPositions = {
+			circuit.uuid: ( conduitRun, position )
+			for conduitRun in project.conduitRuns
+			for position, circuit in enumerate( conduitRun.circuits )
+		}
+		
+		# Items in other rows are always references.
+		context = { 'references': references }
+		
+		def dump( item: UniqueSerializable, exclude: set[str] ) -> str:
+			return item.model_dump_json( context = context, exclude = exclude )
+		
+		def circuitRows(
+			circuits: Iterable[BaseCircuit],
+			upstreamCircuit: UpstreamCircuit | None,
+		) -> Iterator[tuple[Any, ...]]:
+			for position, circuit in enumerate( circuits ):
+				conduitRun, conduitRunPosition = conduitRunPositions.get( circuit.uuid, ( None, None ) )
+				
+				yield (
+					str( circuit.uuid ),
+					circuit.name,
+					str( upstreamCircuit.uuid ) if upstreamCircuit else None,
+					position,
+					str( conduitRun.uuid ) if conduitRun else None,
+					conduitRunPosition,
+					str( circuit.supply.uuid ),
+					str( circuit.loadType.uuid ),
+					str( circuit.wireType.uuid ),
+					dump( circuit, { 'circuits' } ),
+				)
+				
+				if isinstance( circuit, UpstreamCircuit ):
+					yield from circuitRows( circuit.circuits, circuit )
+		
+		with self.connection:
+			for table in ( 'results', 'circuits', 'conduitRuns', *_catalogs, 'project' ):
+				self.connection.execute( f'DELETE FROM {table}' )
+			
+			self.connection.execute(
+				'INSERT INTO project VALUES ( ?, ? )',
+				(
+					str( project.uuid ),
+					dump( project, { 'supplies', 'loadTypes', 'wireTypes', 'circuits', 'conduitRuns' } ),
+				),
+			)
+			
+			for table, items in catalogItems.items():
+				self.connection.executemany(
+					f'INSERT INTO {table} VALUES ( ?, ?, ? )',
+					(
+						( str( uuid ), position, item.model_dump_json() )
+						for uuid, ( position, item ) in items.items()
+					),
+				)
+			
+			self.connection.executemany(
+				'INSERT INTO conduitRuns VALUES ( ?, ?, ? )',
+				(
+					( str( conduitRun.uuid ), position, dump( conduitRun, { 'circuits' } ) )
+					for position, conduitRun in enumerate( project.conduitRuns )
+				),
+			)
+			self.connection.executemany(
+				'INSERT INTO circuits VALUES ( ?, ?, ?, ?, ?, ?, ?, ?, ?, ? )',
+				circuitRows( project.circuits, None ),
+			)
+	
+	
+	def loadProject( self ) -> Project:
+		'''
+		Load the whole stored project.
+		'''
+		
+		if ( projectRow := self.connection.execute( 'SELECT data FROM project' ).fetchone() ) is None:
+			raise ValueError( 'No project stored.' )
+		
+		catalogItems = self._loadCatalogs()
+		rootCircuits, circuits = self._loadCircuits( self.connection.execute(
+			'SELECT uuid, upstreamCircuit, data FROM circuits ORDER BY position'
+		) )
+		
+		conduitRuns: list[ConduitRun] = []
+		conduitRunRows = self.connection.execute( 'SELECT uuid, data FROM conduitRuns ORDER BY position' )
+		
+		for uuid, data in conduitRunRows.fetchall():
+			circuitUuids = self.connection.execute(
+				'SELECT uuid FROM circuits WHERE conduitRun = ? ORDER BY conduitRunPosition',
+				( uuid, ),
+			)
+			conduitRuns.append( ConduitRun.model_validate( {
+				**from_json( data ),
+				'circuits': [ circuits[circuitUuid] for circuitUuid, in circuitUuids ],
+			} ) )
+		
+		return Project.model_validate(
+			{
+				**from_json( projectRow[0] ),
+				**{
+					table: [ item for position, item in items if position is not None ]
+					for table, items in catalogItems.items()
+				},
+				'circuits': rootCircuits,
+				'conduitRuns': conduitRuns,
+			},
+			context = { 'references': True },
+		)
+	
+	
+	def loadCircuit( self, uuid: UUID ) -> BaseCircuit:
+		'''
+		Load a single circuit with all its downstream circuits, e.g. a distribution board.
+		
+		Conduit runs aren't loaded, use `queryResults()` for sizing results consistent with the whole
+		project.
+		'''
+		
+		# Keep catalog items alive until circuits referencing them are loaded, see `_loadCatalogs()`.
+		catalogItems = self._loadCatalogs()
+		rootCircuits, _ = self._loadCircuits( self.connection.execute(
+			'''
+				WITH RECURSIVE subtree ( uuid ) AS (
+					SELECT ?
+					UNION ALL
+					SELECT circuits.uuid FROM circuits
+					JOIN subtree ON circuits.upstreamCircuit = subtree.uuid
+				)
+				SELECT uuid, CASE WHEN uuid = ? THEN NULL ELSE upstreamCircuit END, data FROM circuits
+				WHERE uuid IN subtree
+				ORDER BY position
+			''',
+			( str( uuid ), str( uuid ) ),
+		) )
+		del catalogItems
+		
+		if not rootCircuits:
+			raise ValueError( f'Circuit `{uuid}` not found.' )
+		
+		return rootCircuits[0]
+	
+	
+	def _loadCatalogs( self ) -> dict[str, list[tuple[int | None, CatalogItem]]]:
+		'''
+		Load all supplies, load types and wire types, with their positions in the project, so they can
+		be referenced by other items. References only resolve while the returned items are alive.
+		'''
+		
+		return {
+			table: [
+				( position, model.model_validate_json( data ) )
+				for position, data in self.connection.execute(
+					f'SELECT position, data FROM {table} ORDER BY position'
+				)
+			]
+			for table, model in _catalogs.items()
+		}
+	
+	
+	@staticmethod
+	def _loadCircuits(
+		rows: Iterable[tuple[str, str | None, str]],
+	) -> tuple[list[BaseCircuit], dict[str, BaseCircuit]]:
+		'''
+		Load circuits from `( uuid, upstreamCircuit, data )` rows, sorted by position, and link them to
+		their upstream circuits. Return circuits without upstream circuit and all circuits by UUID.
+		
+		Circuits already alive in the current session are returned as is, already linked.
+		'''
+		
+		context = { 'references': True }
+		circuits: dict[str, BaseCircuit] = {}
+		downstreamCircuits: dict[str | None, list[BaseCircuit]] = {}
+		
+		for uuid, upstreamCircuit, data in rows:
+			circuits[uuid] = BaseCircuit.model_validate( from_json( data ), context = context )
+			downstreamCircuits.setdefault( upstreamCircuit, [] ).append( circuits[uuid] )
+		
+		for upstreamCircuit, children in downstreamCircuits.items():
+			if upstreamCircuit is None:
+				continue
+			
+			parent = circuits[upstreamCircuit]
+			
+			if not isinstance( parent, UpstreamCircuit ):
+				raise ValueError( f'`{upstreamCircuit}` is not a reference to an `UpstreamCircuit`.' )
+			
+			for circuit in children:
+				if circuit.upstreamCircuit is not parent:
+					parent.insertChild( len( parent.circuits ), circuit )
+		
+		return downstreamCircuits.get( None, [] ), circuits
+	
+	
+	def saveResults( self, results: SizingResults ) -> None:
+		'''
+		Cache sizing `results`, replacing previous results of the same circuits.
+		'''
+		
+		def value( array: NDArray[Any], row: int ) -> Any:
+			return array[row].item() if results.valid[row] else None
+		
+		with self.connection:
+			self.connection.executemany(
+				'INSERT OR REPLACE INTO results VALUES ( ?, ?, ?, ?, ?, ?, ? )',
+				(
+					(
+						str( circuit.uuid ),
+						results.current[row].item(),
+						value( results.breaker, row ),
+						value( results.section, row ),
+						value( results.capacity, row ),
+						value( results.voltageDrop, row ),
+						bool( results.valid[row] ),
+					)
+					for row, circuit in enumerate( results.circuits )
+				),
+			)
+	
+	
+	def queryResults(
+		self,
+		*,
+		voltageDropAbove: float | None = None,
+		upstreamCircuit: UUID | None = None,
+		valid: bool | None = None,
+	) -> list[CircuitResult]:
+		'''
+		Cached sizing results of circuits matching all given filters.
+		'''
+		
+		conditions = [ 'TRUE' ]
+		parameters: list[Any] = []
+		
+		if voltageDropAbove is not None:
+			conditions.append( 'results.voltageDrop > ?' )
+			parameters.append( voltageDropAbove )
+		
+		if upstreamCircuit is not None:
+			conditions.append( 'circuits.upstreamCircuit = ?' )
+			parameters.append( str( upstreamCircuit ) )
+		
+		if valid is not None:
+			conditions.append( 'results.valid = ?' )
+			parameters.append( valid )
+		
+		rows = self.connection.execute(
+			f'''
+				SELECT
+					circuits.uuid,
+					circuits.name,
+					circuits.upstreamCircuit,
+					results.current,
+					results.breaker,
+					results.section,
+					results.capacity,
+					results.voltageDrop,
+					results.valid
+				FROM results JOIN circuits ON results.circuit = circuits.uuid
+				WHERE {' AND '.join( conditions )}
+			''',
+			parameters,
+		)
+		
+		return [
+			CircuitResult(
+				uuid = UUID( uuid ),
+				name = name,
+				upstreamCircuit = UUID( upstreamCircuit ) if upstreamCircuit else None,
+				current = current,
+				breaker = breaker,
+				section = section,
+				capacity = capacity,
+				voltageDrop = voltageDrop,
+				valid = bool( valid ),
+			)
+			for uuid, name, upstreamCircuit, current, breaker, section, capacity, voltageDrop, valid in rows
+		]
+	
+	
+	def circuitsWithVoltageDropAbove( self, limit: float ) -> list[CircuitResult]:
+		'''
+		Cached sizing results of circuits with voltage drop greater than `limit`.
+		'''
+		
+		return self.queryResults( voltageDropAbove = limit )
\ No newline at end of file
@@ -0,0 +1,298 @@
+'''
+Vectorized sizing of all circuits in a `Project`.
+'''
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, fields
+
+import numpy as np
+from numpy.typing import NDArray
+
+from nbr_5410_calculator.installation.circuit import (
+	BaseCircuit,
+	Breaker,
+	BreakerCurve,
+	VoltageDropLimit,
+	WireTable,
+	WireType,
+)
+from nbr_5410_calculator.installation.conduitRun import ReferenceMethod
+from nbr_5410_calculator.installation.project import Project
+
+
+
+@dataclass( frozen = True )
+class SizingResults:
+	'''
+	Sizing results for a list of circuits, as arrays in the same order as `circuits`.
+	
+	Results for circuits without a suitable breaker or wire are marked as not `valid`, with `NaN`
+	for wire values and `0` for breaker current.
+	'''
+	
+	circuits: list[BaseCircuit]
+	current: NDArray[np.float64]
+	breaker: NDArray[np.int64]
+	section: NDArray[np.float64]
+	capacity: NDArray[np.float64]
+	voltageDrop: NDArray[np.float64]
+	valid: NDArray[np.bool_]
+
+
+
+@dataclass( frozen = True )
+class SizingInputs:
+	'''
+	Inputs of `sizeInputs()` for a list of circuits, as arrays in the same order as `circuits`.
+	
+	Gathered from the circuits by `gatherInputs()`, so sizing doesn't read the circuits themselves
+	and can run in another thread while they're edited.
+	'''
+	
+	circuits: list[BaseCircuit]
+	power: NDArray[np.float64]
+	voltage: NDArray[np.float64]
+	phases: NDArray[np.float64]
+	length: NDArray[np.float64]
+	minimumSection: NDArray[np.float64]
+	correctionFactor: NDArray[np.float64]
+	wireTypes: list[WireType]
+	rowsByCurve: dict[BreakerCurve, list[int]]
+	rowsByTable: dict[WireTable, list[int]]
+
+
+
+@dataclass( frozen = True )
+class _WireInputs:
+	'''
+	Inputs of `_selectWires()`, one element per circuit.
+	'''
+	
+	current: NDArray[np.float64]
+	breaker: NDArray[np.int64]
+	length: NDArray[np.float64]
+	voltage: NDArray[np.float64]
+	minimumSection: NDArray[np.float64]
+	correctionFactor: NDArray[np.float64]
+	
+	
+	def take( self, rows: NDArray[np.intp] ) -> _WireInputs:
+		'''
+		Inputs of circuits in `rows` only.
+		'''
+		
+		return _WireInputs( **{
+			field.name: getattr( self, field.name )[rows] for field in fields( self )
+		} )
+
+
+
+def sizeCircuits(
+	project: Project,
+	circuits: Iterable[BaseCircuit] | None = None,
+) -> SizingResults:
+	'''
+	Calculate current, breaker and wire for all circuits in `project`, or only for `circuits`.
+	
+	Equivalent to reading `BaseCircuit.current`, `breaker`, `wire` and `voltageDrop` for each
+	circuit, but circuits sharing the same `WireTable` are sized together with array operations.
+	'''
+	
+	return sizeInputs( gatherInputs( project.iterCircuits() if circuits is None else circuits ) )
+
+
+
+def gatherInputs( circuits: Iterable[BaseCircuit] ) -> SizingInputs:
+	'''
+	Read inputs of `sizeInputs()` from `circuits`.
+	'''
+	
+	circuits = list( circuits )
+	count = len( circuits )
+	
+	power = np.empty( count )
+	voltage = np.empty( count )
+	phases = np.empty( count )
+	length = np.empty( count )
+	minimumSection = np.empty( count )
+	correctionFactor = np.ones( count )
+	wireTypes: list[WireType] = []
+	rowsByCurve: defaultdict[BreakerCurve, list[int]] = defaultdict( list )
+	rowsByTable: defaultdict[WireTable, list[int]] = defaultdict( list )
+	
+	for row, circuit in enumerate( circuits ):
+		power[row] = circuit.power
+		voltage[row] = circuit.supply.voltage
+		phases[row] = circuit.supply.phases
+		length[row] = circuit.length
+		minimumSection[row] = circuit.loadType.minimumWireSection
+		wireTypes.append( circuit.wireType )
+		rowsByCurve[circuit.breakerCurve].append( row )
+		
+		referenceMethod = ReferenceMethod.A1
+		if circuit.conduitRun:
+			referenceMethod = circuit.conduitRun.referenceMethod
+			correctionFactor[row] = circuit.conduitRun.correctionFactor
+		
+		wireTable = circuit.wireType.getWireTable( referenceMethod, circuit.supply.loadedWireCount )
+		rowsByTable[wireTable].append( row )
+	
+	return SizingInputs(
+		circuits = circuits,
+		power = power,
+		voltage = voltage,
+		phases = phases,
+		length = length,
+		minimumSection = minimumSection,
+		correctionFactor = correctionFactor,
+		wireTypes = wireTypes,
+		rowsByCurve = dict( rowsByCurve ),
+		rowsByTable = dict( rowsByTable ),
+	)
+
+
+
+def sizeInputs( inputs: SizingInputs ) -> SizingResults:
+	'''
+	Calculate results of `sizeCircuits()` from inputs gathered by `gatherInputs()`.
+	'''
+	
+	# Current. Circuits without voltage have no current, and are invalid.
+	with np.errstate( divide = 'ignore', invalid = 'ignore' ):
+		current = inputs.power / inputs.voltage / inputs.phases
+	
+	valid = np.isfinite( current )
+	breaker = _selectBreakers( inputs.rowsByCurve, current, valid )
+	wires = _WireInputs(
+		current = current,
+		breaker = breaker,
+		length = inputs.length,
+		voltage = inputs.voltage,
+		minimumSection = inputs.minimumSection,
+		correctionFactor = inputs.correctionFactor,
+	)
+	section, capacity, voltageDrop = _sizeWires( inputs.rowsByTable, wires, valid )
+	
+	return SizingResults(
+		circuits = inputs.circuits,
+		current = current,
+		breaker = breaker,
+		section = section,
+		capacity = capacity,
+		voltageDrop = voltageDrop,
+		valid = valid,
+	)
+
+
+
+def _selectBreakers(
+	rowsByCurve: dict[BreakerCurve, list[int]],
+	current: NDArray[np.float64],
+	valid: NDArray[np.bool_],
+) -> NDArray[np.int64]:
+	'''
+	Breaker current for each circuit, marking circuits without a suitable breaker as not `valid`.
+	'''
+	
+	breaker = np.zeros( len( current ), np.int64 )
+	for curve, curveRows in rowsByCurve.items():
+		rows = np.array( curveRows, np.intp )
+		currents = np.array( Breaker.getCurrents( curve ), np.int64 )
+		indexes = np.searchsorted( currents, current[rows] )
+		found = indexes < len( currents )
+		
+		breaker[rows[found]] = currents[indexes[found]]
+		valid[rows[~found]] = False
+	
+	return breaker
+
+
+
+def _sizeWires(
+	rowsByTable: dict[WireTable, list[int]],
+	wires: _WireInputs,
+	valid: NDArray[np.bool_],
+) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+	'''
+	Section, capacity and voltage drop of the wire of each `valid` circuit, marking circuits without
+	a suitable wire as not `valid`.
+	'''
+	
+	count = len( valid )
+	section = np.full( count, np.nan )
+	capacity = np.full( count, np.nan )
+	voltageDrop = np.full( count, np.nan )
+	for wireTable, tableRows in rowsByTable.items():
+		rows = np.array( tableRows, np.intp )
+		
+		# No sizes available, e.g. wire type without diameters.
+		if len( wireTable ) == 0:
+			valid[rows] = False
+			continue
+		
+		rows = rows[valid[rows]]
+		indexes, found = _selectWires( wireTable, wires.take( rows ) )
+		valid[rows] = found
+		rows, indexes = rows[found], indexes[found]
+		
+		section[rows] = np.array( wireTable.sections )[indexes]
+		capacity[rows] = np.array( wireTable.uncorrectedCapacities )[indexes] \
+			* wires.correctionFactor[rows]
+		voltageDrop[rows] = wires.current[rows] \
+			* ( np.array( wireTable.resistancesPerMeter )[indexes] * wires.length[rows] * 2 ) \
+			/ wires.voltage[rows]
+	
+	return section, capacity, voltageDrop
+
+
+
+def _selectWires(
+	wireTable: WireTable,
+	wires: _WireInputs,
+) -> tuple[NDArray[np.intp], NDArray[np.bool_]]:
+	'''
+	Vectorized equivalent of `BaseCircuit._selectWire()` for circuits sharing `wireTable`.
+	
+	Return index of selected size and whether all criteria were met, for each circuit.
+	'''
+	
+	size = len( wireTable )
+	uncorrectedCapacities = np.array( wireTable.uncorrectedCapacities )
+	capacityOrder = np.array( wireTable.capacityOrder, np.intp )
+	smallestCapacityFrom = np.array( wireTable.smallestCapacityFrom + ( 0, ), np.intp )
+	correctionFactor = wires.correctionFactor[:, np.newaxis]
+	
+	# Capacities sorted in `capacityOrder`, one row per circuit.
+	sortedCapacities = uncorrectedCapacities[capacityOrder] * correctionFactor
+	
+	def indexByCapacity( minimumCapacity: NDArray[np.float64] ) -> NDArray[np.intp]:
+		position = np.sum( sortedCapacities < minimumCapacity[:, np.newaxis], axis = 1 )
+		
+		return np.where( position < size, capacityOrder[np.minimum( position, size - 1 )], size )
+	
+	def indexFrom( firstIndex: NDArray[np.intp] ) -> NDArray[np.intp]:
+		return np.where( firstIndex < size, smallestCapacityFrom[firstIndex], size )
+	
+	# Voltage drop for each size, one row per circuit.
+	voltageDrops = wires.current[:, np.newaxis] \
+		* ( np.array( wireTable.resistancesPerMeter ) * wires.length[:, np.newaxis] * 2 ) \
+		/ wires.voltage[:, np.newaxis]
+	
+	indexByCriteria = np.stack( [
+		indexFrom( np.searchsorted( np.array( wireTable.sections ), wires.minimumSection ) ),
+		indexByCapacity( wires.current ),
+		indexFrom( np.sum( voltageDrops > VoltageDropLimit.TERMINAL, axis = 1 ) ),
+		indexByCapacity( wires.breaker.astype( np.float64 ) ),
+	], axis = 1 )
+	
+	found = np.all( indexByCriteria < size, axis = 1 )
+	indexByCriteria[~found] = 0
+	
+	# Select wire with largest section.
+	capacities = uncorrectedCapacities[indexByCriteria] * correctionFactor
+	selected = np.argmax( capacities, axis = 1 )
+	
+	return indexByCriteria[np.arange( len( indexByCriteria ) ), selected], found
\ No newline at end of file
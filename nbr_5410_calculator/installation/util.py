@@ -2,8 +2,14 @@
 Base Pydantic model for all `Project` models.
 '''
 
-from typing import Annotated, Any, ClassVar, Self
+from __future__ import annotations
+
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Annotated, Any, Self, cast, override
 from uuid import UUID, uuid4
+from weakref import WeakValueDictionary
 
 from pydantic import (
 	BaseModel,
@@ -11,14 +17,33 @@ from pydantic import (
 	Field,
 	model_validator,
 	PlainSerializer,
+	SerializationInfo,
+	SerializerFunctionWrapHandler,
+	ValidationInfo,
 	ValidatorFunctionWrapHandler,
+	WrapSerializer,
 )
 
 
 
+type InstanceRegistry = WeakValueDictionary[UUID, UniqueSerializable]
+
+# Registry used by `UniqueSerializable`, see `UniqueSerializable.session()` and `_registry()`.
+_instanceRegistry: ContextVar[InstanceRegistry] = ContextVar( 'instanceRegistry' )
+
+
+
 class UniqueSerializable( BaseModel ):
 	'''
 	Sub-class of `BaseModel` that reuses previously deserialized instances that share the same UUID.
+	
+	Instances are only reused while alive and within the same session.
+	
+	With `references` in the validation context, UUIDs are resolved to the instances previously
+	deserialized in the same session. See `Reference` for serialization.
+	
+	Instances are equal if they have the same UUID, so they can be compared and hashed without
+	reading their fields.
 	'''
 	
 	# Class variables.
@@ -29,8 +54,9 @@ class UniqueSerializable( BaseModel ):
 		validate_assignment = True,
 		# strict = True,	# TODO: Fix deserialization of StrEnum.
 		extra = 'forbid',
+		# Build validators and serializers on first use, see `benchmarks/importtime.py`.
+		defer_build = True,
 	)
-	__uuids__: ClassVar[dict[UUID, Self]] = {}
 	
 	# Fields.
 	uuid: Annotated[
@@ -46,26 +72,146 @@ class UniqueSerializable( BaseModel ):
 		cls,
 		data: Any | dict[str, Any],
 		handler: ValidatorFunctionWrapHandler,
+		info: ValidationInfo,
 	) -> Self:
 		'''
 		Reuse previously deserialized instances with the same UUID.
 		'''
 		
+		if isinstance( data, str ) and info.context and 'references' in info.context:
+			referenced = cls.getInstance( data )
+			
+			if not isinstance( referenced, cls ):
+				raise ValueError( f'`{data}` is not a reference to a `{cls.__name__}`.' )
+			
+			return referenced
+		
 		instance: Self = handler( data )
 		
-		if instance.uuid not in cls.__uuids__:
-			cls.__uuids__[instance.uuid] = instance
+		return cast( Self, _registry().setdefault( instance.uuid, instance ) )
+	
+	
+	@override
+	def __eq__( self, other: object ) -> bool:
+		'''
+		Whether `other` is the same item, i.e. has the same type and UUID. Fields aren't compared, see
+		`structurallyEqual()`.
+		'''
+		
+		if not isinstance( other, UniqueSerializable ):
+			return NotImplemented
 		
-		return cls.__uuids__[instance.uuid]
+		return self is other or ( type( self ) is type( other ) and self.uuid == other.uuid )
+	
+	
+	@override
+	def __hash__( self ) -> int:
+		# Don't change `uuid` while the instance is used as a key.
+		return hash( self.uuid )
+	
+	
+	def structurallyEqual( self, other: UniqueSerializable ) -> bool:
+		'''
+		Whether `other` has the same type and serializes to the same data, comparing all fields
+		recursively. Much slower than `==`.
+		'''
+		
+		return type( self ) is type( other ) and self.model_dump() == other.model_dump()
+	
+	
+	@classmethod
+	def getInstance( cls, uuid: UUID | str ) -> UniqueSerializable | None:
+		'''
+		Instance with `uuid` in the current session, if any.
+		'''
+		
+		try:
+			return _registry().get( uuid if isinstance( uuid, UUID ) else UUID( uuid ) )
+		except ValueError:
+			return None
+	
+	
+	@classmethod
+	@contextmanager
+	def session( cls ) -> Generator[InstanceRegistry, None, None]:
+		'''
+		Reuse instances only within this context, e.g. while loading a project.
+		
+		Instances outside the session aren't reused, and instances in the session are released when
+		no longer referenced.
+		'''
+		
+		token = _instanceRegistry.set( WeakValueDictionary() )
+		
+		try:
+			yield _instanceRegistry.get()
+		finally:
+			_instanceRegistry.reset( token )
+	
+	
+	@classmethod
+	def updateInstanceRegistry( cls, registry: InstanceRegistry ) -> None:
+		'''
+		Reuse instances from another session in the current one, e.g. after loading a project in
+		another thread.
+		'''
+		
+		_registry().update( registry )
 	
 	
 	@classmethod
 	def clearInstanceRegistry( cls ) -> None:
 		'''
-		Remove all instances from the registry..
+		Remove all instances from the registry of the current session.
 		'''
 		
-		cls.__uuids__.clear()
+		_registry().clear()
+
+
+
+def _registry() -> InstanceRegistry:
+	'''
+	Registry of the current context, created on first use.
+	
+	Each thread starts with its own context, so threads never share instances unless they're added
+	with `UniqueSerializable.updateInstanceRegistry()`.
+	'''
+	
+	try:
+		return _instanceRegistry.get()
+	except LookupError:
+		registry: InstanceRegistry = WeakValueDictionary()
+		_instanceRegistry.set( registry )
+		
+		return registry
+
+
+
+def _serializeReference(
+	instance: UniqueSerializable | None,
+	handler: SerializerFunctionWrapHandler,
+	info: SerializationInfo,
+) -> Any:
+	'''
+	Serialize `instance` as its UUID if it's in the `references` set of the serialization context.
+	Otherwise serialize it in full and add it to the set.
+	'''
+	
+	if instance is None or not info.context or 'references' not in info.context:
+		return handler( instance )
+	
+	references: set[UUID] = info.context['references']
+	
+	if instance.uuid in references:
+		return str( instance.uuid )
+	
+	references.add( instance.uuid )
+	
+	return handler( instance )
+
+
+# Annotation for fields referring to a `UniqueSerializable` defined elsewhere in the same document.
+Reference = WrapSerializer( _serializeReference )
 
 
 
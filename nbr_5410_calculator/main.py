@@ -1,22 +1,53 @@
 '''
-Qt application entry point.
+Application entry point.
 '''
 
 
 
 import sys
+from argparse import ArgumentParser
 
-from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import QTranslator, QLibraryInfo, QLocale
-
-from nbr_5410_calculator.ui import MainWindow
+from nbr_5410_calculator import batch
 
 
 
 def main() -> None:
 	'''
 	Entry point.
+	
+	Run a headless command if one is given, or start the Qt application.
+	'''
+	
+	# Any other arguments are left for Qt, untouched.
+	if sys.argv[1:2] != [ 'batch' ]:
+		runApplication()
+		return
+	
+	parser = ArgumentParser(
+		prog = 'nbr-5410-calculator',
+		description = 'Calculator for electrical installations following the NBR 5410 standard.',
+	)
+	subparsers = parser.add_subparsers( dest = 'command', required = True )
+	batch.addArguments( subparsers.add_parser(
+		'batch',
+		help = 'size circuits in project files without starting the user interface',
+	) )
+	
+	sys.exit( batch.run( parser.parse_args() ) )
+
+
+
+def runApplication() -> None:
 	'''
+	Start the Qt application.
+	'''
+	
+	# Only import Qt when actually starting the application.
+	# pylint: disable = import-outside-toplevel
+	from PySide6.QtWidgets import QApplication
+	from PySide6.QtCore import QTranslator, QLibraryInfo, QLocale
+	
+	from nbr_5410_calculator.ui import MainWindow
 	
 	app = QApplication( sys.argv )
 	
@@ -33,6 +64,7 @@ def main() -> None:
 	
 	window = MainWindow()
 	window.show()
+	window.recoverProject()
 
 	sys.exit( app.exec() )
 
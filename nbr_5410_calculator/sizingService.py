@@ -0,0 +1,392 @@
+'''
+Sizing of circuits and conduit runs in a background thread, for display in item models.
+'''
+
+from bisect import bisect_left
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, override
+from weakref import WeakKeyDictionary
+
+from PySide6.QtCore import QObject, QThreadPool, QTimer, Signal, Slot
+
+from nbr_5410_calculator.generic_model_views.items import GenericItem, ItemFieldInfo
+from nbr_5410_calculator.generic_model_views.models import Edit, GenericItemModel
+from nbr_5410_calculator.installation.circuit import BaseCircuit, Breaker
+from nbr_5410_calculator.installation.conduitRun import ConduitCatalog, ConduitRun, ConduitType
+from nbr_5410_calculator.installation.dependencies import DependencyGraph
+from nbr_5410_calculator.installation.sizing import SizingInputs, gatherInputs, sizeInputs
+from nbr_5410_calculator.installation.util import ProjectError
+from nbr_5410_calculator.tasks import ProgressCallback, Task
+
+
+
+type SizedItem = BaseCircuit | ConduitRun
+
+# Values of deferred fields by name. Fields that can't be calculated are missing.
+type FieldValues = dict[str, Any]
+
+
+
+@dataclass( frozen = True )
+class ConduitRunInputs:
+	'''
+	Inputs for sizing a conduit run, see `ConduitRun.evaluateWires()`.
+	'''
+	
+	conduitType: ConduitType
+	# Row of each circuit in `SizingInputs` and its wire count.
+	circuits: list[tuple[int, int]]
+
+
+
+class SizingService( QObject ):
+	'''
+	Calculate deferred fields of circuits and conduit runs in a background thread, as models request
+	them, see `GenericItemModel.deferredValues`.
+	
+	Results are reused while the inputs of an item don't change, see `BaseCircuit.inputsKey()`.
+	`resultsReady` is emitted at most once every `interval` milliseconds, with all items whose
+	results arrived or that were affected by an edit since the last emission, according to
+	`dependencies`. It's emitted with `None` after any edit without `dependencies`, since any result
+	may change.
+	'''
+	
+	placeholder = '…'
+	
+	resultsReady = Signal( object )
+	
+	
+	@override
+	def __init__( self, interval: int = 50, parent: QObject | None = None ) -> None:
+		super().__init__( parent )
+		
+		# Dependencies between items of the attached models, to update only items affected by an edit.
+		self.dependencies: DependencyGraph | None = None
+		
+		self._interval = interval
+		
+		# Attached models, with the slot connected to their edits.
+		self._models: dict[GenericItemModel[Any], Callable[[Edit], None]] = {}
+		
+		# Results are released with their items. Requested items by ID, with the key of their inputs,
+		# and running items by ID, with the key of their inputs and their task.
+		self._results: WeakKeyDictionary[SizedItem, tuple[Any, FieldValues]] = WeakKeyDictionary()
+		self._requested: dict[int, tuple[SizedItem, Any]] = {}
+		self._running: dict[int, tuple[Any, Task]] = {}
+		
+		# Items to emit with `resultsReady`, `None` for all items.
+		self._readyItems: list[SizedItem] | None = []
+	
+	
+	def attach( self, model: GenericItemModel[Any] ) -> None:
+		'''
+		Provide deferred fields of `model`, and update them after any attached model is edited.
+		'''
+		
+		self._models[model] = partial( self._invalidate, model )
+		model.deferredValues = self.valueForDisplay
+		model.edited.connect( self._models[model] )
+		self.resultsReady.connect( model.updateDeferredFields )
+	
+	
+	def detachAll( self ) -> None:
+		'''
+		Stop providing deferred fields to all models, and discard all results and `dependencies`.
+		'''
+		
+		for model, invalidate in self._models.items():
+			model.deferredValues = None
+			model.edited.disconnect( invalidate )
+			self.resultsReady.disconnect( model.updateDeferredFields )
+		
+		for task in { task for _, task in self._running.values() }:
+			task.cancel()
+		
+		self.dependencies = None
+		self._models.clear()
+		self._results.clear()
+		self._requested.clear()
+		self._running.clear()
+		self._readyItems = []
+	
+	
+	def valueForDisplay( self, item: GenericItem, field: ItemFieldInfo ) -> str | None:
+		'''
+		Formatted value of `field` of `item`, or `placeholder` while it's calculated. `None` if it
+		can't be calculated, e.g. without a suitable wire.
+		'''
+		
+		if not isinstance( item, BaseCircuit | ConduitRun ):
+			return field.valueForDisplay( item )
+		
+		key = _inputsKey( item )
+		
+		if ( result := self._results.get( item ) ) and result[0] == key:
+			if field.name not in result[1]:
+				return None
+			
+			return field.formatValue( result[1][field.name] )
+		
+		if id( item ) not in self._running or self._running[id( item )][0] != key:
+			# Submitted once this event is handled, with all items requested until then.
+			if not self._requested:
+				QTimer.singleShot( 0, self, self._submit )
+			
+			self._requested[id( item )] = ( item, key )
+		
+		return self.placeholder
+	
+	
+	@Slot()
+	def _submit( self ) -> None:
+		'''
+		Gather inputs of requested items, and size them in a background thread.
+		
+		Inputs are read in this thread, so items are never read while they're edited.
+		'''
+		
+		requested, self._requested = self._requested, {}
+		
+		if not requested:
+			return
+		
+		# Conduit runs are sized with all their circuits.
+		circuits: dict[int, BaseCircuit] = {}
+		conduitRuns: list[ConduitRun] = []
+		for item, _ in requested.values():
+			if isinstance( item, ConduitRun ):
+				conduitRuns.append( item )
+				circuits |= { id( circuit ): circuit for circuit in item.circuits }
+			else:
+				circuits[id( item )] = item
+		
+		items: list[tuple[SizedItem, Any]] = [
+			*( ( circuit, circuit.inputsKey() ) for circuit in circuits.values() ),
+			*( ( conduitRun, _inputsKey( conduitRun ) ) for conduitRun in conduitRuns ),
+		]
+		
+		try:
+			inputs = gatherInputs( circuits.values() )
+		except ( ProjectError, LookupError ):
+			self._storeResults( items, [ {} for _ in items ] )
+			return
+		
+		rows = { key: row for row, key in enumerate( circuits ) }
+		conduitRunInputs = [
+			ConduitRunInputs(
+				conduitType = conduitRun.conduitType,
+				circuits = [
+					( rows[id( circuit )], circuit.supply.wireCount ) for circuit in conduitRun.circuits
+				],
+			)
+			for conduitRun in conduitRuns
+		]
+		
+		def failed( _: str ) -> None:
+			self._finishTask( task, items, None )
+		
+		task = Task( partial( _size, inputs, conduitRunInputs ) )
+		task.signals.finished.connect( partial( self._finishTask, task, items ) )
+		task.signals.failed.connect( failed )
+		task.signals.canceled.connect( partial( self._finishTask, task, items, None ) )
+		
+		self._running |= { id( item ): ( key, task ) for item, key in items }
+		QThreadPool.globalInstance().start( task )
+	
+	
+	def _finishTask(
+		self,
+		task: Task,
+		items: list[tuple[SizedItem, Any]],
+		values: list[FieldValues] | None,
+	) -> None:
+		'''
+		Store results of `task`, except for items discarded by `detachAll()` or sized again by a newer
+		task since. Wires are created here, see `_size()`.
+		'''
+		
+		# Connected slots hold `task` and its items, in a cycle the garbage collector can't see.
+		for signal in ( task.signals.finished, task.signals.failed, task.signals.canceled ):
+			signal.disconnect()
+		
+		finished = [
+			( ( item, key ), itemValues )
+			for ( item, key ), itemValues in zip( items, values or [ {} for _ in items ] )
+			if self._running.get( id( item ), ( None, None ) )[1] is task
+		]
+		
+		if not finished:
+			return
+		
+		for ( item, _ ), itemValues in finished:
+			del self._running[id( item )]
+			
+			if 'wire' in itemValues:
+				itemValues['wire'] = itemValues['wire']()
+		
+		self._storeResults(
+			[ item for item, _ in finished ],
+			[ itemValues for _, itemValues in finished ],
+		)
+	
+	
+	def _storeResults( self, items: list[tuple[SizedItem, Any]], values: list[FieldValues] ) -> None:
+		'''
+		Store `values` of each item and schedule `resultsReady`.
+		'''
+		
+		for ( item, key ), itemValues in zip( items, values ):
+			self._results[item] = ( key, itemValues )
+		
+		self._scheduleReady( [ item for item, _ in items ] )
+	
+	
+	def _invalidate( self, model: GenericItemModel[Any], edit: Edit ) -> None:
+		'''
+		Update deferred fields of items affected by `edit` of `model`, or of all items without
+		`dependencies`.
+		
+		Edits adding, moving or removing items rebuild `dependencies`, other edits only follow the
+		dependencies of the edited item.
+		'''
+		
+		if self.dependencies is None:
+			self._scheduleReady( None )
+			return
+		
+		if edit['edit'] == 'setData':
+			self.dependencies.notifyChanged( model.itemFromIndex( model.indexFromPath( edit['path'] ) ) )
+		else:
+			self.dependencies.rebuild()
+		
+		self._scheduleReady( [
+			item
+			for item in self.dependencies.takeDirtyItems()
+			if isinstance( item, BaseCircuit | ConduitRun )
+		] )
+	
+	
+	def _scheduleReady( self, items: list[SizedItem] | None ) -> None:
+		'''
+		Add `items` to the next `resultsReady`, or all items if `None`.
+		'''
+		
+		if items == []:
+			return
+		
+		# Emitted `interval` milliseconds after the first item since the last emission.
+		if self._readyItems == []:
+			QTimer.singleShot( self._interval, self, self._emitReady )
+		
+		if items is None or self._readyItems is None:
+			self._readyItems = None
+		else:
+			self._readyItems += items
+	
+	
+	@Slot()
+	def _emitReady( self ) -> None:
+		'''
+		Emit `resultsReady` with all items since the last emission.
+		'''
+		
+		items, self._readyItems = self._readyItems, []
+		
+		# Discarded by `detachAll()`.
+		if items == []:
+			return
+		
+		self.resultsReady.emit( items )
+
+
+
+def _inputsKey( item: SizedItem ) -> Any:
+	'''
+	Values of all inputs used to size `item`, see `BaseCircuit.inputsKey()`.
+	'''
+	
+	if isinstance( item, BaseCircuit ):
+		return item.inputsKey()
+	
+	return (
+		item.conduitType,
+		tuple( ( circuit.inputsKey(), circuit.supply.wireCount ) for circuit in item.circuits ),
+	)
+
+
+
+def _size(
+	inputs: SizingInputs,
+	conduitRuns: list[ConduitRunInputs],
+	reportProgress: ProgressCallback,
+) -> list[FieldValues]:
+	'''
+	Calculate deferred fields of circuits in `inputs`, followed by `conduitRuns`.
+	
+	Same values as `BaseCircuit.breaker`, `wire`, `_wireCapacity` and `voltageDrop`, and
+	`ConduitRun.conduit` and `fillFactor`. `wire` is a call creating it instead, since creating a
+	`Wire` validates its `WireType`, which must be done in the main thread.
+	'''
+	
+	results = sizeInputs( inputs )
+	reportProgress( 0.5 )
+	
+	circuitValues: list[FieldValues] = [ {} for _ in inputs.circuits ]
+	externalSections: dict[int, float] = {}
+	
+	for curve, rows in inputs.rowsByCurve.items():
+		for row in rows:
+			# Zero if there's no suitable breaker.
+			if results.breaker[row]:
+				circuitValues[row]['breaker'] = Breaker.forCurrent( curve, float( results.breaker[row] ) )
+	
+	for wireTable, rows in inputs.rowsByTable.items():
+		for row in rows:
+			if not results.valid[row]:
+				continue
+			
+			index = bisect_left( wireTable.sections, results.section[row] )
+			externalSections[row] = wireTable.externalSections[index]
+			circuitValues[row] |= {
+				'wire': partial(
+					wireTable.wire,
+					index,
+					inputs.wireTypes[row],
+					float( inputs.correctionFactor[row] ),
+				),
+				'_wireCapacity': float( results.capacity[row] ),
+				'voltageDrop': float( results.voltageDrop[row] ),
+			}
+	
+	reportProgress( 0.75 )
+	
+	conduitRunValues: list[FieldValues] = []
+	for conduitRun in conduitRuns:
+		wires = tuple(
+			( externalSections[row], wireCount )
+			for row, wireCount in conduitRun.circuits
+			if row in externalSections
+		)
+		
+		try:
+			if len( wires ) < len( conduitRun.circuits ):
+				raise ProjectError( 'No suitable wire found.' )
+			
+			conduitRunResults = ConduitRun.evaluateWires(
+				ConduitCatalog.getCatalog( conduitRun.conduitType ),
+				wires,
+			)
+		except ProjectError:
+			conduitRunValues.append( {} )
+			continue
+		
+		conduitRunValues.append( {
+			'conduit': conduitRunResults.conduit,
+			'fillFactor': conduitRunResults.fillFactor,
+		} )
+	
+	reportProgress( 1.0 )
+	
+	return circuitValues + conduitRunValues
\ No newline at end of file
@@ -0,0 +1,162 @@
+'''
+Long-running operations run in a `QThreadPool`, so they don't block the user interface.
+'''
+
+import os
+from collections.abc import Callable
+from pathlib import Path
+from threading import Event
+from typing import Any, override
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from nbr_5410_calculator.installation import projectFile
+from nbr_5410_calculator.installation.project import Project
+from nbr_5410_calculator.installation.util import InstanceRegistry, UniqueSerializable
+
+
+
+type ProgressCallback = Callable[[float], None]
+
+
+
+class TaskCanceled( Exception ):
+	'''
+	Raised by a task's progress callback after the task is canceled.
+	'''
+
+
+
+class TaskSignals( QObject ):
+	'''
+	Signals of a `Task`, which can't be a `QObject` itself.
+	'''
+	
+	# Fraction of the task done, from 0 to 1.
+	progress = Signal( float )
+	finished = Signal( object )
+	failed = Signal( str )
+	canceled = Signal()
+
+
+
+class Task( QRunnable ):
+	'''
+	Call `function` in a thread pool, with a callback to report progress.
+	
+	The callback raises `TaskCanceled` once the task is canceled, so `function` should call it
+	regularly. Exactly one of `finished`, `failed` and `canceled` is emitted at the end.
+	
+	`function` runs in its own `UniqueSerializable.session()`.
+	'''
+	
+	@override
+	def __init__( self, function: Callable[[ProgressCallback], Any] ) -> None:
+		super().__init__()
+		
+		self.function = function
+		self.signals = TaskSignals()
+		self._canceled = Event()
+		self._progress = -1
+	
+	
+	def cancel( self ) -> None:
+		'''
+		Stop the task at its next progress report.
+		'''
+		
+		self._canceled.set()
+	
+	
+	def _reportProgress( self, progress: float ) -> None:
+		'''
+		Emit `progress` in steps of 0.1%, or raise `TaskCanceled`.
+		'''
+		
+		if self._canceled.is_set():
+			raise TaskCanceled()
+		
+		if ( permille := int( progress * 1000 ) ) != self._progress:
+			self._progress = permille
+			self.signals.progress.emit( progress )
+	
+	
+	@override
+	def run( self ) -> None:
+		try:
+			# Pooled threads are reused, don't share instances between tasks.
+			with UniqueSerializable.session():
+				result = self.function( self._reportProgress )
+		except TaskCanceled:
+			self.signals.canceled.emit()
+		# Exceptions can't propagate out of a pooled thread, and listeners wait for a signal.
+		except Exception as error:	# pylint: disable = broad-exception-caught
+			self.signals.failed.emit( str( error ) or type( error ).__name__ )
+		else:
+			self.signals.finished.emit( result )
+
+
+
+def loadProjectFile(
+	path: Path,
+	reportProgress: ProgressCallback,
+) -> tuple[Project, InstanceRegistry, bytes]:
+	'''
+	Load project file at `path`. Return the project, its instances and a snapshot for
+	`EditJournal`.
+	
+	Instances aren't shared with other projects, use `UniqueSerializable.updateInstanceRegistry()`
+	to share them with the current session.
+	'''
+	
+	with open( path, 'rb' ) as file:
+		data = file.read()
+	
+	project: Project | None = None
+	
+	with UniqueSerializable.session() as registry:
+		for project, progress in projectFile.loadProjectIncrementally( data ):
+			reportProgress( progress * 0.9 )
+	
+	if project is None:
+		raise ValueError( 'Invalid project file.' )
+	
+	snapshot = b''.join( projectFile.dumpProjectIncrementally( project ) )
+	reportProgress( 1.0 )
+	
+	return project, registry, snapshot
+
+
+def saveProjectFile( project: Project, path: Path, reportProgress: ProgressCallback ) -> bytes:
+	'''
+	Save `project` to `path`, in newline-delimited JSON format if it has the `.ndjson` extension.
+	Return the file contents, as a snapshot for `EditJournal`.
+	
+	The previous file is kept if saving fails or is canceled.
+	'''
+	
+	if path.suffix == '.ndjson':
+		# Header, top-level circuits and conduit runs.
+		chunkCount = 1 + len( project.circuits ) + len( project.conduitRuns )
+		chunks: list[bytes] = []
+		
+		for written, chunk in enumerate( projectFile.dumpProjectIncrementally( project ), 1 ):
+			chunks.append( chunk )
+			reportProgress( written / chunkCount )
+		
+		snapshot = b''.join( chunks )
+	else:
+		snapshot = projectFile.dumpProject( project )
+		reportProgress( 1.0 )
+	
+	temporaryPath = path.with_name( f'{path.name}.tmp' )
+	
+	try:
+		with open( temporaryPath, 'wb' ) as file:
+			file.write( snapshot )
+		
+		os.replace( temporaryPath, path )
+	finally:
+		temporaryPath.unlink( missing_ok = True )
+	
+	return snapshot
\ No newline at end of file
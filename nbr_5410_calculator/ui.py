@@ -2,17 +2,27 @@
 Main window and project-level stuff.
 '''
 
-from typing import override
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import Any, override
 
-from PySide6.QtCore import Slot
-from PySide6.QtWidgets import QWidget, QMainWindow, QFileDialog, QMessageBox
+from PySide6.QtCore import QStandardPaths, Qt, QThreadPool, Slot
+from PySide6.QtGui import QCloseEvent
+from PySide6.QtWidgets import QWidget, QMainWindow, QFileDialog, QMessageBox, QProgressDialog
 
+from nbr_5410_calculator import tasks
 from nbr_5410_calculator.circuitsTab import CircuitsModel
 from nbr_5410_calculator.conduitsTab import ConduitRunsModel, UnassignedCircuitsModel
+from nbr_5410_calculator.generic_model_views.journal import EditJournal
 from nbr_5410_calculator.generic_model_views.models import GenericItemModel
+from nbr_5410_calculator.installation import projectFile
 from nbr_5410_calculator.installation.circuit import BaseCircuit, LoadType, Supply, WireType
 from nbr_5410_calculator.installation.conduitRun import ConduitRun
+from nbr_5410_calculator.installation.dependencies import DependencyGraph
 from nbr_5410_calculator.installation.project import Project
+from nbr_5410_calculator.installation.util import InstanceRegistry, UniqueSerializable
+from nbr_5410_calculator.sizingService import SizingService
 from nbr_5410_calculator.UiMainWindow import Ui_mainWindow as UiMainWindow
 
 
@@ -30,12 +40,29 @@ class MainWindow( QMainWindow, UiMainWindow ):
 		super().__init__( parent )
 		self.setupUi( self )	# pyright: ignore [reportUnknownMemberType]
 		
+		autosavePath = Path(
+			QStandardPaths.writableLocation( QStandardPaths.StandardLocation.AppDataLocation )
+		) / 'autosave.journal'
+		autosavePath.parent.mkdir( parents = True, exist_ok = True )
+		
+		self.recoverableJournal = EditJournal.read( autosavePath )
+		self.journal = EditJournal(
+			autosavePath,
+			lambda: projectFile.dumpProjectIncrementally( self.project ),
+			parent = self,
+		)
+		# Keep the previous journal until it's recovered or discarded, see `recoverProject()`.
+		self.journal.paused = bool( self.recoverableJournal and self.recoverableJournal.modified )
+		
+		self.sizingService = SizingService( parent = self )
+		
 		self.newProject()
 	
 	
-	def setProject( self, project: Project ) -> None:
+	def setProject( self, project: Project, snapshot: bytes ) -> None:
 		'''
-		Set the current project, cascading changes to all models and views.
+		Set the current project, cascading changes to all models and views. `snapshot` of `project`
+		replaces the autosave journal, see `EditJournal.compact()`.
 		'''
 		
 		self.project = project
@@ -50,6 +77,12 @@ class MainWindow( QMainWindow, UiMainWindow ):
 		conduitRunsModel = ConduitRunsModel( project.conduitRuns, [ ConduitRun, BaseCircuit ], self )
 		unassignedCircuitsModel = UnassignedCircuitsModel( circuitsModel, self )
 		
+		# Calculated fields, before views read them.
+		self.sizingService.detachAll()
+		self.sizingService.dependencies = DependencyGraph( project )
+		for model in ( supplyModel, loadTypeModel, wireTypeModel, circuitsModel, conduitRunsModel ):
+			self.sizingService.attach( model )
+		
 		# Views.
 		self.suppliesView.setModel( supplyModel )
 		self.loadTypesView.setModel( loadTypeModel )
@@ -63,6 +96,15 @@ class MainWindow( QMainWindow, UiMainWindow ):
 		self.conduitsView.expandAll()
 		self.conduitsView.resizeColumnsToContents()
 		self.unassignedCircuitsView.setModel( unassignedCircuitsModel )
+		
+		# Autosave. Unassigned circuits are derived from the other models.
+		self.journal.detachAll()
+		self.journal.attach( 'supplies', supplyModel )
+		self.journal.attach( 'loadTypes', loadTypeModel )
+		self.journal.attach( 'wireTypes', wireTypeModel )
+		self.journal.attach( 'circuits', circuitsModel )
+		self.journal.attach( 'conduitRuns', conduitRunsModel )
+		self.journal.markSaved( snapshot )
 	
 	
 	@Slot()
@@ -73,7 +115,8 @@ class MainWindow( QMainWindow, UiMainWindow ):
 		
 		project = Project( name = self.tr('New Project') )
 		
-		self.setProject( project )
+		# Snapshot of an empty project is cheap.
+		self.setProject( project, projectFile.dumpProject( project ) )
 		
 		project.defaultSupply = self.suppliesView.newSupply()
 		project.defaultLoadType = self.loadTypesView.newLoadType()
@@ -90,52 +133,133 @@ class MainWindow( QMainWindow, UiMainWindow ):
 		self.conduitsView.newConduitRun()
 		self.conduitsView.expandAll()
 		self.conduitsView.resizeColumnsToContents()
+		
+		self.journal.markSaved()
+	
+	
+	@Slot()
+	def recoverProject( self ) -> None:
+		'''
+		Offer to recover unsaved changes from the previous session, e.g. after a crash.
+		'''
+		
+		journal, self.recoverableJournal = self.recoverableJournal, None
+		
+		if not journal or not journal.modified:
+			return
+		
+		answer = QMessageBox.question(
+			self,
+			self.tr('Recover Project'),
+			self.tr('Recover unsaved changes from the previous session?'),
+		)
+		self.journal.paused = False
+		
+		if answer is not QMessageBox.StandardButton.Yes:
+			# Only the new project was edited since startup.
+			self.journal.compact( projectFile.dumpProject( self.project ) )
+			return
+		
+		UniqueSerializable.clearInstanceRegistry()
+		self.setProject( projectFile.loadProject( journal.snapshot ), journal.snapshot )
+		self.journal.replay( journal.edits )
+		self.journal.modified = True
 	
 	
 	@Slot()
 	def loadProject( self ) -> None:
 		'''
-		Load a project from a file in JSON format.
+		Load a project from a file in JSON or newline-delimited JSON format.
 		'''
 		
 		fileName = QFileDialog().getOpenFileName(
 			self,
-			filter = self.tr('Project files (*.json)'),
+			filter = self.tr('Project files (*.json *.ndjson)'),
 			caption = self.tr('Open Project'),
 		)[0]
 		
 		if not fileName:
 			return
 		
-		try:
-			with open( fileName, 'rb' ) as file:
-				project = Project.model_validate_json( file.read() )
+		def finished( result: tuple[Project, InstanceRegistry, bytes] ) -> None:
+			project, registry, snapshot = result
+			
+			# Don't reuse instances from the current project, they are released once it's replaced.
+			UniqueSerializable.clearInstanceRegistry()
+			UniqueSerializable.updateInstanceRegistry( registry )
 			
-			self.setProject( project )
-		except FileNotFoundError as error:
-			QMessageBox.critical( self, self.tr('Error'), f'{error}' )
+			self.setProject( project, snapshot )
+		
+		self._runTask(
+			self.tr('Loading project…'),
+			partial( tasks.loadProjectFile, Path( fileName ) ),
+			finished,
+		)
 	
 	
 	@Slot()
 	def saveProject( self ) -> None:
 		'''
-		Save project to a file in JSON format.
+		Save project to a file in JSON or newline-delimited JSON format, according to its extension.
 		'''
 		
 		fileName = QFileDialog().getSaveFileName(
 			self,
-			filter = self.tr('Project files (*.json)'),
+			filter = self.tr('Project files (*.json);;Streamed project files (*.ndjson)'),
 			caption = self.tr('Save Project As'),
 		)[0]
 		
 		if not fileName:
 			return
 		
-		try:
-			with open( fileName, 'wb' ) as file:
-				file.write( self.project.model_dump_json().encode() )
-		except PermissionError as error:
-			QMessageBox.critical( self, self.tr('Error'), str( error ) )
+		self._runTask(
+			self.tr('Saving project…'),
+			partial( tasks.saveProjectFile, self.project, Path( fileName ) ),
+			self.journal.markSaved,
+		)
+	
+	
+	def _runTask(
+		self,
+		label: str,
+		function: Callable[[tasks.ProgressCallback], Any],
+		onFinished: Callable[[Any], None],
+	) -> None:
+		'''
+		Run `function` in a background thread, showing its progress. `onFinished` is called with its
+		result in the main thread, unless it fails or is canceled.
+		
+		The dialog is window modal and shown before the task starts, so the project isn't edited while
+		it's being saved.
+		'''
+		
+		dialog = QProgressDialog( label, self.tr('Cancel'), 0, 1000, self )
+		dialog.setWindowModality( Qt.WindowModality.WindowModal )
+		
+		def showProgress( progress: float ) -> None:
+			dialog.setValue( int( progress * 1000 ) )
+		
+		def showError( message: str ) -> None:
+			QMessageBox.critical( self, self.tr('Error'), message )
+		
+		task = tasks.Task( function )
+		task.signals.progress.connect( showProgress )
+		task.signals.finished.connect( onFinished )
+		task.signals.failed.connect( showError )
+		dialog.canceled.connect( task.cancel )
+		
+		for signal in ( task.signals.finished, task.signals.failed, task.signals.canceled ):
+			signal.connect( dialog.reset )
+			signal.connect( dialog.deleteLater )
+		
+		dialog.show()
+		QThreadPool.globalInstance().start( task )
+	
+	
+	@override
+	def closeEvent( self, event: QCloseEvent ) -> None:
+		self.journal.flush()
+		super().closeEvent( event )
 	
 	
 	@Slot()
@@ -0,0 +1,167 @@
+# 
+# NBR 5410 Calculator
+# 
+# 
+# Author: Marcelo Tellier Sartori Vaz <marcelotsvaz@gmail.com>
+
+
+
+import csv
+import json
+import os
+import subprocess
+import sys
+from io import StringIO
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+from typing import override
+from unittest import TestCase
+
+from nbr_5410_calculator.batch import resultFields, sizeProjectFile, writeResults
+from nbr_5410_calculator.installation.projectFile import dumpProject
+from nbr_5410_calculator.installation.util import UniqueSerializable
+from tests.installation.util import createProject
+
+
+
+class BatchTests( TestCase ):
+	'''
+	Tests for headless sizing of project files.
+	'''
+	
+	@override
+	def setUp( self ) -> None:
+		'''
+		Setup for all tests.
+		'''
+		
+		UniqueSerializable.clearInstanceRegistry()
+		
+		directory = mkdtemp()
+		self.addCleanup( rmtree, directory )
+		self.path = Path( directory ) / 'project.json'
+		self.path.write_text( createProject().model_dump_json() )
+	
+	
+	def testSizeProjectFile( self ) -> None:
+		'''
+		One result should be returned for each circuit in the project.
+		'''
+		
+		results = sizeProjectFile( self.path )
+		
+		assert isinstance( results, list )
+		self.assertEqual( len( results ), 3 )
+		self.assertEqual( results[0]['section'], 10.0 )
+		self.assertTrue( results[0]['valid'] )
+	
+	
+	def testSizeCompactProjectFile( self ) -> None:
+		'''
+		Files in the compact format should give the same results.
+		'''
+		
+		results = sizeProjectFile( self.path )
+		self.path.write_bytes( dumpProject( createProject() ) )
+		
+		self.assertEqual( sizeProjectFile( self.path ), results )
+	
+	
+	def testInvalidProjectFile( self ) -> None:
+		'''
+		An error message should be returned for invalid files.
+		'''
+		
+		self.path.write_text( '{' )
+		
+		self.assertIsInstance( sizeProjectFile( self.path ), str )
+		self.assertIsInstance( sizeProjectFile( self.path.with_name( 'missing.json' ) ), str )
+	
+	
+	def testWriteResults( self ) -> None:
+		'''
+		Results should be written in all supported formats.
+		'''
+		
+		results = sizeProjectFile( self.path )
+		assert isinstance( results, list )
+		
+		output = StringIO()
+		writeResults( results, 'csv', output )
+		rows = list( csv.DictReader( StringIO( output.getvalue() ) ) )
+		self.assertEqual( len( rows ), 3 )
+		self.assertEqual( list( rows[0] ), resultFields )
+		
+		output = StringIO()
+		writeResults( results, 'json', output )
+		self.assertEqual( json.loads( output.getvalue() ), results )
+		
+		output = StringIO()
+		writeResults( results, 'ndjson', output )
+		self.assertEqual( [ json.loads( line ) for line in output.getvalue().splitlines() ], results )
+	
+	
+	def testHeadless( self ) -> None:
+		'''
+		The batch command should work without importing Qt.
+		'''
+		
+		script = (
+			'import sys\n'
+			'from nbr_5410_calculator.main import main\n'
+			'try:\n'
+			'	main()\n'
+			'finally:\n'
+			'	assert "PySide6" not in sys.modules\n'
+		)
+		process = subprocess.run(
+			[ sys.executable, '-c', script, 'batch', '--jobs', '1', str( self.path ) ],
+			capture_output = True,
+			check = False,
+			text = True,
+		)
+		
+		self.assertEqual( process.returncode, 0, process.stderr )
+		self.assertEqual( len( process.stdout.splitlines() ), 4 )	
+	
+	def testUnknownArgument( self ) -> None:
+		'''
+		Unknown arguments should be rejected by the batch command, instead of left for Qt.
+		'''
+		
+		process = subprocess.run(
+			[ sys.executable, '-m', 'nbr_5410_calculator.main', 'batch', '--verbose', str( self.path ) ],
+			capture_output = True,
+			check = False,
+			text = True,
+		)
+		
+		self.assertEqual( process.returncode, 2 )
+		self.assertIn( '--verbose', process.stderr )
+	
+	
+	def testQtArguments( self ) -> None:
+		'''
+		Arguments other than the batch command should be left for Qt.
+		'''
+		
+		script = (
+			'from PySide6.QtWidgets import QApplication\n'
+			'from nbr_5410_calculator.main import main\n'
+			'QApplication.exec = staticmethod( lambda: print(\n'
+			'	QApplication.platformName(), QApplication.style().name()\n'
+			') or 0 )\n'
+			'main()\n'
+		)
+		process = subprocess.run(
+			[ sys.executable, '-c', script, '-platform', 'offscreen', '-style', 'fusion' ],
+			capture_output = True,
+			check = False,
+			text = True,
+			# Autosave journal in the temporary directory.
+			env = { **os.environ, 'XDG_DATA_HOME': str( self.path.parent ) },
+		)
+		
+		self.assertEqual( process.returncode, 0, process.stderr )
+		self.assertEqual( process.stdout.splitlines()[-1].split(), [ 'offscreen', 'fusion' ] )
\ No newline at end of file
@@ -0,0 +1,308 @@
+'''
+Tests for `nbr_5410_calculator.generic_model_views.journal`.
+'''
+
+from __future__ import annotations
+
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+from typing import Annotated, cast, override
+from unittest import TestCase
+
+from PySide6.QtCore import QCoreApplication, Qt
+from pydantic import Field, TypeAdapter
+
+from nbr_5410_calculator.generic_model_views.items import GenericItem, ItemField
+from nbr_5410_calculator.generic_model_views.journal import EditJournal
+from nbr_5410_calculator.generic_model_views.models import GenericItemModel
+
+
+
+class FooItem( GenericItem ):
+	'''
+	Item with editable field and children.
+	'''
+	
+	name: Annotated[str, ItemField( 'Name', editable = True )]
+	items: list[FooItem] = Field( default_factory = list )
+	
+	
+	@property
+	@override
+	def children( self ) -> list[GenericItem]:
+		return cast( list[GenericItem], self.items )
+	
+	
+	@override
+	def isChildValid( self, item: GenericItem ) -> bool:
+		return isinstance( item, FooItem )
+
+
+
+fooListAdapter = TypeAdapter( list[FooItem] )
+
+
+
+class EditJournalTests( TestCase ):
+	'''
+	Tests for `EditJournal` class.
+	'''
+	
+	@override
+	def setUp( self ) -> None:
+		'''
+		Setup for all tests.
+		'''
+		
+		# Timers need an application.
+		self.application = QCoreApplication.instance() or QCoreApplication( [] )
+		
+		directory = mkdtemp()
+		self.addCleanup( rmtree, directory )
+		self.path = Path( directory ) / 'autosave.journal'
+		
+		self.model = self._createModel( [
+			FooItem( name = 'Foo', items = [ FooItem( name = 'Foo 1' ), FooItem( name = 'Foo 2' ) ] ),
+			FooItem( name = 'Bar' ),
+		] )
+		self.journal = self._createJournal( self.model, self.path )
+		self.journal.markSaved()
+		self._wait( self.journal )
+	
+	
+	def _createModel( self, items: list[FooItem] ) -> GenericItemModel[FooItem]:
+		'''
+		Create model of `items`, showing only their names.
+		'''
+		
+		model = GenericItemModel[FooItem]( items, [ FooItem ] )
+		model.updateFieldOrder( { FooItem: [ 'name' ] } )
+		
+		return model
+	
+	
+	def _createJournal(
+		self,
+		model: GenericItemModel[FooItem],
+		path: Path,
+		compactThreshold: int = 10_000,
+	) -> EditJournal:
+		'''
+		Create journal of edits to `model`, with the snapshot in two chunks.
+		'''
+		
+		def snapshot() -> list[bytes]:
+			data = fooListAdapter.dump_json( cast( list[FooItem], model.root.items ) )
+			
+			return [ data[:1], data[1:] ]
+		
+		journal = EditJournal( path, snapshot, compactThreshold = compactThreshold )
+		journal.attach( 'foo', model )
+		self.addCleanup( journal.detachAll )
+		
+		return journal
+	
+	
+	def _wait( self, journal: EditJournal ) -> None:
+		'''
+		Wait until `journal` finishes compacting.
+		'''
+		
+		while journal.compacting:
+			QCoreApplication.sendPostedEvents()
+	
+	
+	def _edit( self ) -> None:
+		'''
+		Make one edit of each kind.
+		'''
+		
+		model = self.model
+		
+		model.setData( model.indexFromPath( [ 0, 1 ] ), 'Foo 3', Qt.ItemDataRole.EditRole )
+		model.insertItem( FooItem( name = 'Baz' ), 0, model.indexFromPath( [ 1 ] ) )
+		model.moveRows( model.indexFromPath( [ 0 ] ), 0, 1, model.indexFromPath( [] ), -1 )
+		model.removeRows( 0, 1, model.indexFromPath( [ 1 ] ) )
+	
+	
+	def testFlush( self ) -> None:
+		'''
+		Test appending edits to the file.
+		'''
+		
+		self._edit()
+		journal = EditJournal.read( self.path )
+		
+		assert journal
+		self.assertEqual( journal.edits, [] )
+		
+		self.journal.flush()
+		journal = EditJournal.read( self.path )
+		
+		assert journal
+		self.assertTrue( journal.modified )
+		self.assertEqual(
+			[ edit['edit'] for _, edit in journal.edits ],
+			[ 'setData', 'insertItem', 'moveRows', 'removeRows' ],
+		)
+		self.assertEqual( journal.edits[0], ( 'foo', {
+			'edit': 'setData',
+			'path': [ 0, 1 ],
+			'field': 'name',
+			'value': 'Foo 3',
+		} ) )
+	
+	
+	def testReplay( self ) -> None:
+		'''
+		Test replaying edits on a model created from the snapshot.
+		'''
+		
+		self._edit()
+		self.journal.flush()
+		journal = EditJournal.read( self.path )
+		assert journal
+		
+		model = self._createModel( fooListAdapter.validate_json( journal.snapshot ) )
+		self._createJournal( model, self.path.with_suffix( '.copy' ) ).replay( journal.edits )
+		
+		self.assertEqual(
+			fooListAdapter.dump_python( cast( list[FooItem], model.root.items ) ),
+			fooListAdapter.dump_python( cast( list[FooItem], self.model.root.items ) ),
+		)
+	
+	
+	def testCompact( self ) -> None:
+		'''
+		Test replacing edits with a new snapshot after too many edits.
+		'''
+		
+		self.journal.detachAll()
+		self.journal = self._createJournal( self.model, self.path, compactThreshold = 3 )
+		self.journal.markSaved()
+		self._wait( self.journal )
+		
+		self._edit()
+		self.journal.flush()
+		journal = EditJournal.read( self.path )
+		
+		# Edits are kept until the snapshot is complete.
+		assert journal
+		self.assertTrue( self.journal.compacting )
+		self.assertEqual( len( journal.edits ), 4 )
+		
+		self._wait( self.journal )
+		journal = EditJournal.read( self.path )
+		
+		assert journal
+		self.assertTrue( journal.modified )
+		self.assertEqual( journal.edits, [] )
+		self.assertEqual(
+			fooListAdapter.validate_json( journal.snapshot ),
+			self.model.root.items,
+		)
+	
+	
+	def testCompactInterrupted( self ) -> None:
+		'''
+		Test abandoning a snapshot after an edit recorded while it's being created.
+		'''
+		
+		self._edit()
+		self.journal.compact()
+		QCoreApplication.sendPostedEvents()
+		
+		model = self.model
+		model.setData( model.indexFromPath( [ 0 ] ), 'Qux', Qt.ItemDataRole.EditRole )
+		
+		self.assertFalse( self.journal.compacting )
+		
+		self.journal.flush()
+		QCoreApplication.sendPostedEvents()
+		journal = EditJournal.read( self.path )
+		
+		assert journal
+		self.assertEqual( len( journal.edits ), 5 )
+		self.assertEqual( journal.edits[-1][1]['value'], 'Qux' )
+	
+	
+	def testPaused( self ) -> None:
+		'''
+		Test keeping the file of a previous session until the journal is resumed.
+		'''
+		
+		self._edit()
+		self.journal.flush()
+		contents = self.path.read_bytes()
+		
+		model = self._createModel( [ FooItem( name = 'New' ) ] )
+		journal = self._createJournal( model, self.path )
+		journal.paused = True
+		journal.markSaved( b'[]' )
+		model.insertItem( FooItem( name = 'Baz' ), 0, model.indexFromPath( [] ) )
+		journal.flush()
+		journal.markSaved()
+		
+		self.assertFalse( journal.compacting )
+		self.assertEqual( self.path.read_bytes(), contents )
+		
+		journal.paused = False
+		journal.compact( b'[]' )
+		previousJournal = EditJournal.read( self.path )
+		
+		assert previousJournal
+		self.assertEqual( previousJournal.snapshot, b'[]' )
+		self.assertEqual( previousJournal.edits, [] )
+	
+	
+	def testMarkSaved( self ) -> None:
+		'''
+		Test that there's nothing to recover after saving.
+		'''
+		
+		self._edit()
+		self.journal.markSaved()
+		self._wait( self.journal )
+		journal = EditJournal.read( self.path )
+		
+		assert journal
+		self.assertFalse( journal.modified )
+		self.assertEqual( journal.edits, [] )
+	
+	
+	def testMultilineSnapshot( self ) -> None:
+		'''
+		Test reading edits after a snapshot spanning multiple lines.
+		'''
+		
+		snapshot = fooListAdapter.dump_json( cast( list[FooItem], self.model.root.items ), indent = 1 )
+		self.journal.markSaved( snapshot )
+		
+		self.assertFalse( self.journal.compacting )
+		
+		self._edit()
+		self.journal.flush()
+		journal = EditJournal.read( self.path )
+		
+		assert journal
+		self.assertEqual( journal.snapshot, snapshot )
+		self.assertEqual( len( journal.edits ), 4 )
+	
+	
+	def testReadPartialEdit( self ) -> None:
+		'''
+		Test ignoring a partially written edit.
+		'''
+		
+		self._edit()
+		self.journal.flush()
+		
+		with open( self.path, 'ab' ) as file:
+			file.write( b'[ "foo", { "edit": ' )
+		
+		journal = EditJournal.read( self.path )
+		
+		assert journal
+		self.assertEqual( len( journal.edits ), 4 )
+		self.assertIsNone( EditJournal.read( self.path.with_suffix( '.missing' ) ) )
\ No newline at end of file
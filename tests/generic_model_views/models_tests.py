@@ -6,8 +6,33 @@ from typing import override
 from unittest import TestCase
 
 from PySide6.QtCore import QModelIndex
+from pydantic import Field
 
 from nbr_5410_calculator.generic_model_views.models import GenericItem, GenericItemModel, RootItem
+from nbr_5410_calculator.installation.circuit import BaseCircuit, BreakerCurve, UpstreamCircuit
+from nbr_5410_calculator.installation.project import Project
+from nbr_5410_calculator.installation.util import UniqueSerializable
+from tests.installation.util import createCircuit, createConduitRun
+
+
+
+class ContainerItem( GenericItem ):
+	'''
+	Item with children.
+	'''
+	
+	items: list[GenericItem] = Field( default_factory = list )
+	
+	
+	@property
+	@override
+	def children( self ) -> list[GenericItem]:
+		return self.items
+	
+	
+	@override
+	def isChildValid( self, item: GenericItem ) -> bool:
+		return True
 
 
 
@@ -126,4 +151,122 @@ class GenericItemModelIndexTests( TestCase ):
 		parentIndex = self.model.index( 0, 0, rootIndex )
 		childIndex = self.model.index( 0, 0, parentIndex )
 		
-		self.assertEqual( self.model.parent( childIndex ), parentIndex )
\ No newline at end of file
+		self.assertEqual( self.model.parent( childIndex ), parentIndex )	
+	
+	def testEqualItemsParent( self ) -> None:
+		'''
+		Items equal by value should still be found in their own parent.
+		'''
+		
+		containers = [
+			RootItem( childrenType = GenericItem, items = [ GenericItem() ] ),
+			RootItem( childrenType = GenericItem, items = [ GenericItem() ] ),
+		]
+		
+		self.model.root.children.extend( containers )
+		
+		rootIndex = self.model.index( 0, 0 )
+		parentIndex = self.model.index( 1, 0, rootIndex )
+		childIndex = self.model.index( 0, 0, parentIndex )
+		
+		self.assertEqual( self.model.parent( childIndex ), parentIndex )
+	
+	
+	def testParentAfterEdits( self ) -> None:
+		'''
+		Test parent of all items after inserting, moving and removing rows.
+		'''
+		
+		model = GenericItemModel[GenericItem](
+			datasource = [],
+			dataTypes = [ GenericItem ],
+		)
+		rootIndex = model.index( 0, 0 )
+		
+		for _ in range( 3 ):
+			model.insertItem( ContainerItem( items = [ GenericItem() ] ) )
+		
+		model.insertItem( GenericItem(), 0, model.index( 1, 0, rootIndex ) )
+		model.moveRows( rootIndex, 0, 1, rootIndex, -1 )
+		model.moveRows( model.index( 0, 0, rootIndex ), 0, 2, model.index( 1, 0, rootIndex ), 0 )
+		model.removeRows( 0, 1, rootIndex )
+		
+		self.assertEqual( model.rowCount( rootIndex ), 2 )
+		self.assertEqual( model.rowCount( model.index( 0, 0, rootIndex ) ), 3 )
+		
+		for row in range( model.rowCount( rootIndex ) ):
+			parentIndex = model.index( row, 0, rootIndex )
+			
+			self.assertEqual( model.parent( parentIndex ), rootIndex )
+			
+			for childRow in range( model.rowCount( parentIndex ) ):
+				self.assertEqual( model.parent( model.index( childRow, 0, parentIndex ) ), parentIndex )
+
+
+
+class GenericItemModelMoveTests( TestCase ):
+	'''
+	Tests for `moveRows` method of `GenericItemModel`.
+	'''
+	
+	@override
+	def setUp( self ) -> None:
+		'''
+		Setup for all tests.
+		'''
+		
+		UniqueSerializable.clearInstanceRegistry()
+		
+		self.circuit = createCircuit( createConduitRun() )
+		self.upstreamCircuit = UpstreamCircuit(
+			breakerCurve	= BreakerCurve.C,
+			length			= 10.0,
+			loadType		= self.circuit.loadType,
+			name			= 'Test Upstream Circuit',
+			supply			= self.circuit.supply,
+			wireType		= self.circuit.wireType,
+		)
+		self.project = Project(
+			circuits		= [ self.upstreamCircuit, self.circuit ],
+			name			= 'Test Project',
+		)
+		self.model = GenericItemModel[BaseCircuit](
+			datasource = self.project.circuits,
+			dataTypes = [ BaseCircuit ],
+		)
+	
+	
+	def testMoveThroughHooks( self ) -> None:
+		'''
+		Moved items should be removed and inserted through `GenericItem` hooks, updating
+		back-references and cached values.
+		'''
+		
+		rootIndex = self.model.index( 0, 0 )
+		upstreamIndex = self.model.index( 0, 0, rootIndex )
+		self.assertEqual( self.upstreamCircuit.power, 0 )
+		
+		self.model.moveRows( rootIndex, 1, 1, upstreamIndex, 0 )
+		
+		self.assertEqual( self.upstreamCircuit.power, 5000 )
+		self.assertIs( self.circuit.upstreamCircuit, self.upstreamCircuit )
+		
+		self.model.moveRows( upstreamIndex, 0, 1, rootIndex, -1 )
+		
+		self.assertEqual( self.upstreamCircuit.power, 0 )
+		self.assertIsNone( self.circuit.upstreamCircuit )
+		self.assertIs( self.project.circuits[1], self.circuit )
+	
+	
+	def testInvalidMove( self ) -> None:
+		'''
+		Items shouldn't be removed when they can't be moved to the destination.
+		'''
+		
+		rootIndex = self.model.index( 0, 0 )
+		circuitIndex = self.model.index( 1, 0, rootIndex )
+		
+		with self.assertRaises( ValueError ):
+			self.model.moveRows( rootIndex, 0, 1, circuitIndex, 0 )
+		
+		self.assertEqual( self.project.circuits, [ self.upstreamCircuit, self.circuit ] )
\ No newline at end of file
@@ -0,0 +1,95 @@
+# 
+# NBR 5410 Calculator
+# 
+# 
+# Author: Marcelo Tellier Sartori Vaz <marcelotsvaz@gmail.com>
+
+
+
+import json
+import subprocess
+import sys
+from unittest import TestCase
+
+
+
+class ImportTests( TestCase ):
+	'''
+	Tests for modules loaded by the calculation core.
+	'''
+	
+	coreModules = [
+		'nbr_5410_calculator.batch',
+		'nbr_5410_calculator.main',
+		'nbr_5410_calculator.installation.catalogs',
+		'nbr_5410_calculator.installation.circuit',
+		'nbr_5410_calculator.installation.conduitRun',
+		'nbr_5410_calculator.installation.dependencies',
+		'nbr_5410_calculator.installation.project',
+		'nbr_5410_calculator.installation.projectFile',
+		'nbr_5410_calculator.installation.projectStore',
+		'nbr_5410_calculator.installation.sizing',
+		'nbr_5410_calculator.installation.util',
+	]
+	
+	# Qt and modules adapting the core to Qt.
+	forbiddenModules = [
+		'PySide6',
+		'shiboken6',
+		'nbr_5410_calculator.generic_model_views.models',
+		'nbr_5410_calculator.generic_model_views.views',
+		'nbr_5410_calculator.ui',
+	]
+	
+	
+	def importModules( self, modules: list[str] ) -> list[str]:
+		'''
+		Import `modules` in a new interpreter and return all modules loaded.
+		'''
+		
+		script = (
+			'import importlib, json, sys\n'
+			f'for module in {modules!r}:\n'
+			'	importlib.import_module( module )\n'
+			'print( json.dumps( list( sys.modules ) ) )\n'
+		)
+		process = subprocess.run(
+			[ sys.executable, '-c', script ],
+			capture_output = True,
+			check = True,
+			text = True,
+		)
+		
+		return json.loads( process.stdout )
+	
+	
+	def testCoreWithoutQt( self ) -> None:
+		'''
+		The calculation core should be importable without loading Qt.
+		'''
+		
+		for module in self.coreModules:
+			with self.subTest( module = module ):
+				loadedModules = self.importModules( [ module ] )
+				
+				for forbiddenModule in self.forbiddenModules:
+					self.assertNotIn( forbiddenModule, loadedModules )
+	
+	
+	def testDeferredSchemaBuilding( self ) -> None:
+		'''
+		Models should only be built on first use, and only those actually used.
+		'''
+		
+		script = (
+			'from nbr_5410_calculator.installation.circuit import Circuit, Supply\n'
+			'from nbr_5410_calculator.installation.project import Project\n'
+			'assert not Project.__pydantic_complete__\n'
+			'assert not Circuit.__pydantic_complete__\n'
+			'Supply( voltage = 127 )\n'
+			'assert Supply.__pydantic_complete__\n'
+			'assert not Project.__pydantic_complete__\n'
+		)
+		process = subprocess.run( [ sys.executable, '-c', script ], capture_output = True, check = False )
+		
+		self.assertEqual( process.returncode, 0, process.stderr )
\ No newline at end of file
@@ -0,0 +1,64 @@
+# 
+# NBR 5410 Calculator
+# 
+# 
+# Author: Marcelo Tellier Sartori Vaz <marcelotsvaz@gmail.com>
+
+
+
+import pickle
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from nbr_5410_calculator.installation.catalogs import compileCatalogs, dumpCatalogs, loadCatalogs
+
+
+
+class CatalogsTests( TestCase ):
+	'''
+	Tests for compiled catalogs.
+	'''
+	
+	def testCompileCatalogs( self ) -> None:
+		'''
+		All catalogs in `share/data/` should be compiled.
+		'''
+		
+		catalogs = compileCatalogs()
+		
+		self.assertIn( 'breakers', catalogs )
+		self.assertIn( 'conduit/rigid', catalogs )
+		self.assertIn( 'wireTypes/copper-pvc', catalogs )
+		self.assertEqual( catalogs['breakers']['c'][0], 6 )
+		self.assertEqual(
+			len( catalogs['conduit/rigid']['internalSections'] ),
+			len( catalogs['conduit/rigid']['internalDiameters'] ),
+		)
+	
+	
+	def testArtifact( self ) -> None:
+		'''
+		Catalogs loaded from the artifact should be the same as those compiled from source.
+		'''
+		
+		catalogs = compileCatalogs()
+		
+		self.assertEqual( pickle.loads( dumpCatalogs( catalogs ) ), catalogs )
+		self.assertEqual( loadCatalogs(), catalogs )
+	
+	
+	def testInvalidCatalog( self ) -> None:
+		'''
+		Catalogs with columns of different lengths should raise an exception.
+		'''
+		
+		with TemporaryDirectory() as directory:
+			path = Path( directory ) / 'conduit/test.json5'
+			path.parent.mkdir()
+			path.write_text(
+				'{ nominalDiameters: [ "1/2\\"" ], externalDiameters: [ 20.8 ], internalDiameters: [] }'
+			)
+			
+			with self.assertRaises( ValueError ):
+				compileCatalogs( Path( directory ) )
\ No newline at end of file
@@ -8,15 +8,27 @@
 
 from typing import override
 from unittest import TestCase
+from unittest.mock import patch
 
-from nbr_5410_calculator.installation.circuit import Circuit, UpstreamCircuit
-from nbr_5410_calculator.installation.util import UniqueSerializable
+from pydantic import ValidationError
+
+from nbr_5410_calculator.installation.circuit import (
+	BaseCircuit,
+	Breaker,
+	BreakerCurve,
+	Circuit,
+	LoadType,
+	UpstreamCircuit,
+)
+from nbr_5410_calculator.installation.conduitRun import ReferenceMethod
+from nbr_5410_calculator.installation.util import ProjectError, UniqueSerializable
 from tests.installation.util import (
 	createCircuit,
 	createCircuitDict,
 	createConduitRun,
 	createUpstreamCircuit,
 	createUpstreamCircuitDict,
+	createWireType,
 )
 
 
@@ -155,6 +167,109 @@ class CircuitWireTests( BaseCircuitTests ):
 
 
 
+class WireTableTests( TestCase ):
+	'''
+	Tests for `WireTable` class.
+	'''
+	
+	@override
+	def setUp( self ) -> None:
+		'''
+		Setup for all tests.
+		'''
+		
+		UniqueSerializable.clearInstanceRegistry()
+		
+		self.wireType = createWireType()
+		self.wireTable = self.wireType.getWireTable( ReferenceMethod.B1, 3 )
+	
+	
+	def testSharedTable( self ) -> None:
+		'''
+		Tables should be shared between calls.
+		'''
+		
+		self.assertIs( self.wireType.getWireTable( ReferenceMethod.B1, 3 ), self.wireTable )
+	
+	
+	def testIndexBySection( self ) -> None:
+		'''
+		Smallest size with at least the given section.
+		'''
+		
+		index = self.wireTable.indexBySection( 2.5 )
+		
+		assert index is not None
+		self.assertEqual( self.wireTable.sections[index], 2.5 )
+	
+	
+	def testIndexByCapacity( self ) -> None:
+		'''
+		Smallest size with at least the given capacity.
+		'''
+		
+		index = self.wireTable.indexByCapacity( 50.0, 1.0 )
+		
+		assert index is not None
+		self.assertEqual( self.wireTable.sections[index], 10.0 )
+	
+	
+	def testIndexByCorrectedCapacity( self ) -> None:
+		'''
+		Smallest size with at least the given capacity after correction.
+		'''
+		
+		index = self.wireTable.indexByCapacity( 50.0, 0.7 )
+		
+		assert index is not None
+		self.assertEqual( self.wireTable.sections[index], 25.0 )
+	
+	
+	def testIndexByVoltageDrop( self ) -> None:
+		'''
+		Smallest size with voltage drop within the given limit.
+		'''
+		
+		index = self.wireTable.indexByVoltageDrop( 50.0, 25.0, 100.0, 0.04 )
+		
+		assert index is not None
+		self.assertEqual( self.wireTable.sections[index], 16.0 )
+	
+	
+	def testIndexByVoltageDropWithoutLength( self ) -> None:
+		'''
+		Any size is suitable for a circuit without length.
+		'''
+		
+		index = self.wireTable.indexByVoltageDrop( 50.0, 0.0, 100.0, 0.04 )
+		
+		assert index is not None
+		self.assertEqual( self.wireTable.sections[index], 1.0 )
+	
+	
+	def testNoSuitableSize( self ) -> None:
+		'''
+		No index should be returned when no size is suitable.
+		'''
+		
+		self.assertIsNone( self.wireTable.indexBySection( 1000.0 ) )
+		self.assertIsNone( self.wireTable.indexByCapacity( 1000.0, 1.0 ) )
+		self.assertIsNone( self.wireTable.indexByVoltageDrop( 50.0, 10_000.0, 100.0, 0.04 ) )
+	
+	
+	def testWire( self ) -> None:
+		'''
+		Only selected size should be created as a `Wire`.
+		'''
+		
+		wire = self.wireTable.wire( 6, self.wireType, 0.7 )
+		
+		self.assertEqual( wire.section, 16.0 )
+		self.assertEqual( wire.uncorrectedCapacity, 68.0 )
+		self.assertEqual( wire.correctionFactor, 0.7 )
+
+
+
 class CircuitVoltageDropTests( BaseCircuitTests ):
 	'''
 	Voltage drop tests for `Circuit` class.
@@ -199,6 +314,74 @@ class CircuitBreakerTests( BaseCircuitTests ):
 		
 		self.circuit.power = 5500
 		self.assertEqual( self.circuit.breaker.current, 63 )
+	
+	
+	def testSharedBreaker( self ) -> None:
+		'''
+		Breakers should be shared between circuits and compared by identity.
+		'''
+		
+		breaker = Breaker.model_validate( { 'current': 50, 'curve': BreakerCurve.C } )
+		
+		self.assertIs( self.circuit.breaker, breaker )
+		self.assertIs( Breaker.forCurrent( BreakerCurve.C, 41.0 ), breaker )
+	
+	
+	def testNoSuitableBreaker( self ) -> None:
+		'''
+		Current above largest available breaker should raise an exception.
+		'''
+		
+		self.circuit.power = 20_000
+		
+		with self.assertRaises( ProjectError ):
+			_ = self.circuit.breaker
+
+
+
+class CircuitCacheTests( BaseCircuitTests ):
+	'''
+	Tests for cached calculations in `Circuit` class.
+	'''
+	
+	def testCachedWire( self ) -> None:
+		'''
+		Wire should only be recalculated after an input changes.
+		'''
+		
+		self.assertIs( self.circuit.wire, self.circuit.wire )
+	
+	
+	def testCacheInvalidatedByCircuit( self ) -> None:
+		'''
+		Changing a field of the circuit should invalidate cached results.
+		'''
+		
+		self.assertEqual( self.circuit.wire.section, 10.0 )
+		self.circuit.length = 25
+		self.assertEqual( self.circuit.wire.section, 16.0 )
+	
+	
+	def testCacheInvalidatedBySupply( self ) -> None:
+		'''
+		Changing the circuit's `Supply` should invalidate cached results.
+		'''
+		
+		self.assertEqual( self.circuit.current, 50.0 )
+		self.circuit.supply.phases = 2
+		self.assertEqual( self.circuit.current, 25.0 )
+	
+	
+	def testCacheInvalidatedByConduitRun( self ) -> None:
+		'''
+		Changing temperature or grouping of the circuit's `ConduitRun` should invalidate cached
+		results.
+		'''
+		
+		self.assertEqual( self.circuit.wire.section, 10.0 )
+		_ = createCircuit( self.circuit.conduitRun )
+		self.circuit.conduitRun.temperature = 40
+		self.assertEqual( self.circuit.wire.section, 16.0 )
 
 
 
@@ -220,7 +403,39 @@ class CircuitSerializationTests( BaseCircuitTests ):
 		Test deserialization.
 		'''
 		
-		self.assertEqual( Circuit.model_validate( createCircuitDict() ), self.circuit )
+		circuit = Circuit.model_validate( createCircuitDict() )
+		
+		self.assertTrue( circuit.structurallyEqual( self.circuit ) )
+	
+	
+	def testDeserializeAsSubclass( self ) -> None:
+		'''
+		Test deserialization through a base class, without modifying the input.
+		'''
+		
+		circuitDict = createCircuitDict()
+		
+		circuit = BaseCircuit.model_validate( circuitDict )
+		
+		self.assertTrue( circuit.structurallyEqual( self.circuit ) )
+		self.assertEqual( circuitDict, createCircuitDict() )
+	
+	
+	def testDeserializeInvalidType( self ) -> None:
+		'''
+		Test deserialization with `__type__` of a class that isn't a subclass.
+		'''
+		
+		circuitDict = createCircuitDict()
+		circuitDict['__type__'] = 'nbr_5410_calculator.installation.circuit.UpstreamCircuit'
+		
+		with self.assertRaises( TypeError ):
+			Circuit.model_validate( circuitDict )
+		
+		circuitDict['__type__'] = 'nbr_5410_calculator.installation.conduitRun.ConduitRun'
+		
+		with self.assertRaises( ValidationError ):
+			UpstreamCircuit.model_validate( createUpstreamCircuitDict( [ circuitDict ] ) )
 
 
 
@@ -255,6 +470,63 @@ class UpstreamCircuitTests( BaseCircuitTests ):
 		self.assertEqual( self.upstreamCircuit.power, 7_500.0 )
 	
 	
+	def testCachedPower( self ) -> None:
+		'''
+		Total power should be updated after a change in any nested downstream circuit.
+		'''
+		
+		circuit = self.upstreamCircuit.circuits[0]
+		upstreamCircuit = UpstreamCircuit(
+			breakerCurve	= BreakerCurve.C,
+			circuits		= [ self.upstreamCircuit ],
+			length			= 10.0,
+			loadType		= LoadType( name = 'Feeder', minimumWireSection = 2.5, demandFactor = 1.0 ),
+			name			= 'Test Upstream Circuit',
+			supply			= self.upstreamCircuit.supply,
+			wireType		= self.upstreamCircuit.wireType,
+		)
+		self.assertEqual( upstreamCircuit.power, 15_000.0 )
+		
+		circuit.power = 1000
+		self.assertEqual( upstreamCircuit.power, 3_000.0 )
+		
+		circuit.loadType.demandFactor = 0.5
+		# Same load type used by the intermediate upstream circuit.
+		self.assertEqual( upstreamCircuit.power, 750.0 )
+	
+	
+	def testUnrelatedLoadTypeKeepsPower( self ) -> None:
+		'''
+		Changing a load type not used by downstream circuits should keep the cached total power.
+		'''
+		
+		self.assertEqual( self.upstreamCircuit.power, 15_000.0 )
+		loadType = LoadType( name = 'Lighting', minimumWireSection = 1.5, demandFactor = 1.0 )
+		loadType.demandFactor = 0.5
+		
+		with patch( f'{UpstreamCircuit.__module__}.sum', wraps = sum, create = True ) as total:
+			self.assertEqual( self.upstreamCircuit.power, 15_000.0 )
+		
+		total.assert_not_called()
+	
+	
+	def testPowerAfterInsertAndRemove( self ) -> None:
+		'''
+		Total power should be updated after downstream circuits are inserted or removed.
+		'''
+		
+		circuit = self.upstreamCircuit.circuits[0]
+		self.assertEqual( self.upstreamCircuit.power, 15_000.0 )
+		
+		self.upstreamCircuit.removeChild( 0, circuit )
+		self.assertEqual( self.upstreamCircuit.power, 10_000.0 )
+		self.assertIsNone( circuit.upstreamCircuit )
+		
+		self.upstreamCircuit.insertChild( 0, self.circuit )
+		self.assertEqual( self.upstreamCircuit.power, 15_000.0 )
+		self.assertIs( self.circuit.upstreamCircuit, self.upstreamCircuit )
+	
+	
 	def testSerialize( self ) -> None:
 		'''
 		Test serialization.
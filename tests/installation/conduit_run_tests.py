@@ -11,8 +11,11 @@ from unittest import TestCase
 
 from nbr_5410_calculator.installation.conduitRun import (
 	Conduit,
+	ConduitCatalog,
 	ConduitRun,
 	ConduitType,
+	GroupingCorrectionFactor,
+	TemperatureCorrectionFactor,
 )
 from nbr_5410_calculator.installation.util import ProjectError, UniqueSerializable
 from tests.installation.util import (
@@ -45,6 +48,57 @@ class ConduitTests( TestCase ):
 
 
 
+class ConduitCatalogTests( TestCase ):
+	'''
+	Tests for `ConduitCatalog` class.
+	'''
+	
+	def testCatalogs( self ) -> None:
+		'''
+		Catalogs should be available for all conduit types, sorted by section.
+		'''
+		
+		for conduitType in ConduitType:
+			with self.subTest( conduitType = conduitType ):
+				catalog = ConduitCatalog.getCatalog( conduitType )
+				
+				self.assertIs( catalog.conduitType, conduitType )
+				self.assertTrue( all( conduit.conduitType is conduitType for conduit in catalog.conduits ) )
+				self.assertEqual( list( catalog.sections ), sorted( catalog.sections ) )
+	
+	
+	def testCatalogByBrandAndModel( self ) -> None:
+		'''
+		Catalogs should be indexed by brand and model.
+		'''
+		
+		catalog = ConduitCatalog.getCatalog( ConduitType.FLEXIBLE, 'Tigre', 'Tigreflex' )
+		
+		self.assertEqual( catalog.model, 'Tigreflex' )
+		
+		with self.assertRaises( ProjectError ):
+			ConduitCatalog.getCatalog( ConduitType.FLEXIBLE, 'Tigre', 'Unknown' )
+	
+	
+	def testForFilledSection( self ) -> None:
+		'''
+		Smallest conduit with enough section for the given maximum fill factor.
+		'''
+		
+		catalog = ConduitCatalog.getCatalog( ConduitType.RIGID )
+		conduit = catalog.forFilledSection( 100.0, 0.4 )
+		
+		assert conduit is not None
+		self.assertGreaterEqual( conduit.section * 0.4, 100.0 )
+		self.assertTrue( all(
+			other.section * 0.4 < 100.0
+			for other in catalog.conduits
+			if other.section < conduit.section
+		) )
+		self.assertIsNone( catalog.forFilledSection( 1e6, 0.4 ) )
+
+
+
 class BaseConduitRunTests( TestCase ):
 	'''
 	Base class for all `ConduitRun` tests.
@@ -106,6 +160,30 @@ class ConduitRunBasicTests( BaseConduitRunTests ):
 		self.conduitRun.circuits[0].supply.hasGround = False
 		
 		self.assertAlmostEqual( self.conduitRun.fillFactor, 0.258849, 6 )
+	
+	
+	def testCachedEvaluation( self ) -> None:
+		'''
+		Results should only be recalculated after a change in any circuit's wire.
+		'''
+		
+		results = self.conduitRun.evaluate()
+		self.assertIs( self.conduitRun.evaluate(), results )
+		
+		self.conduitRun.temperature = 40
+		self.assertIsNot( self.conduitRun.evaluate(), results )
+		self.assertGreater( self.conduitRun.filledSection, results.filledSection )
+	
+	
+	def testFlexibleConduit( self ) -> None:
+		'''
+		Conduit should be selected from the catalog for the run's conduit type.
+		'''
+		
+		self.conduitRun.circuits = self.conduitRun.circuits[:1]
+		self.conduitRun.conduitType = ConduitType.FLEXIBLE
+		
+		self.assertIs( self.conduitRun.conduit.conduitType, ConduitType.FLEXIBLE )
 
 
 
@@ -161,6 +239,33 @@ class ConduitRunCorrectionFactorTests( BaseConduitRunTests ):
 		
 		with self.assertRaises( ProjectError ):
 			_ = self.conduitRun.correctionFactor
+	
+	
+	def testTemperatureCorrectionVectorized( self ) -> None:
+		'''
+		Vectorized temperature correction should match scalar temperature correction.
+		'''
+		
+		temperatures = list( range( -10, 61 ) )
+		
+		self.assertEqual(
+			TemperatureCorrectionFactor.forTemperatures( temperatures ).tolist(),
+			[ TemperatureCorrectionFactor.forTemperature( temperature ) for temperature in temperatures ],
+		)
+		
+		with self.assertRaises( ProjectError ):
+			TemperatureCorrectionFactor.forTemperatures( [ 30, 70 ] )
+	
+	
+	def testGroupingFactorLargeGroups( self ) -> None:
+		'''
+		Test grouping factor for groups of more than 9 circuits, including above the largest in the
+		table.
+		'''
+		
+		self.assertEqual( GroupingCorrectionFactor.forGrouping( 12 ), 0.45 )
+		self.assertEqual( GroupingCorrectionFactor.forGrouping( 20 ), 0.38 )
+		self.assertEqual( GroupingCorrectionFactor.forGrouping( 25 ), 0.38 )
 
 
 
@@ -182,4 +287,6 @@ class ConduitRunSerializationTests( BaseConduitRunTests ):
 		Test deserialization.
 		'''
 		
-		self.assertEqual( ConduitRun.model_validate( self.conduitRunDict ), self.conduitRun )
\ No newline at end of file
+		conduitRun = ConduitRun.model_validate( self.conduitRunDict )
+		
+		self.assertTrue( conduitRun.structurallyEqual( self.conduitRun ) )
\ No newline at end of file
@@ -0,0 +1,185 @@
+# 
+# NBR 5410 Calculator
+# 
+# 
+# Author: Marcelo Tellier Sartori Vaz <marcelotsvaz@gmail.com>
+
+
+
+from collections.abc import Sequence
+from typing import override
+from unittest import TestCase
+
+from nbr_5410_calculator.installation.circuit import BreakerCurve, Circuit, Supply, UpstreamCircuit
+from nbr_5410_calculator.installation.dependencies import DependencyGraph
+from nbr_5410_calculator.installation.project import Project
+from nbr_5410_calculator.installation.util import UniqueSerializable
+from tests.installation.util import createConduitRun, createLoadType, createWireType
+
+
+
+class DependencyGraphTests( TestCase ):
+	'''
+	Tests for `DependencyGraph` class.
+	'''
+	
+	@override
+	def setUp( self ) -> None:
+		'''
+		Setup for all tests.
+		'''
+		
+		UniqueSerializable.clearInstanceRegistry()
+		
+		self.supplyA = Supply( voltage = 127 )
+		self.supplyB = Supply( voltage = 220 )
+		self.loadType = createLoadType()
+		self.wireType = createWireType()
+		self.conduitRun = createConduitRun()
+		
+		self.circuitA = self.createCircuit( self.supplyA )
+		self.circuitB = self.createCircuit( self.supplyB )
+		self.upstreamCircuit = UpstreamCircuit(
+			breakerCurve	= BreakerCurve.C,
+			circuits		= [ self.circuitA ],
+			length			= 10.0,
+			loadType		= self.loadType,
+			name			= 'Test Upstream Circuit',
+			supply			= self.supplyB,
+			wireType		= self.wireType,
+		)
+		self.conduitRun.circuits.append( self.circuitA )
+		
+		self.project = Project(
+			circuits		= [ self.upstreamCircuit, self.circuitB ],
+			conduitRuns		= [ self.conduitRun ],
+			loadTypes		= [ self.loadType ],
+			name			= 'Test Project',
+			supplies		= [ self.supplyA, self.supplyB ],
+			wireTypes		= [ self.wireType ],
+		)
+		self.graph = DependencyGraph( self.project )
+	
+	
+	def createCircuit( self, supply: Supply ) -> Circuit:
+		'''
+		Create a circuit using `supply`.
+		'''
+		
+		return Circuit(
+			breakerCurve	= BreakerCurve.C,
+			length			= 10.0,
+			loadPower		= 1000,
+			loadType		= self.loadType,
+			name			= 'Test Circuit',
+			supply			= supply,
+			wireType		= self.wireType,
+		)
+	
+	
+	def assertSameItems( self, first: Sequence[object], second: Sequence[object] ) -> None:
+		'''
+		Assert that both lists contain the same items, by identity and in any order.
+		'''
+		
+		self.assertCountEqual( map( id, first ), map( id, second ) )
+	
+	
+	def testSupplyDependents( self ) -> None:
+		'''
+		Only circuits using a supply and their upstream circuits should be affected.
+		'''
+		
+		self.assertSameItems(
+			self.graph.dependentsOf( self.supplyA ),
+			[ self.circuitA, self.upstreamCircuit ],
+		)
+		self.assertSameItems(
+			self.graph.dependentsOf( self.supplyB ),
+			[ self.circuitB, self.upstreamCircuit ],
+		)
+	
+	
+	def testConduitRunDependents( self ) -> None:
+		'''
+		Circuits in a conduit run depend on it through its correction factor.
+		'''
+		
+		self.assertSameItems(
+			self.graph.dependentsOf( self.conduitRun ),
+			[ self.circuitA, self.upstreamCircuit ],
+		)
+	
+	
+	def testConduitRunCircuits( self ) -> None:
+		'''
+		Editing a circuit should affect its conduit run, but not other circuits in the run.
+		'''
+		
+		self.conduitRun.circuits.append( self.circuitB )
+		self.circuitB.conduitRun = self.conduitRun
+		self.graph.rebuild()
+		
+		self.assertSameItems( self.graph.takeDirtyItems(), [ self.circuitB, self.conduitRun ] )
+		
+		self.graph.notifyChanged( self.circuitA )
+		
+		self.assertSameItems(
+			self.graph.dirtyItems,
+			[ self.circuitA, self.upstreamCircuit, self.conduitRun ],
+		)
+	
+	
+	def testRecompute( self ) -> None:
+		'''
+		Only items marked as changed should be recalculated, and only once.
+		'''
+		
+		self.supplyA.voltage = 220
+		self.graph.notifyChanged( self.supplyA )
+		
+		self.assertSameItems(
+			self.graph.recompute(),
+			[ self.supplyA, self.circuitA, self.upstreamCircuit, self.conduitRun ],
+		)
+		self.assertEqual( self.graph.recompute(), [] )
+		self.assertAlmostEqual( self.circuitA.current, 1000 / 220 )
+	
+	
+	def testRebuild( self ) -> None:
+		'''
+		Rebuilding should only mark items added to the project or with different dependencies.
+		'''
+		
+		self.graph.rebuild()
+		
+		self.assertEqual( self.graph.dirtyItems, [] )
+		
+		circuit = self.createCircuit( self.supplyA )
+		self.upstreamCircuit.circuits.remove( self.circuitA )
+		self.upstreamCircuit.circuits.append( circuit )
+		self.project.circuits.append( self.circuitA )
+		self.graph.rebuild()
+		
+		self.assertSameItems( self.graph.takeDirtyItems(), [ circuit, self.upstreamCircuit ] )
+	
+	
+	def testChangedSupply( self ) -> None:
+		'''
+		Dependencies should follow a circuit assigned to a different supply.
+		'''
+		
+		self.circuitB.supply = self.supplyA
+		self.graph.notifyChanged( self.circuitB )
+		
+		self.assertIn( self.circuitB, self.graph.dependentsOf( self.supplyA ) )
+		self.assertNotIn( self.circuitB, self.graph.dependentsOf( self.supplyB ) )
+	
+	
+	def testUnknownItem( self ) -> None:
+		'''
+		Items not in the project should raise an exception.
+		'''
+		
+		with self.assertRaises( KeyError ):
+			self.graph.notifyChanged( Supply( voltage = 127 ) )
@@ -0,0 +1,305 @@
+# 
+# NBR 5410 Calculator
+# 
+# 
+# Author: Marcelo Tellier Sartori Vaz <marcelotsvaz@gmail.com>
+
+
+
+import json
+from io import BytesIO
+from typing import override
+from unittest import TestCase
+
+from pydantic import ValidationError
+
+from nbr_5410_calculator.installation.circuit import UpstreamCircuit
+from nbr_5410_calculator.installation.projectFile import (
+	ProjectWriter,
+	dumpProject,
+	dumpProjectIncrementally,
+	loadProject,
+	loadProjectIncrementally,
+	readProject,
+)
+from nbr_5410_calculator.installation.util import UniqueSerializable
+from tests.installation.util import createProject
+
+
+
+class ProjectFileTests( TestCase ):
+	'''
+	Tests for `dumpProject` and `loadProject`.
+	'''
+	
+	@override
+	def setUp( self ) -> None:
+		'''
+		Setup for all tests.
+		'''
+		
+		UniqueSerializable.clearInstanceRegistry()
+		
+		self.project = createProject()
+		self.project.supplies = [ self.project.circuits[0].supply ]
+		self.project.defaultSupply = self.project.circuits[0].supply
+	
+	
+	def testDump( self ) -> None:
+		'''
+		Test that each item is serialized once and referenced by UUID afterwards.
+		'''
+		
+		fileData = json.loads( dumpProject( self.project ) )
+		projectData = fileData['project']
+		circuit = self.project.circuits[0]
+		
+		self.assertEqual( fileData['version'], 2 )
+		self.assertEqual( projectData['supplies'][0]['voltage'], 100 )
+		self.assertEqual( projectData['defaultSupply'], str( circuit.supply.uuid ) )
+		self.assertEqual( projectData['circuits'][0]['supply'], str( circuit.supply.uuid ) )
+		self.assertEqual( projectData['circuits'][0]['loadType']['name'], 'Power' )
+		self.assertEqual( projectData['circuits'][1], str( circuit.uuid ) )
+		self.assertEqual( projectData['conduitRuns'][0]['circuits'], [ str( circuit.uuid ) ] )
+	
+	
+	def testLoad( self ) -> None:
+		'''
+		Test that references are resolved to the same instances.
+		'''
+		
+		data = dumpProject( self.project )
+		
+		with UniqueSerializable.session():
+			project = loadProject( data )
+		
+		circuit = project.circuits[0]
+		
+		self.assertIsNot( project, self.project )
+		self.assertEqual( project.model_dump(), self.project.model_dump() )
+		self.assertIs( circuit.supply, project.supplies[0] )
+		self.assertIs( project.defaultSupply, project.supplies[0] )
+		self.assertIs( project.circuits[1], circuit )
+		self.assertIs( project.conduitRuns[0].circuits[0], circuit )
+		self.assertIs( circuit.conduitRun, project.conduitRuns[0] )
+	
+	
+	def testLoadVersion1( self ) -> None:
+		'''
+		Test loading files with full copies of items.
+		'''
+		
+		data = self.project.model_dump_json().encode()
+		
+		with UniqueSerializable.session():
+			project = loadProject( data )
+		
+		self.assertEqual( project.model_dump(), self.project.model_dump() )
+		self.assertIs( project.conduitRuns[0].circuits[0], project.circuits[0] )
+	
+	
+	def testLoadInvalidReference( self ) -> None:
+		'''
+		Test loading files with references to undefined items or items of the wrong class.
+		'''
+		
+		fileData = json.loads( dumpProject( self.project ) )
+		circuitUuid = fileData['project']['circuits'][1]
+		
+		fileData['project']['defaultSupply'] = circuitUuid
+		
+		with self.assertRaises( ValidationError ), UniqueSerializable.session():
+			loadProject( json.dumps( fileData ).encode() )
+		
+		fileData['project']['defaultSupply'] = None
+		fileData['project']['circuits'][0] = circuitUuid
+		
+		with self.assertRaises( ValidationError ), UniqueSerializable.session():
+			loadProject( json.dumps( fileData ).encode() )
+	
+	
+	def testIncremental( self ) -> None:
+		'''
+		Test dumping and loading one top-level circuit or conduit run at a time.
+		'''
+		
+		self._createUpstreamCircuit()
+		data = dumpProject( self.project )
+		file = BytesIO()
+		ProjectWriter( file ).writeProject( self.project )
+		chunks = list( dumpProjectIncrementally( self.project ) )
+		
+		# Header, upstream circuit with its downstream circuit and conduit run.
+		self.assertEqual( [ chunk.count( b'\n' ) for chunk in chunks ], [ 1, 2, 1 ] )
+		self.assertEqual( b''.join( chunks ), file.getvalue() )
+		
+		for fileData in ( data, self.project.model_dump_json().encode() ):
+			with UniqueSerializable.session():
+				steps = list( loadProjectIncrementally( fileData ) )
+			
+			project, progress = steps[-1]
+			circuit = project.conduitRuns[0].circuits[0]
+			
+			self.assertEqual( len( steps ), 3 )
+			self.assertEqual( progress, 1.0 )
+			self.assertEqual( project.model_dump(), self.project.model_dump() )
+			self.assertIs( project.circuits[0].children[0], circuit )
+			self.assertIs( circuit.conduitRun, project.conduitRuns[0] )
+			self.assertIs( circuit.project, project )
+	
+	
+	def _createUpstreamCircuit( self ) -> UpstreamCircuit:
+		'''
+		Move first circuit of the project into a new upstream circuit.
+		'''
+		
+		circuit = self.project.circuits[0]
+		upstreamCircuit = UpstreamCircuit(
+			breakerCurve		= circuit.breakerCurve,
+			circuits			= [ circuit ],
+			length				= 20.0,
+			loadType			= circuit.loadType,
+			name				= 'Test Upstream Circuit',
+			supply				= circuit.supply,
+			wireType			= circuit.wireType,
+		)
+		self.project.circuits = [ upstreamCircuit ]
+		self.project.conduitRuns = self.project.conduitRuns[:1]
+		
+		return upstreamCircuit
+	
+	
+	def testWriteStream( self ) -> None:
+		'''
+		Test writing one record per line, with downstream circuits in their own records.
+		'''
+		
+		upstreamCircuit = self._createUpstreamCircuit()
+		circuit = upstreamCircuit.circuits[0]
+		file = BytesIO()
+		
+		ProjectWriter( file ).writeProject( self.project )
+		
+		header, *records = map( json.loads, file.getvalue().splitlines() )
+		
+		self.assertEqual( header['version'], 3 )
+		self.assertEqual( header['project']['supplies'][0]['voltage'], 100 )
+		self.assertNotIn( 'circuits', header['project'] )
+		self.assertEqual( len( records ), 3 )
+		self.assertNotIn( 'circuits', records[0]['circuit'] )
+		self.assertIsNone( records[0]['upstreamCircuit'] )
+		self.assertEqual( records[1]['circuit']['supply'], str( circuit.supply.uuid ) )
+		self.assertEqual( records[1]['upstreamCircuit'], str( upstreamCircuit.uuid ) )
+		self.assertEqual( records[2]['conduitRun']['circuits'], [ str( circuit.uuid ) ] )
+	
+	
+	def testReadStream( self ) -> None:
+		'''
+		Test that the project is built incrementally, one record at a time.
+		'''
+		
+		self._createUpstreamCircuit()
+		file = BytesIO()
+		ProjectWriter( file ).writeProject( self.project )
+		file.seek( 0 )
+		
+		with UniqueSerializable.session():
+			projects = list( readProject( file ) )
+		
+		project = projects[-1]
+		upstreamCircuit = project.circuits[0]
+		circuit = project.conduitRuns[0].circuits[0]
+		
+		self.assertEqual( len( projects ), 4 )
+		self.assertTrue( all( item is project for item in projects ) )
+		self.assertEqual( project.model_dump(), self.project.model_dump() )
+		self.assertIsInstance( upstreamCircuit, UpstreamCircuit )
+		self.assertIs( upstreamCircuit.children[0], circuit )
+		self.assertIs( circuit.upstreamCircuit, upstreamCircuit )
+		self.assertIs( circuit.conduitRun, project.conduitRuns[0] )
+		self.assertIs( circuit.project, project )
+		self.assertEqual( upstreamCircuit.power, circuit.power )
+	
+	
+	def testReadStreamOpenProject( self ) -> None:
+		'''
+		Test that reading a project that is already open doesn't add its items again.
+		'''
+		
+		upstreamCircuit = self._createUpstreamCircuit()
+		file = BytesIO()
+		ProjectWriter( file ).writeProject( self.project )
+		
+		for _ in range( 2 ):
+			project = loadProject( file.getvalue() )
+			
+			self.assertIs( project, self.project )
+			self.assertEqual( project.circuits, [ upstreamCircuit ] )
+			self.assertEqual( len( upstreamCircuit.circuits ), 1 )
+			self.assertEqual( len( project.conduitRuns ), 1 )
+	
+	
+	def testAppendStream( self ) -> None:
+		'''
+		Test appending records to an existing file with a new writer.
+		'''
+		
+		upstreamCircuit = self._createUpstreamCircuit()
+		circuit = upstreamCircuit.circuits[0]
+		file = BytesIO()
+		
+		writer = ProjectWriter( file )
+		writer.writeHeader( self.project )
+		writer.writeCircuit( upstreamCircuit )
+		
+		writer = ProjectWriter( file )
+		writer.writeCircuit( circuit )
+		
+		with UniqueSerializable.session():
+			project = loadProject( file.getvalue() )
+		
+		self.assertEqual( project.circuits[0].children[0].model_dump(), circuit.model_dump() )
+		self.assertEqual( project.conduitRuns, [] )
+	
+	
+	def testReadStreamInvalid( self ) -> None:
+		'''
+		Test reading records without header or with an invalid upstream circuit.
+		'''
+		
+		with self.assertRaises( ValueError ):
+			list( readProject( [] ) )
+		
+		upstreamCircuit = self._createUpstreamCircuit()
+		file = BytesIO()
+		
+		writer = ProjectWriter( file )
+		writer.writeHeader( self.project )
+		writer.writeCircuit( upstreamCircuit.circuits[0] )
+		
+		with self.assertRaises( ValueError ), UniqueSerializable.session():
+			loadProject( file.getvalue() )
+	
+	
+	def testReadStreamHeaderOnly( self ) -> None:
+		'''
+		Test reading a project without circuits or conduit runs.
+		'''
+		
+		self.project.circuits = []
+		self.project.conduitRuns = []
+		file = BytesIO()
+		ProjectWriter( file ).writeProject( self.project )
+		
+		with UniqueSerializable.session():
+			project = loadProject( file.getvalue() )
+			steps = list( loadProjectIncrementally( file.getvalue() ) )
+		
+		self.assertEqual( project.model_dump(), self.project.model_dump() )
+		self.assertEqual( steps, [ ( project, 1.0 ) ] )
+		
+		# Detected by the version, regardless of formatting.
+		header = json.dumps( json.loads( file.getvalue() ), indent = None ).encode()
+		
+		with UniqueSerializable.session():
+			self.assertEqual( loadProject( header ).model_dump(), self.project.model_dump() )
\ No newline at end of file
@@ -0,0 +1,174 @@
+# 
+# NBR 5410 Calculator
+# 
+# 
+# Author: Marcelo Tellier Sartori Vaz <marcelotsvaz@gmail.com>
+
+
+
+from typing import override
+from unittest import TestCase
+from uuid import uuid4
+
+from nbr_5410_calculator.installation.circuit import UpstreamCircuit
+from nbr_5410_calculator.installation.projectStore import ProjectStore
+from nbr_5410_calculator.installation.sizing import sizeCircuits
+from nbr_5410_calculator.installation.util import UniqueSerializable
+from tests.installation.util import createProject
+
+
+
+class ProjectStoreTests( TestCase ):
+	'''
+	Tests for `ProjectStore` class.
+	'''
+	
+	@override
+	def setUp( self ) -> None:
+		'''
+		Setup for all tests.
+		'''
+		
+		UniqueSerializable.clearInstanceRegistry()
+		
+		self.project = createProject()
+		self.circuit = self.project.circuits[0]
+		self.upstreamCircuit = UpstreamCircuit(
+			breakerCurve		= self.circuit.breakerCurve,
+			circuits			= [ self.circuit ],
+			length				= 20.0,
+			loadType			= self.circuit.loadType,
+			name				= 'Test Upstream Circuit',
+			supply				= self.circuit.supply,
+			wireType			= self.circuit.wireType,
+		)
+		self.project.circuits = [ self.upstreamCircuit ]
+		self.project.conduitRuns = self.project.conduitRuns[:1]
+		self.project.supplies = [ self.circuit.supply ]
+		self.project.defaultSupply = self.circuit.supply
+		
+		self.store = ProjectStore( ':memory:' )
+		self.store.saveProject( self.project )
+	
+	
+	@override
+	def tearDown( self ) -> None:
+		'''
+		Cleanup for all tests.
+		'''
+		
+		self.store.close()
+	
+	
+	def testLoadProject( self ) -> None:
+		'''
+		Test loading the whole project.
+		'''
+		
+		with UniqueSerializable.session():
+			project = self.store.loadProject()
+		
+		upstreamCircuit = project.circuits[0]
+		circuit = project.conduitRuns[0].circuits[0]
+		
+		self.assertIsNot( project, self.project )
+		self.assertEqual( project.model_dump(), self.project.model_dump() )
+		self.assertIs( upstreamCircuit.children[0], circuit )
+		self.assertIs( circuit.upstreamCircuit, upstreamCircuit )
+		self.assertIs( circuit.conduitRun, project.conduitRuns[0] )
+		self.assertIs( circuit.project, project )
+		self.assertIs( circuit.supply, project.supplies[0] )
+		self.assertIs( project.defaultSupply, project.supplies[0] )
+	
+	
+	def testLoadUnlistedItems( self ) -> None:
+		'''
+		Test loading supplies, load types and wire types used by circuits, but not listed in the project.
+		'''
+		
+		with UniqueSerializable.session():
+			project = self.store.loadProject()
+		
+		circuit = project.circuits[0]
+		
+		self.assertEqual( project.loadTypes, [] )
+		self.assertEqual( circuit.loadType.model_dump(), self.circuit.loadType.model_dump() )
+	
+	
+	def testLoadCircuit( self ) -> None:
+		'''
+		Test loading a single circuit with its downstream circuits.
+		'''
+		
+		with UniqueSerializable.session():
+			upstreamCircuit = self.store.loadCircuit( self.upstreamCircuit.uuid )
+			circuit = self.store.loadCircuit( self.circuit.uuid )
+		
+		self.assertIsInstance( upstreamCircuit, UpstreamCircuit )
+		self.assertEqual( upstreamCircuit.model_dump(), self.upstreamCircuit.model_dump() )
+		self.assertIsNone( upstreamCircuit.upstreamCircuit )
+		self.assertIs( circuit, upstreamCircuit.children[0] )
+		self.assertIsNone( circuit.conduitRun )
+		
+		with self.assertRaises( ValueError ):
+			self.store.loadCircuit( uuid4() )
+	
+	
+	def testLoadTwice( self ) -> None:
+		'''
+		Test that loading circuits already alive doesn't link their downstream circuits again.
+		'''
+		
+		with UniqueSerializable.session():
+			upstreamCircuit = self.store.loadCircuit( self.upstreamCircuit.uuid )
+			
+			self.assertIs( self.store.loadCircuit( self.upstreamCircuit.uuid ), upstreamCircuit )
+			self.assertEqual( len( upstreamCircuit.children ), 1 )
+			
+			project = self.store.loadProject()
+			
+			self.assertIs( project.circuits[0], upstreamCircuit )
+			self.assertEqual( len( upstreamCircuit.children ), 1 )
+		
+		self.store.loadProject()
+		
+		self.assertEqual( len( self.upstreamCircuit.circuits ), 1 )
+	
+	
+	def testEmptyStore( self ) -> None:
+		'''
+		Test loading from a store without project.
+		'''
+		
+		with ProjectStore( ':memory:' ) as store, self.assertRaises( ValueError ):
+			store.loadProject()
+	
+	
+	def testResults( self ) -> None:
+		'''
+		Test querying cached sizing results.
+		'''
+		
+		sizing = sizeCircuits( self.project )
+		self.store.saveResults( sizing )
+		
+		results = self.store.queryResults()
+		
+		self.assertEqual(
+			[ result.uuid for result in results ],
+			[ self.upstreamCircuit.uuid, self.circuit.uuid ],
+		)
+		self.assertEqual( results[1].upstreamCircuit, self.upstreamCircuit.uuid )
+		self.assertEqual( results[1].breaker, self.circuit.breaker.current )
+		self.assertAlmostEqual( results[1].voltageDrop or 0.0, self.circuit.voltageDrop )
+		results = self.store.circuitsWithVoltageDropAbove( self.circuit.voltageDrop )
+		
+		self.assertEqual( [ result.uuid for result in results ], [ self.upstreamCircuit.uuid ] )
+		
+		results = self.store.queryResults( upstreamCircuit = self.upstreamCircuit.uuid, valid = True )
+		
+		self.assertEqual( [ result.uuid for result in results ], [ self.circuit.uuid ] )
+		
+		self.store.saveProject( self.project )
+		
+		self.assertEqual( self.store.queryResults(), [] )
\ No newline at end of file
@@ -66,4 +66,6 @@ class ProjectSerializationTests( BaseProjectTests ):
 		Test deserialization.
 		'''
 		
-		self.assertEqual( Project.model_validate( self.projectDict ), self.project )
\ No newline at end of file
+		project = Project.model_validate( self.projectDict )
+		
+		self.assertTrue( project.structurallyEqual( self.project ) )
\ No newline at end of file
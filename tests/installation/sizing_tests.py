@@ -0,0 +1,191 @@
+# 
+# NBR 5410 Calculator
+# 
+# 
+# Author: Marcelo Tellier Sartori Vaz <marcelotsvaz@gmail.com>
+
+
+
+import warnings
+from itertools import product
+from typing import override
+from unittest import TestCase
+
+import numpy as np
+
+from nbr_5410_calculator.installation.circuit import (
+	BreakerCurve,
+	Circuit,
+	LoadType,
+	Supply,
+	UpstreamCircuit,
+	WireInsulation,
+	WireMaterial,
+	WireType,
+)
+from nbr_5410_calculator.installation.conduitRun import ConduitRun, ReferenceMethod
+from nbr_5410_calculator.installation.project import Project
+from nbr_5410_calculator.installation.sizing import SizingResults, sizeCircuits
+from nbr_5410_calculator.installation.util import ProjectError, UniqueSerializable
+from tests.installation.util import createProject, createWireType
+
+
+
+class BaseSizingTests( TestCase ):
+	'''
+	Base class for all `sizeCircuits` tests.
+	'''
+	
+	@override
+	def setUp( self ) -> None:
+		'''
+		Setup for all tests.
+		'''
+		
+		UniqueSerializable.clearInstanceRegistry()
+	
+	
+	def assertResultsMatchProperties( self, results: SizingResults ) -> None:
+		'''
+		Assert that results are the same as those calculated by each circuit.
+		'''
+		
+		for row, circuit in enumerate( results.circuits ):
+			with self.subTest( row = row ):
+				self.assertEqual( results.current[row], circuit.current )
+				
+				try:
+					breaker = circuit.breaker
+					wire = circuit.wire
+					voltageDrop = circuit.voltageDrop
+				except ProjectError:
+					self.assertFalse( results.valid[row] )
+					continue
+				
+				self.assertTrue( results.valid[row] )
+				self.assertEqual( results.breaker[row], breaker.current )
+				self.assertEqual( results.section[row], wire.section )
+				self.assertEqual( results.capacity[row], wire.capacity )
+				self.assertEqual( results.voltageDrop[row], voltageDrop )
+
+
+
+class SizingTests( BaseSizingTests ):
+	'''
+	Tests for `sizeCircuits`.
+	'''
+	
+	def testProject( self ) -> None:
+		'''
+		Test sizing of all circuits in a project.
+		'''
+		
+		project = createProject()
+		results = sizeCircuits( project )
+		
+		self.assertEqual( len( results.circuits ), 3 )
+		self.assertEqual( results.section[0], 10.0 )
+		self.assertResultsMatchProperties( results )
+	
+	
+	def testEmptyProject( self ) -> None:
+		'''
+		Test sizing of a project without circuits.
+		'''
+		
+		results = sizeCircuits( Project( name = 'Test Project' ) )
+		
+		self.assertEqual( len( results.circuits ), 0 )
+	
+	
+	def testMixedCircuits( self ) -> None:
+		'''
+		Test sizing of circuits with different supplies, load types, conduit runs and breakers.
+		'''
+		
+		wireType = createWireType()
+		supplies = [
+			Supply( voltage = 127, phases = 1 ),
+			Supply( voltage = 220, phases = 2, hasNeutral = False ),
+			Supply( voltage = 380, phases = 3 ),
+		]
+		loadTypes = [
+			LoadType( name = 'Lighting', minimumWireSection = 1.5, demandFactor = 1.0 ),
+			LoadType( name = 'Power', minimumWireSection = 2.5, demandFactor = 0.7 ),
+		]
+		conduitRuns = [
+			ConduitRun( name = 'A', referenceMethod = ReferenceMethod.B1, temperature = 30, length = 10.0 ),
+			ConduitRun( name = 'B', referenceMethod = ReferenceMethod.C, temperature = 45, length = 10.0 ),
+			None,
+		]
+		
+		circuits: list[Circuit] = []
+		for supply, loadType, conduitRun, power, length in product(
+			supplies,
+			loadTypes,
+			conduitRuns,
+			[ 100, 2_500, 9_000, 40_000 ],
+			[ 0.0, 12.5, 80.0 ],
+		):
+			circuit = Circuit(
+				breakerCurve	= BreakerCurve.C,
+				conduitRun		= conduitRun,
+				length			= length,
+				loadPower		= power,
+				loadType		= loadType,
+				name			= 'Test Circuit',
+				supply			= supply,
+				wireType		= wireType,
+			)
+			circuits.append( circuit )
+			
+			if conduitRun:
+				conduitRun.circuits.append( circuit )
+		
+		upstreamCircuit = UpstreamCircuit(
+			breakerCurve	= BreakerCurve.D,
+			circuits		= circuits[:4],
+			length			= 30.0,
+			loadType		= loadTypes[1],
+			name			= 'Test Upstream Circuit',
+			supply			= supplies[2],
+			wireType		= wireType,
+		)
+		
+		project = Project( name = 'Test Project', circuits = [ upstreamCircuit, *circuits[4:] ] )
+		results = sizeCircuits( project )
+		
+		self.assertEqual( len( results.circuits ), len( circuits ) + 1 )
+		self.assertFalse( results.valid.all() )
+		self.assertResultsMatchProperties( results )
+	
+	
+	def testEmptyWireTable( self ) -> None:
+		'''
+		Test sizing of circuits with a wire type without available sizes.
+		'''
+		
+		project = createProject()
+		circuit = next( project.iterCircuits() )
+		circuit.wireType = WireType( material = WireMaterial.ALUMINIUM, insulation = WireInsulation.PVC )
+		results = sizeCircuits( project, [ circuit ] )
+		
+		self.assertFalse( results.valid[0] )
+		self.assertResultsMatchProperties( results )	
+	
+	def testZeroVoltage( self ) -> None:
+		'''
+		Test sizing of circuits with a supply without voltage.
+		'''
+		
+		project = createProject()
+		circuit = next( project.iterCircuits() )
+		circuit.supply = Supply( voltage = 0 )
+		
+		with warnings.catch_warnings():
+			warnings.simplefilter( 'error' )
+			results = sizeCircuits( project, [ circuit ] )
+		
+		self.assertFalse( results.valid[0] )
+		self.assertEqual( results.breaker[0], 0 )
+		self.assertTrue( np.isnan( results.section[0] ) )
@@ -13,7 +13,7 @@ from nbr_5410_calculator.installation.circuit import (
 	WireMaterial,
 	WireType,
 )
-from nbr_5410_calculator.installation.conduitRun import ConduitRun, ReferenceMethod
+from nbr_5410_calculator.installation.conduitRun import ConduitRun, ConduitType, ReferenceMethod
 from nbr_5410_calculator.installation.project import Project
 
 
@@ -229,6 +229,7 @@ def createConduitRunDict( circuits: list[JsonType] ) -> JsonType:
 	return {
 		'__type__': 'nbr_5410_calculator.installation.conduitRun.ConduitRun',
 		'circuits': [ *circuits ],
+		'conduitType': ConduitType.RIGID,
 		'length': 10.0,
 		'name': 'Test Conduit Run',
 		'referenceMethod': ReferenceMethod.B1,
@@ -6,9 +6,12 @@
 
 
 
+import gc
+from threading import Thread
 from typing import override
 from unittest import TestCase
 from uuid import UUID
+from weakref import ref
 
 from nbr_5410_calculator.installation.util import UniqueSerializable
 
@@ -75,7 +78,9 @@ class UniqueSerializableTests( BaseUniqueSerializableTests ):
 		Test deserialization.
 		'''
 		
-		self.assertEqual( TestClass.model_validate( self.testClassJsonDict ), self.testClass )
+		testClass = TestClass.model_validate( self.testClassJsonDict )
+		
+		self.assertTrue( testClass.structurallyEqual( self.testClass ) )
 	
 	
 	def testDeserializeWithoutUuid( self ) -> None:
@@ -88,7 +93,7 @@ class UniqueSerializableTests( BaseUniqueSerializableTests ):
 		self.testClass.uuid = testClass.uuid
 		
 		self.assertIsNotNone( testClass.uuid )
-		self.assertEqual( testClass, self.testClass )
+		self.assertTrue( testClass.structurallyEqual( self.testClass ) )
 		self.assertIsNot( testClass, self.testClass )
 	
 	
@@ -114,6 +119,69 @@ class UniqueSerializableTests( BaseUniqueSerializableTests ):
 		testClass2 = TestClass.model_validate( self.testClassJsonDict )
 		
 		self.assertIs( testClass1, testClass2 )
+	
+	
+	def testInstanceReleased( self ) -> None:
+		'''
+		Test that the registry doesn't keep instances alive.
+		'''
+		
+		self.testClassJsonDict.pop( 'uuid' )
+		testClass = TestClass.model_validate( self.testClassJsonDict )
+		reference = ref( testClass )
+		
+		del testClass
+		gc.collect()
+		
+		self.assertIsNone( reference() )
+	
+	
+	def testSession( self ) -> None:
+		'''
+		Test that instances are only reused within the same session.
+		'''
+		
+		with UniqueSerializable.session():
+			testClass1 = TestClass.model_validate( self.testClassJsonDict )
+			testClass2 = TestClass.model_validate( self.testClassJsonDict )
+		
+		self.assertIs( testClass1, testClass2 )
+		self.assertIsNot( testClass1, self.testClass )
+		self.assertTrue( testClass1.structurallyEqual( self.testClass ) )
+		self.assertIs( TestClass.model_validate( self.testClassJsonDict ), self.testClass )
+	
+	
+	def testThreads( self ) -> None:
+		'''
+		Test that instances aren't reused in other threads.
+		'''
+		
+		instances: list[TestClass] = []
+		thread = Thread(
+			target = lambda: instances.append( TestClass.model_validate( self.testClassJsonDict ) ),
+		)
+		thread.start()
+		thread.join()
+		
+		self.assertIsNot( instances[0], self.testClass )
+		self.assertIs( TestClass.model_validate( self.testClassJsonDict ), self.testClass )
+	
+	
+	def testEquality( self ) -> None:
+		'''
+		Test comparing and hashing instances by UUID.
+		'''
+		
+		with UniqueSerializable.session():
+			testClass = TestClass( name = 'Other Name', uuid = self.testClass.uuid )
+		
+		otherTestClass = TestClass( name = self.testClass.name )
+		
+		self.assertEqual( testClass, self.testClass )
+		self.assertEqual( hash( testClass ), hash( self.testClass ) )
+		self.assertFalse( testClass.structurallyEqual( self.testClass ) )
+		self.assertNotEqual( otherTestClass, self.testClass )
+		self.assertEqual( { self.testClass: 1, otherTestClass: 2 }[testClass], 1 )
 
 
 
@@ -156,5 +224,5 @@ class NestedUniqueSerializableTests( BaseUniqueSerializableTests ):
 		
 		testContainerClass = TestContainerClass.model_validate( self.testContainerJsonDict )
 		
-		self.assertEqual( testContainerClass, self.testContainerClass )
+		self.assertTrue( testContainerClass.structurallyEqual( self.testContainerClass ) )
 		self.assertIs( testContainerClass.items[0], testContainerClass.items[1] )
\ No newline at end of file
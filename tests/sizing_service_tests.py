@@ -0,0 +1,229 @@
+# 
+# NBR 5410 Calculator
+# 
+# 
+# Author: Marcelo Tellier Sartori Vaz <marcelotsvaz@gmail.com>
+
+
+
+from gc import collect
+from typing import Any, override
+from unittest import TestCase
+from weakref import ref
+
+from PySide6.QtCore import QCoreApplication, QModelIndex, QThreadPool, Qt
+
+from nbr_5410_calculator.circuitsTab import CircuitsModel, CircuitsView
+from nbr_5410_calculator.conduitsTab import ConduitRunsModel, ConduitRunsView
+from nbr_5410_calculator.generic_model_views.models import GenericItemModel
+from nbr_5410_calculator.installation.circuit import BaseCircuit, Circuit
+from nbr_5410_calculator.installation.conduitRun import ConduitRun
+from nbr_5410_calculator.installation.dependencies import DependencyGraph
+from nbr_5410_calculator.installation.util import UniqueSerializable
+from nbr_5410_calculator.sizingService import SizingService
+from tests.installation.util import createProject
+
+
+
+class SizingServiceTests( TestCase ):
+	'''
+	Tests for `SizingService` class.
+	'''
+	
+	@override
+	def setUp( self ) -> None:
+		'''
+		Setup for all tests.
+		'''
+		
+		# Timers need an application.
+		self.application = QCoreApplication.instance() or QCoreApplication( [] )
+		
+		UniqueSerializable.clearInstanceRegistry()
+		
+		self.project = createProject()
+		self.project.circuits = self.project.circuits[:1]
+		self.project.conduitRuns = self.project.conduitRuns[:1]
+		self.circuit = self.project.circuits[0]
+		self.conduitRun = self.project.conduitRuns[0]
+		
+		self.circuitsModel = CircuitsModel( self.project )
+		self.circuitsModel.updateFieldOrder( CircuitsView.fieldOrder )
+		self.conduitRunsModel = ConduitRunsModel( self.project.conduitRuns, [ ConduitRun, BaseCircuit ] )
+		self.conduitRunsModel.updateFieldOrder( ConduitRunsView.fieldOrder )
+		
+		self.service = SizingService( interval = 0 )
+		self.service.dependencies = DependencyGraph( self.project )
+		self.service.attach( self.circuitsModel )
+		self.service.attach( self.conduitRunsModel )
+		self.addCleanup( self.service.detachAll )
+		
+		self.resultsReady: list[Any] = []
+		self.service.resultsReady.connect( self.resultsReady.append )
+	
+	
+	def _data( self, model: GenericItemModel[Any], path: list[int], name: str ) -> tuple[Any, Any]:
+		'''
+		Displayed value of field `name` of item at `path`, and the same value read directly.
+		'''
+		
+		index = model.indexFromPath( path )
+		item = model.itemFromIndex( index )
+		fields = next( fields for rowType, fields in model.fields.items() if isinstance( item, rowType ) )
+		column = [ field and field.name for field in fields ].index( name )
+		field = fields[column]
+		assert field
+		
+		return (
+			model.data( model.indexFromPath( path, column ), Qt.ItemDataRole.DisplayRole ),
+			field.valueForDisplay( item ),
+		)
+	
+	
+	def _wait( self ) -> None:
+		'''
+		Wait for all requested results.
+		'''
+		
+		# Submit, finish and emit results, each posted by the previous step.
+		for _ in range( 3 ):
+			QCoreApplication.sendPostedEvents()
+			QThreadPool.globalInstance().waitForDone()
+	
+	
+	def testDeferredFields( self ) -> None:
+		'''
+		Test showing a placeholder until the same values are calculated in another thread.
+		'''
+		
+		fields = [
+			( self.circuitsModel, 'breaker' ),
+			( self.circuitsModel, 'wire' ),
+			( self.circuitsModel, '_wireCapacity' ),
+			( self.circuitsModel, 'voltageDrop' ),
+			( self.conduitRunsModel, 'conduit' ),
+			( self.conduitRunsModel, 'fillFactor' ),
+		]
+		
+		for model, name in fields:
+			self.assertEqual( self._data( model, [ 0 ], name )[0], SizingService.placeholder )
+		
+		self._wait()
+		
+		self.assertEqual( len( self.resultsReady ), 1 )
+		self.assertCountEqual(
+			map( id, self.resultsReady[0] ),
+			[ id( self.circuit ), id( self.conduitRun ) ],
+		)
+		
+		for model, name in fields:
+			displayed, expected = self._data( model, [ 0 ], name )
+			
+			self.assertEqual( displayed, expected )
+	
+	
+	def testDataChanged( self ) -> None:
+		'''
+		Test updating all deferred fields of each row at once when results arrive.
+		'''
+		
+		changes: list[tuple[QModelIndex, QModelIndex]] = []
+		self.circuitsModel.dataChanged.connect( lambda topLeft, bottomRight, _: changes.append( (
+			topLeft,
+			bottomRight,
+		) ) )
+		
+		self._data( self.circuitsModel, [ 0 ], 'wire' )
+		self._data( self.circuitsModel, [ 0 ], 'breaker' )
+		self._wait()
+		
+		fieldNames = [ field and field.name for field in self.circuitsModel.fields[BaseCircuit] ]
+		
+		self.assertEqual( changes, [ (
+			self.circuitsModel.indexFromPath( [ 0 ], fieldNames.index( 'breaker' ) ),
+			self.circuitsModel.indexFromPath( [ 0 ], fieldNames.index( 'wire' ) ),
+		) ] )
+	
+	
+	def testEdit( self ) -> None:
+		'''
+		Test recalculating results after an input changes, in any attached model.
+		'''
+		
+		self._data( self.circuitsModel, [ 0 ], 'voltageDrop' )
+		self._wait()
+		self.resultsReady.clear()
+		
+		fieldNames = [ field and field.name for field in self.conduitRunsModel.fields[BaseCircuit] ]
+		self.conduitRunsModel.setData(
+			self.conduitRunsModel.indexFromPath( [ 0, 0 ], fieldNames.index( 'length' ) ),
+			self.circuit.length * 2,
+			Qt.ItemDataRole.EditRole,
+		)
+		
+		self.assertEqual(
+			self._data( self.circuitsModel, [ 0 ], 'voltageDrop' )[0],
+			SizingService.placeholder,
+		)
+		
+		self._wait()
+		displayed, expected = self._data( self.circuitsModel, [ 0 ], 'voltageDrop' )
+		
+		self.assertEqual( len( self.resultsReady ), 2 )
+		self.assertCountEqual(
+			map( id, self.resultsReady[0] ),
+			[ id( self.circuit ), id( self.conduitRun ) ],
+		)
+		self.assertEqual( self.resultsReady[1], [ self.circuit ] )
+		self.assertEqual( displayed, expected )
+	
+	
+	def testEditAffectedItems( self ) -> None:
+		'''
+		Test updating only items affected by an edit.
+		'''
+		
+		circuit = Circuit(
+			breakerCurve	= self.circuit.breakerCurve,
+			length			= 10.0,
+			loadPower		= 1000,
+			loadType		= self.circuit.loadType,
+			name			= 'Test Circuit 2',
+			supply			= self.circuit.supply,
+			wireType		= self.circuit.wireType,
+		)
+		self.circuitsModel.insertItem( circuit )
+		self._wait()
+		
+		self.assertEqual( self.resultsReady, [ [ circuit ] ] )
+		
+		self.resultsReady.clear()
+		fieldNames = [ field and field.name for field in self.circuitsModel.fields[BaseCircuit] ]
+		self.circuitsModel.setData(
+			self.circuitsModel.indexFromPath( [ 1 ], fieldNames.index( 'length' ) ),
+			20.0,
+			Qt.ItemDataRole.EditRole,
+		)
+		self._wait()
+		
+		self.assertEqual( self.resultsReady, [ [ circuit ] ] )
+	
+	
+	def testReleaseDeleted( self ) -> None:
+		'''
+		Test that results don't keep deleted items alive.
+		'''
+		
+		self._data( self.circuitsModel, [ 0 ], 'wire' )
+		self._data( self.conduitRunsModel, [ 0 ], 'conduit' )
+		self._wait()
+		
+		circuit = ref( self.circuit )
+		self.conduitRunsModel.removeRows( 0, 1, self.conduitRunsModel.indexFromPath( [ 0 ] ) )
+		self.circuitsModel.removeRows( 0, 1, self.circuitsModel.indexFromPath( [] ) )
+		self._wait()
+		del self.circuit
+		self.resultsReady.clear()
+		collect()
+		
+		self.assertIsNone( circuit() )
\ No newline at end of file
@@ -0,0 +1,160 @@
+# 
+# NBR 5410 Calculator
+# 
+# 
+# Author: Marcelo Tellier Sartori Vaz <marcelotsvaz@gmail.com>
+
+
+
+from functools import partial
+from gc import collect
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+from typing import Any, override
+from unittest import TestCase
+from weakref import ref
+
+from PySide6.QtCore import QCoreApplication, QThreadPool
+
+from nbr_5410_calculator.installation.projectFile import dumpProjectIncrementally
+from nbr_5410_calculator.installation.util import UniqueSerializable
+from nbr_5410_calculator.tasks import ProgressCallback, Task, loadProjectFile, saveProjectFile
+from tests.installation.util import createProject
+
+
+
+class TaskTests( TestCase ):
+	'''
+	Tests for `Task` class, `loadProjectFile` and `saveProjectFile`.
+	'''
+	
+	@override
+	def setUp( self ) -> None:
+		'''
+		Setup for all tests.
+		'''
+		
+		# Signals need an application.
+		self.application = QCoreApplication.instance() or QCoreApplication( [] )
+		
+		UniqueSerializable.clearInstanceRegistry()
+		
+		directory = mkdtemp()
+		self.addCleanup( rmtree, directory )
+		self.directory = Path( directory )
+		
+		self.project = createProject()
+	
+	
+	def _run( self, task: Task ) -> list[tuple[str, Any]]:
+		'''
+		Run `task` in this thread. Return signals emitted by it.
+		'''
+		
+		signals: list[tuple[str, Any]] = []
+		
+		def record( name: str, value: Any = None ) -> None:
+			signals.append( ( name, value ) )
+		
+		task.signals.progress.connect( partial( record, 'progress' ) )
+		task.signals.finished.connect( partial( record, 'finished' ) )
+		task.signals.failed.connect( partial( record, 'failed' ) )
+		task.signals.canceled.connect( partial( record, 'canceled' ) )
+		task.run()
+		
+		return signals
+	
+	
+	def testSaveAndLoad( self ) -> None:
+		'''
+		Test saving and loading project files in both formats, reporting progress.
+		'''
+		
+		for fileName in ( 'project.json', 'project.ndjson' ):
+			path = self.directory / fileName
+			signals = self._run( Task( partial( saveProjectFile, self.project, path ) ) )
+			
+			self.assertEqual( signals[-1], ( 'finished', path.read_bytes() ) )
+			self.assertEqual( list( self.directory.iterdir() ), [ path ] )
+			
+			signals = self._run( Task( partial( loadProjectFile, path ) ) )
+			progress = [ value for name, value in signals if name == 'progress' ]
+			name, ( project, registry, snapshot ) = signals[-1]
+			
+			self.assertEqual( name, 'finished' )
+			self.assertEqual( progress, sorted( progress ) )
+			self.assertEqual( progress[-1], 1.0 )
+			self.assertIsNot( project, self.project )
+			self.assertEqual( project.model_dump(), self.project.model_dump() )
+			self.assertIs( registry[project.circuits[0].uuid], project.circuits[0] )
+			self.assertEqual( snapshot, b''.join( dumpProjectIncrementally( self.project ) ) )
+			
+			path.unlink()
+	
+	
+	def testCancel( self ) -> None:
+		'''
+		Test that canceling a save keeps the previous file.
+		'''
+		
+		path = self.directory / 'project.json'
+		path.write_bytes( b'previous' )
+		
+		def save( report: ProgressCallback ) -> bytes:
+			task.cancel()
+			
+			return saveProjectFile( self.project, path, report )
+		
+		task = Task( save )
+		
+		self.assertEqual( self._run( task ), [ ( 'canceled', None ) ] )
+		self.assertEqual( list( self.directory.iterdir() ), [ path ] )
+		self.assertEqual( path.read_bytes(), b'previous' )
+	
+	
+	def testFail( self ) -> None:
+		'''
+		Test loading invalid and missing files.
+		'''
+		
+		path = self.directory / 'project.json'
+		path.write_bytes( b'{ "version": 2 }' )
+		
+		for filePath in ( path, self.directory / 'missing.json' ):
+			signals = self._run( Task( partial( loadProjectFile, filePath ) ) )
+			
+			self.assertEqual( len( signals ), 1 )
+			self.assertEqual( signals[0][0], 'failed' )
+	
+	
+	def testUnexpectedError( self ) -> None:
+		'''
+		Test that any exception raised by the task is reported as a failure.
+		'''
+		
+		def fail( report: ProgressCallback ) -> None:
+			report( 0.5 )
+			
+			raise KeyError( 'missing' )
+		
+		self.assertEqual(
+			self._run( Task( fail ) ),
+			[ ( 'progress', 0.5 ), ( 'failed', "'missing'" ) ],
+		)
+	
+	
+	def testRelease( self ) -> None:
+		'''
+		Test that tasks run in a thread pool are released once they're done.
+		'''
+		
+		task = Task( lambda report: None )
+		QThreadPool.globalInstance().start( task )
+		QThreadPool.globalInstance().waitForDone()
+		
+		taskRef = ref( task )
+		del task
+		collect()
+		
+		self.assertIsNone( taskRef() )
\ No newline at end of file